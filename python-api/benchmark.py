@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for the meeting pipeline
+
+Usage:
+    python benchmark.py workers [--jobs 40] [--work-ms 200] [--processes 1 2 4]
+    python benchmark.py http-client [--requests 200] [--concurrency 1 8] [--url http://localhost:11434/api/tags]
+    python benchmark.py summary-modes [--transcript meeting.txt | --minutes 30] [--runs 1]
+    python benchmark.py compression [--transcript meeting.txt | --minutes 90] [--ratios 1.0 0.7 0.5]
+    python benchmark.py pipeline [--meetings 8] [--minutes 90] [--concurrency 1 4] [--backend fake]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# ---------------------------------------------------------------------------
+# workers: throughput of N worker processes draining the shared job table
+# ---------------------------------------------------------------------------
+
+async def benchmark_job(work_ms: int, mode: str = 'sleep') -> dict:
+    """Stand-in for an ASR job: sleep (I/O or GPU bound) or burn CPU for work_ms"""
+    if mode == 'cpu':
+        deadline = time.perf_counter() + work_ms / 1000
+        digest = b''
+        while time.perf_counter() < deadline:
+            digest = hashlib.sha256(digest).digest()
+    else:
+        await asyncio.sleep(work_ms / 1000)
+    return {'pid': os.getpid()}
+
+def _worker_process(database_url: str, slots: int):
+    """Entry point of one worker process (spawned, so it builds its own engine)"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['MAX_CONCURRENT_TRANSCRIPTIONS'] = str(slots)
+    os.environ['JOB_POLL_INTERVAL'] = '0.05'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    
+    from src.job_queue import JobQueue
+    
+    async def run():
+        queue = JobQueue()
+        queue.register('benchmark', benchmark_job)
+        await queue.start()
+        try:
+            while True:
+                await asyncio.sleep(0.2)
+                stats = queue.get_stats()
+                if stats['queued'] == 0 and stats['running'] == 0:
+                    break
+        finally:
+            await queue.stop()
+    
+    asyncio.run(run())
+
+def run_workers_benchmark(args):
+    print("=== Worker Scale-out Benchmark ===")
+    print(f"jobs={args.jobs} work={args.work_ms}ms mode={args.mode} slots/process={args.slots}\n")
+    
+    context = multiprocessing.get_context('spawn')
+    baseline = None
+    
+    for process_count in args.processes:
+        work_dir = tempfile.mkdtemp(prefix='vmb_bench_')
+        database_url = f"sqlite:///{os.path.join(work_dir, 'jobs.db')}"
+        os.environ['DATABASE_URL'] = database_url
+        
+        # Import after DATABASE_URL is set: the engine is created at import time
+        for module in [m for m in sys.modules if m == 'src' or m.startswith('src.')]:
+            del sys.modules[module]
+        from sqlalchemy import func
+        from src.models import init_db, Job, SessionLocal
+        from src.job_queue import JobQueue
+        
+        init_db()
+        queue = JobQueue()
+        queue.register('benchmark', benchmark_job)
+        
+        async def submit_all():
+            for _ in range(args.jobs):
+                await queue.submit('benchmark', {'work_ms': args.work_ms, 'mode': args.mode})
+        asyncio.run(submit_all())
+        
+        started = time.perf_counter()
+        processes = [
+            context.Process(target=_worker_process, args=(database_url, args.slots))
+            for _ in range(process_count)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        wall = time.perf_counter() - started
+        
+        # Measure from first claim to last completion so process start-up is excluded
+        db = SessionLocal()
+        try:
+            first_start, last_finish = db.query(func.min(Job.started_at), func.max(Job.finished_at)).one()
+        finally:
+            db.close()
+        elapsed = (last_finish - first_start).total_seconds()
+        
+        stats = queue.get_stats()
+        throughput = stats['completed'] / elapsed
+        baseline = baseline or throughput
+        print(f"{process_count:>3} processes: {stats['completed']}/{args.jobs} jobs in {elapsed:6.2f}s "
+              f"-> {throughput:6.2f} jobs/s (x{throughput / baseline:.2f}, wall {wall:.2f}s)")
+    
+    print("\n=== Benchmark Complete ===")
+
+# ---------------------------------------------------------------------------
+# http-client: per-request overhead of a fresh client vs. the pooled client
+# ---------------------------------------------------------------------------
+
+async def _handle_keepalive_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal HTTP/1.1 server answering every request with a small Ollama-like JSON body"""
+    body = b'{"model":"benchmark","response":"OK","done":true}'
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def _time_requests(send, requests: int, concurrency: int) -> float:
+    """Run `requests` calls of send() with the given concurrency, return mean ms per request"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one():
+        async with semaphore:
+            await send()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return (time.perf_counter() - started) * 1000 / requests
+
+async def _run_http_client_benchmark(args):
+    import httpx
+    from src.http_client import HttpClientPool
+    
+    server = None
+    url = args.url
+    if not url:
+        server = await asyncio.start_server(_handle_keepalive_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/api/generate"
+    payload = {'model': 'benchmark', 'prompt': 'OK', 'stream': False}
+    
+    async def per_request_client():
+        # Previous behaviour: new client, pool and TCP connection for every prompt
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+    
+    pool = HttpClientPool()
+    
+    async def pooled_client():
+        client = pool.get('benchmark', timeout=30.0)
+        async with pool.limiter('benchmark'):
+            response = await client.post(url, json=payload)
+        response.raise_for_status()
+    
+    print(f"target={url} requests={args.requests}\n")
+    try:
+        for concurrency in args.concurrency:
+            # Warm up both paths (DNS, imports, first connection)
+            await per_request_client()
+            await pooled_client()
+            fresh_ms = await _time_requests(per_request_client, args.requests, concurrency)
+            pooled_ms = await _time_requests(pooled_client, args.requests, concurrency)
+            print(f"concurrency {concurrency:>3}: new client {fresh_ms:7.3f} ms/req | "
+                  f"pooled {pooled_ms:7.3f} ms/req | saved {fresh_ms - pooled_ms:7.3f} ms/req "
+                  f"(x{fresh_ms / pooled_ms:.2f})")
+    finally:
+        await pool.aclose()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+def run_http_client_benchmark(args):
+    print("=== HTTP Client Overhead Benchmark ===")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    asyncio.run(_run_http_client_benchmark(args))
+    print("\n=== Benchmark Complete ===")
+
+# ---------------------------------------------------------------------------
+# summary-modes: LLM time per meeting, single-pass JSON vs. split prompts
+# ---------------------------------------------------------------------------
+
+SAMPLE_TURNS = [
+    "今日は新機能のリリース計画について確認したいと思います。",
+    "テストはほぼ終わっていて、残りは決済まわりの確認だけです。",
+    "では金曜日までに決済のテストを終わらせて、月曜日にリリース判定をしましょう。",
+    "ドキュメントの更新は誰が担当しますか？",
+    "私がやります。水曜日までにドラフトを共有します。",
+    "問い合わせ対応の体制も決めておく必要がありますね。",
+]
+
+def synthetic_transcript(minutes: int) -> str:
+    """Japanese meeting transcript with roughly four speaker turns per minute"""
+    lines = []
+    for turn in range(minutes * 4):
+        seconds = turn * 15
+        lines.append(f"[{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}] 参加者{turn % 3 + 1}:")
+        lines.append(f"  {SAMPLE_TURNS[turn % len(SAMPLE_TURNS)]}")
+    return "\n".join(lines)
+
+async def _run_summary_modes_benchmark(args):
+    from src.summarization import SummarizationService
+    
+    if args.transcript:
+        with open(args.transcript, encoding='utf-8') as f:
+            transcript = f.read()
+    else:
+        transcript = synthetic_transcript(args.minutes)
+    participants = ['参加者1', '参加者2', '参加者3']
+    
+    service = SummarizationService()
+    await service.initialize()
+    print(f"model={service.model} host={service.host} transcript={len(transcript)} chars "
+          f"(~{service.token_estimator.estimate(transcript)} tokens) runs={args.runs}\n")
+    
+    baseline = None
+    for index, mode in enumerate(args.modes):
+        service.summary_mode = mode
+        before = dict(service.usage)
+        started = time.perf_counter()
+        for run in range(args.runs):
+            await service.create_comprehensive_summary(f"bench_{mode}_{run}", transcript, participants, args.minutes)
+        wall = (time.perf_counter() - started) / args.runs
+        
+        usage = {key: (service.usage[key] - before[key]) / args.runs for key in before}
+        if index == 0:
+            baseline = usage['llm_seconds']
+        relative = f" (x{usage['llm_seconds'] / baseline:.2f})" if baseline else ''
+        print(f"{mode:>8}: {usage['calls']:4.1f} calls | {usage['prompt_tokens']:8.0f} prompt tokens | "
+              f"{usage['eval_tokens']:6.0f} output tokens | {usage['llm_seconds']:7.2f} LLM s{relative} | "
+              f"{wall:7.2f} s wall per meeting")
+
+def run_summary_modes_benchmark(args):
+    print("=== Summary Mode Benchmark ===")
+    if not args.transcript:
+        # The synthetic transcript cycles through a few lines, which compression would collapse
+        os.environ.setdefault('COMPRESSION_ENABLED', 'false')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    asyncio.run(_run_summary_modes_benchmark(args))
+    print("\n=== Benchmark Complete ===")
+
+# ---------------------------------------------------------------------------
+# compression: prompt tokens removed by extractive pre-compression
+# ---------------------------------------------------------------------------
+
+def run_compression_benchmark(args):
+    print("=== Transcript Compression Benchmark ===")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from src.text_chunking import TokenEstimator
+    from src.transcript_compression import TranscriptCompressor
+    
+    if args.transcript:
+        with open(args.transcript, encoding='utf-8') as f:
+            transcript = f.read()
+    else:
+        transcript = synthetic_transcript(args.minutes)
+    
+    estimator = TokenEstimator()
+    original_tokens = estimator.estimate(transcript)
+    print(f"transcript={len(transcript)} chars (~{original_tokens} tokens)\n")
+    
+    for ratio in args.ratios:
+        compressor = TranscriptCompressor()
+        compressor.ratio = ratio
+        started = time.perf_counter()
+        compressed = compressor.compress(transcript)
+        elapsed = time.perf_counter() - started
+        tokens = estimator.estimate(compressed)
+        print(f"ratio {ratio:4.2f}: {len(compressed):7d} chars | ~{tokens:6d} tokens "
+              f"({tokens / original_tokens:6.1%} of original) | {elapsed * 1000:7.1f} ms")
+    
+    print("\n=== Benchmark Complete ===")
+
+# ---------------------------------------------------------------------------
+# pipeline: meetings per hour through chunk summaries and the final summary
+# ---------------------------------------------------------------------------
+
+async def _summarize_meeting(service, meeting_index: int, minutes: int, chunk_minutes: int) -> float:
+    """Chunk summaries, then the integrated summary, as the live pipeline runs them"""
+    from datetime import datetime, timedelta
+    
+    started = time.perf_counter()
+    meeting_id = f"bench_meeting_{meeting_index}"
+    participants = ['参加者1', '参加者2', '参加者3']
+    start_time = datetime.now()
+    
+    chunk_summaries = []
+    for chunk_index in range((minutes + chunk_minutes - 1) // chunk_minutes):
+        chunk_length = min(chunk_minutes, minutes - chunk_index * chunk_minutes)
+        transcript = synthetic_transcript(chunk_length)
+        chunk_summaries.append(await service.create_realtime_chunk_summary(
+            meeting_id=meeting_id,
+            chunk_index=chunk_index,
+            transcript_text=transcript,
+            participants=participants,
+            chunk_start_time=start_time + timedelta(minutes=chunk_index * chunk_minutes),
+            chunk_end_time=start_time + timedelta(minutes=chunk_index * chunk_minutes + chunk_length)
+        ))
+    
+    await service.create_final_integrated_summary(meeting_id, chunk_summaries, minutes, participants)
+    return time.perf_counter() - started
+
+async def _run_pipeline_benchmark(args):
+    from src.models import init_db
+    from src.summarization import SummarizationService
+    
+    init_db()
+    service = SummarizationService()
+    await service.initialize()
+    print(f"backend={service.backend.name} model={service.model} meetings={args.meetings} "
+          f"minutes={args.minutes} chunk={args.chunk_minutes}min\n")
+    
+    for concurrency in args.concurrency:
+        semaphore = asyncio.Semaphore(concurrency)
+        before = dict(service.usage)
+        
+        async def one(index):
+            async with semaphore:
+                return await _summarize_meeting(service, index, args.minutes, args.chunk_minutes)
+        
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[one(f"{concurrency}_{n}") for n in range(args.meetings)])
+        wall = time.perf_counter() - started
+        
+        usage = {key: service.usage[key] - before[key] for key in before}
+        print(f"{concurrency:>3} meetings at once: {args.meetings / wall * 3600:8.1f} meetings/h | "
+              f"{sum(latencies) / len(latencies):7.2f} s per meeting | {usage['calls']:4d} LLM calls | "
+              f"{usage['prompt_tokens'] + usage['eval_tokens']:8d} tokens | "
+              f"{usage['eval_tokens'] / wall:6.1f} output tokens/s")
+
+def run_pipeline_benchmark(args):
+    print("=== Meeting Pipeline Benchmark ===")
+    # Before importing src: engine, backend and cache read the environment at import/init
+    os.environ['LLM_BACKEND'] = args.backend
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='vmb_bench_'), 'pipeline.db')}")
+    os.environ['SUMMARY_CACHE_ENABLED'] = 'false'
+    # The synthetic transcript cycles through a few lines, which compression would collapse
+    os.environ.setdefault('COMPRESSION_ENABLED', 'false')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    asyncio.run(_run_pipeline_benchmark(args))
+    print("\n=== Benchmark Complete ===")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    workers = subparsers.add_parser('workers', help='Job throughput vs. number of worker processes')
+    workers.add_argument('--jobs', type=int, default=40)
+    workers.add_argument('--work-ms', type=int, default=200)
+    workers.add_argument('--mode', choices=['sleep', 'cpu'], default='sleep')
+    workers.add_argument('--slots', type=int, default=1, help='Concurrent jobs per process')
+    workers.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    workers.set_defaults(func=run_workers_benchmark)
+    
+    http_client = subparsers.add_parser('http-client', help='Per-request overhead: new client vs. pooled keep-alive client')
+    http_client.add_argument('--requests', type=int, default=200)
+    http_client.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    http_client.add_argument('--url', default=None, help='Endpoint to POST to (default: built-in local server)')
+    http_client.set_defaults(func=run_http_client_benchmark)
+    
+    summary_modes = subparsers.add_parser('summary-modes', help='LLM seconds per meeting: split prompts vs. single JSON pass (needs Ollama)')
+    summary_modes.add_argument('--transcript', default=None, help='Transcript file (default: synthetic Japanese meeting)')
+    summary_modes.add_argument('--minutes', type=int, default=30, help='Length of the synthetic meeting')
+    summary_modes.add_argument('--runs', type=int, default=1)
+    summary_modes.add_argument('--modes', nargs='+', choices=['split', 'combined'], default=['split', 'combined'])
+    summary_modes.set_defaults(func=run_summary_modes_benchmark)
+    
+    compression = subparsers.add_parser('compression', help='Prompt tokens left after extractive compression (CPU only)')
+    compression.add_argument('--transcript', default=None, help='Transcript file (default: synthetic Japanese meeting)')
+    compression.add_argument('--minutes', type=int, default=90, help='Length of the synthetic meeting')
+    compression.add_argument('--ratios', type=float, nargs='+', default=[1.0, 0.7, 0.5])
+    compression.set_defaults(func=run_compression_benchmark)
+    
+    pipeline = subparsers.add_parser('pipeline', help='Meetings per hour through chunk and final summaries (fake backend needs no model)')
+    pipeline.add_argument('--meetings', type=int, default=8)
+    pipeline.add_argument('--minutes', type=int, default=90, help='Length of each synthetic meeting')
+    pipeline.add_argument('--chunk-minutes', type=int, default=30)
+    pipeline.add_argument('--concurrency', type=int, nargs='+', default=[1, 4], help='Meetings summarized at once')
+    pipeline.add_argument('--backend', choices=['fake', 'ollama', 'openai'], default='fake')
+    pipeline.set_defaults(func=run_pipeline_benchmark)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
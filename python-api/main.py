@@ -1,22 +1,28 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import os
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict
 import asyncio
 from dotenv import load_dotenv
 from pathlib import Path
 import json
+import re
+import time
+import uuid
 import httpx
+import aiofiles
 
 from src.models import init_db
 from src.transcription import TranscriptionService
 from src.summarization import SummarizationService
 from src.meeting_manager import MeetingManager
+from src.job_queue import JobQueue, JobPriority, MissingJobDataError
+from src.http_client import http_clients
 
 # Load environment variables
 load_dotenv()
@@ -82,16 +88,69 @@ app.add_middleware(
 transcription_service = TranscriptionService()
 summarization_service = SummarizationService()
 meeting_manager = MeetingManager()
+job_queue = JobQueue()
+
+# When false this process is only the ingestion API; ASR/LLM jobs are run by worker.py processes
+embedded_workers = os.getenv('EMBEDDED_WORKERS', 'true').lower() == 'true'
+
+# Pipelined decodes of /transcribe/stream uploads, by stream id. The upload is also spooled
+# to disk and queued as a transcribe job; the job uses the decode when it runs in this
+# process and transcribes the spooled file otherwise (other process, restart, retry).
+stream_sessions: Dict[str, object] = {}
+STREAM_SESSION_TTL_SECONDS = 300
+
+# Running summary of ongoing meetings, refreshed from new transcript segments every interval
+rolling_summary_enabled = os.getenv('ROLLING_SUMMARY_ENABLED', 'true').lower() == 'true'
+rolling_summary_interval = float(os.getenv('ROLLING_SUMMARY_INTERVAL', 300))
+rolling_summary_max_segments = int(os.getenv('ROLLING_SUMMARY_MAX_SEGMENTS', 200))
+
+# A chunk is summarized once its speaker files stopped arriving for this long
+chunk_summary_quiet_seconds = float(os.getenv('CHUNK_SUMMARY_QUIET_SECONDS', 20))
+
+# Draft the final summary at finalize from the chunk summaries already there; when the last
+# chunk lands it is folded in with one update instead of integrating every chunk again
+final_speculation_enabled = os.getenv('FINAL_SPECULATION_ENABLED', 'true').lower() == 'true'
+final_speculation_max_late_chunks = int(os.getenv('FINAL_SPECULATION_MAX_LATE_CHUNKS', 2))
+
+# After finalize, how often to check whether the meeting's last transcriptions are done
+final_summary_check_seconds = float(os.getenv('FINAL_SUMMARY_CHECK_SECONDS', 2))
+
+# Batch re-summarization: meetings per job before the run re-queues itself behind newer work
+batch_summary_meetings_per_job = max(1, int(os.getenv('BATCH_SUMMARY_MEETINGS_PER_JOB', 1)))
+
+def chunk_job_key(meeting_id: str, chunk_index) -> str:
+    """Key shared by the transcription jobs and the summary job of one chunk"""
+    return f"chunk:{meeting_id}:{chunk_index}"
+
+def transcription_group_key(meeting_id: str, chunk_index=None) -> str:
+    """Group of a transcription job: its chunk, or 'final' for files without a chunk number (the final flush)"""
+    return chunk_job_key(meeting_id, chunk_index or 'final')
+
+def rolling_job_key(meeting_id: str) -> str:
+    """Dedupe key of a meeting's rolling summary job, so only one update chain runs per meeting"""
+    return f"rolling:{meeting_id}"
+
+def summary_group_key(meeting_id: str) -> str:
+    """Group of the chunk summary and speculative jobs the final summary waits for"""
+    return f"summaries:{meeting_id}"
+
+# Summary types /download/meeting/{id}/final-summary prefers, newest first within each
+FINAL_SUMMARY_TYPES = ['integrated_final', 'hierarchical']
+
+def chunk_index_from_filename(filename: Optional[str]) -> Optional[str]:
+    """Chunk number of a bot upload named chunk_<index>_<user>.pcm"""
+    match = re.match(r'chunk_(\d+)_', filename or '')
+    return match.group(1) if match else None
 
 async def send_webhook_notification(meeting_id: str, webhook_data: dict):
     """Send webhook notification to Discord bot"""
     try:
         webhook_url = os.getenv('DISCORD_WEBHOOK_URL', 'http://localhost:3002/webhook/meeting-completed')
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(webhook_url, json=webhook_data)
-            response.raise_for_status()
-            logger.info(f"Webhook sent successfully for meeting {meeting_id}")
+        client = http_clients.get('webhook', timeout=10.0)
+        response = await client.post(webhook_url, json=webhook_data)
+        response.raise_for_status()
+        logger.info(f"Webhook sent successfully for meeting {meeting_id}")
     except httpx.TimeoutException:
         logger.warning(f"Webhook timeout for meeting {meeting_id} - falling back to polling")
     except Exception as e:
@@ -128,122 +187,198 @@ async def process_transcription(
     meeting_id: str,
     speaker_id: str,
     timestamp: str,
-    chunk_index: str = None
+    chunk_index: str = None,
+    stream_id: str = None
 ):
-    """Process transcription and save to database"""
-    try:
-        # Handle None values with defaults
-        if not meeting_id:
-            meeting_id = "unknown_meeting"
-            logger.warning("Meeting ID is None, using default")
-        
-        if not speaker_id:
-            speaker_id = "unknown_speaker"
-            logger.warning("Speaker ID is None, using default")
-        
-        logger.info(f"Processing transcription for meeting: {meeting_id}, speaker: {speaker_id}, chunk: {chunk_index}")
-        
+    """Process transcription and save to database
+        
+    Errors propagate so the job queue can retry; mark_transcription_failed runs
+    once the retries are used up. The audio file is deleted only once the result
+    is saved, so a retry always finds it.
+    """
+    # Handle None values with defaults
+    if not meeting_id:
+        meeting_id = "unknown_meeting"
+        logger.warning("Meeting ID is None, using default")
+        
+    if not speaker_id:
+        speaker_id = "unknown_speaker"
+        logger.warning("Speaker ID is None, using default")
+        
+    logger.info(f"Processing transcription for meeting: {meeting_id}, speaker: {speaker_id}, chunk: {chunk_index}")
+    
+    session = stream_sessions.pop(stream_id, None) if stream_id else None
+    if await meeting_manager.has_transcription(meeting_id, file_path):
+        # A retry after the result was saved: only the follow-ups and the cleanup may be missing
+        if session is not None:
+            await session.cancel()
+        await schedule_transcription_followups(meeting_id, chunk_index)
+        await transcription_service._cleanup_files([file_path])
+        return
+    
+    result = None
+    if session is not None:
+        # Decoded while the upload was still arriving
+        try:
+            result = await session.result()
+            logger.info(f"Streamed transcription decoded {result.get('windows', 0)} windows for meeting {meeting_id}")
+        except Exception as e:
+            logger.warning(f"Pipelined decode of stream {stream_id} failed, transcribing the spooled file: {e}")
+    
+    if result is None:
         # Perform transcription
         result = await transcription_service.transcribe_file(
             file_path,
             meeting_id,
             speaker_id,
-            timestamp
+            timestamp,
+            keep_input=True
+        )
+    
+    await handle_transcription_result(result, meeting_id, speaker_id, file_path, chunk_index)
+    await transcription_service._cleanup_files([file_path])
+
+async def mark_transcription_failed(
+    file_path: str,
+    meeting_id: str,
+    speaker_id: str,
+    timestamp: str,
+    chunk_index: str = None,
+    stream_id: str = None,
+    error_message: str = None
+):
+    """Record a transcription that failed permanently and drop its audio file"""
+    logger.error(f"Failed to process transcription: {error_message}")
+    session = stream_sessions.pop(stream_id, None) if stream_id else None
+    if session is not None:
+        await session.cancel()
+    await transcription_service._cleanup_files([file_path])
+    if meeting_id and meeting_id != "unknown_meeting":
+        await meeting_manager.update_processing_status(
+            meeting_id,
+            transcription_status="failed",
+            error_message=error_message
+        )
+
+async def handle_transcription_result(
+    result: dict,
+    meeting_id: str,
+    speaker_id: str,
+    audio_file_path: str,
+    chunk_index: str = None
+):
+    """Save a transcription result and run chunk/final summarization follow-ups
+    
+    Safe to run again for the same audio file: the segment and its chunk count are
+    saved once, and the follow-ups are deduplicated or claimed once.
+    """
+    # Save to database
+    if result and result.get("text"):
+        await meeting_manager.record_transcription(
+            meeting_id=meeting_id,
+            speaker_id=speaker_id,
+            speaker_name=f"User_{speaker_id}",
+            text=result["text"],
+            confidence=result.get("confidence", 0.0),
+            start_time=datetime.fromisoformat(result["timestamp"]) if result.get("timestamp") else datetime.utcnow(),
+            duration_seconds=result.get("duration", 0.0),
+            audio_file_path=audio_file_path
         )
         
-        # Save to database
-        if result and result.get("text"):
-            await meeting_manager.add_transcript_segment(
-                meeting_id=meeting_id,
-                speaker_id=speaker_id,
-                speaker_name=f"User_{speaker_id}",
-                text=result["text"],
-                confidence=result.get("confidence", 0.0),
-                start_time=datetime.fromisoformat(result["timestamp"]) if result.get("timestamp") else datetime.utcnow(),
-                duration_seconds=result.get("duration", 0.0),
-                audio_file_path=file_path
-            )
-            
-            logger.info(f"Transcription saved to database for meeting {meeting_id}")
-            
-            # Update completed chunks count
-            await meeting_manager.increment_completed_chunks(meeting_id)
-            
-            # NEW: Try to determine chunk index and generate real-time chunk summary
-            try:
-                if chunk_index is not None:
-                    # Extract numeric chunk index
-                    numeric_chunk_index = int(chunk_index) if isinstance(chunk_index, str) and chunk_index.isdigit() else 0
-                    
-                    # Get chunk transcript data
-                    chunk_data = await meeting_manager.get_chunk_transcript_for_summary(
-                        meeting_id, numeric_chunk_index
-                    )
-                    
-                    if chunk_data and chunk_data.get('transcript_text'):
-                        logger.info(f"Generating real-time summary for chunk {numeric_chunk_index}")
-                        
-                        # Generate chunk summary
-                        chunk_summary_data = await summarization_service.create_realtime_chunk_summary(
-                            meeting_id=meeting_id,
-                            chunk_index=numeric_chunk_index,
-                            transcript_text=chunk_data['transcript_text'],
-                            participants=chunk_data.get('participants', []),
-                            chunk_start_time=chunk_data['chunk_start_time'],
-                            chunk_end_time=chunk_data['chunk_end_time']
-                        )
-                        
-                        # Save chunk summary to database
-                        await meeting_manager.save_chunk_summary(
-                            meeting_id=meeting_id,
-                            chunk_index=numeric_chunk_index,
-                            chunk_start_time=chunk_data['chunk_start_time'],
-                            chunk_end_time=chunk_data['chunk_end_time'],
-                            transcript_text=chunk_data['transcript_text'],
-                            summary_text=chunk_summary_data['summary_text'],
-                            key_points=chunk_summary_data['key_points'],
-                            participants=chunk_data.get('participants', [])
-                        )
-                        
-                        # Send chunk summary to Discord immediately
-                        await send_chunk_summary_to_discord(meeting_id, chunk_summary_data)
-                        
-                        logger.info(f"Real-time chunk summary completed for chunk {numeric_chunk_index}")
-                        
-            except Exception as chunk_error:
-                logger.error(f"Failed to generate chunk summary: {chunk_error}")
-                # Continue with normal processing even if chunk summary fails
-            
-            # Check if all chunks are completed for final summary
-            if await meeting_manager.check_all_chunks_completed(meeting_id):
-                logger.info(f"All chunks completed for meeting {meeting_id}, generating final integrated summary")
-                
-                # Generate final integrated summary from all chunk summaries
-                await generate_final_integrated_summary(meeting_id)
-                
-                # Send webhook notification after final summarization is complete
-                webhook_data = {
-                    "meeting_id": meeting_id,
-                    "event": "meeting_completed",
-                    "timestamp": datetime.now().isoformat(),
-                    "download_links": {
-                        "summary": f"/download/meeting/{meeting_id}/summary",
-                        "transcript": f"/download/meeting/{meeting_id}/transcript",
-                        "chunks": f"/download/meeting/{meeting_id}/chunks"
-                    }
-                }
-                await send_webhook_notification(meeting_id, webhook_data)
-        else:
-            logger.warning(f"No transcription text to save for meeting {meeting_id}")
-            
-    except Exception as e:
-        logger.error(f"Failed to process transcription: {e}")
-        if meeting_id and meeting_id != "unknown_meeting":
-            await meeting_manager.update_processing_status(
-                meeting_id,
-                transcription_status="failed",
-                error_message=str(e)
+        logger.info(f"Transcription saved to database for meeting {meeting_id}")
+        
+        await schedule_transcription_followups(meeting_id, chunk_index)
+    else:
+        logger.warning(f"No transcription text to save for meeting {meeting_id}")
+
+async def schedule_transcription_followups(meeting_id: str, chunk_index: str = None):
+    """Queue the chunk summary of a transcribed file, and the final summary once all chunks are in"""
+    # Every speaker file of a chunk lands here; the summary job is debounced so the
+    # chunk is summarized once, after its files stopped arriving
+    try:
+        if chunk_index is not None and str(chunk_index).isdigit():
+            await job_queue.submit(
+                'chunk_summary',
+                {'meeting_id': meeting_id, 'chunk_index': int(chunk_index), 'wait_for_transcripts': True},
+                JobPriority.LIVE,
+                delay=chunk_summary_quiet_seconds,
+                dedupe_key=chunk_job_key(meeting_id, chunk_index),
+                group_key=summary_group_key(meeting_id)
             )
+        
+    except Exception as chunk_error:
+        logger.error(f"Failed to schedule chunk summary: {chunk_error}")
+        # Continue with normal processing even if chunk summary fails
+    
+    # Exactly one worker wins the claim once all chunks are completed
+    if await queue_final_summary(meeting_id):
+        logger.info(f"All chunks completed for meeting {meeting_id}, queued final integrated summary")
+
+async def queue_final_summary(meeting_id: str) -> bool:
+    """Claim the final summary and queue its job in one transaction; False if not claimed
+    
+    The chunk count alone does not tell when a finalized meeting is transcribed: live
+    chunks are counted too, and the bot uploads its final files right before finalize.
+    So nothing is claimed while any transcription of the meeting is still pending;
+    a check is queued instead, which calls this again shortly after.
+    """
+    if not await meeting_manager.awaiting_final_summary(meeting_id):
+        return False
+    
+    # Every transcription group of the meeting; a transcription job calling this counts itself
+    pending = await job_queue.count_pending(chunk_job_key(meeting_id, ''), 'transcribe', prefix=True)
+    if pending:
+        await job_queue.submit(
+            'final_summary_check',
+            {'meeting_id': meeting_id},
+            JobPriority.FINAL,
+            delay=final_summary_check_seconds,
+            dedupe_key=f"final-check:{meeting_id}"
+        )
+        return False
+    
+    job = job_queue.new_job('final_summary', {'meeting_id': meeting_id}, JobPriority.FINAL)
+    if not await meeting_manager.claim_final_summary(meeting_id, job):
+        return False
+    job_queue.wake()
+    return True
+
+async def complete_meeting(meeting_id: str):
+    """Generate the final integrated summary and notify that the meeting is complete"""
+    # Chunk summaries or the speculative draft still being made: use them once they are done
+    pending = await job_queue.count_pending(summary_group_key(meeting_id))
+    if pending:
+        await job_queue.submit(
+            'final_summary',
+            {'meeting_id': meeting_id},
+            JobPriority.FINAL,
+            delay=chunk_summary_quiet_seconds,
+            dedupe_key=f"final:{meeting_id}"
+        )
+        return {"deferred": True, "pending_summaries": pending}
+    
+    # The audio flushed at the end of the meeting has no chunk summary yet
+    for chunk_index in await meeting_manager.get_unsummarized_chunk_indexes(meeting_id):
+        try:
+            await regenerate_chunk_summary(meeting_id, chunk_index)
+        except Exception as e:
+            logger.error(f"Failed to summarize late chunk {chunk_index} of meeting {meeting_id}: {e}")
+    
+    # Generate final integrated summary from all chunk summaries
+    await generate_final_integrated_summary(meeting_id)
+    
+    # Send webhook notification after final summarization is complete
+    webhook_data = {
+        "meeting_id": meeting_id,
+        "event": "meeting_completed",
+        "timestamp": datetime.now().isoformat(),
+        "download_links": {
+            "summary": f"/download/meeting/{meeting_id}/summary",
+            "transcript": f"/download/meeting/{meeting_id}/transcript",
+            "chunks": f"/download/meeting/{meeting_id}/chunks"
+        }
+    }
+    await send_webhook_notification(meeting_id, webhook_data)
 
 async def generate_final_integrated_summary(meeting_id: str):
     """Generate final integrated summary from all chunk summaries"""
@@ -262,22 +397,24 @@ async def generate_final_integrated_summary(meeting_id: str):
         if not chunk_summaries:
             logger.warning(f"No chunk summaries found for meeting: {meeting_id}")
             # Fallback to old hierarchical summarization
-            await meeting_manager.trigger_hierarchical_summarization(meeting_id)
+            await meeting_manager.trigger_hierarchical_summarization(meeting_id, summarization_service)
             return
         
         # Generate final integrated summary
         participants = meeting_status.get('participants', [])
         total_duration = meeting_status.get('duration_minutes', 0)
         
-        integrated_summary_data = await summarization_service.create_final_integrated_summary(
-            meeting_id=meeting_id,
-            chunk_summaries=chunk_summaries,
-            total_duration=total_duration,
-            all_participants=participants
-        )
+        integrated_summary_data = await summary_from_draft(meeting_id, chunk_summaries, total_duration, participants)
+        if integrated_summary_data is None:
+            integrated_summary_data = await summarization_service.create_final_integrated_summary(
+                meeting_id=meeting_id,
+                chunk_summaries=chunk_summaries,
+                total_duration=total_duration,
+                all_participants=participants
+            )
         
         # Save integrated summary to file
-        file_path = await summarization_service.save_summary(meeting_id, integrated_summary_data)
+        file_path = await summarization_service.save_summary(meeting_id, integrated_summary_data, 'integrated_final')
         
         # Save to database
         await meeting_manager.save_summary(
@@ -285,8 +422,12 @@ async def generate_final_integrated_summary(meeting_id: str):
             summary_content=integrated_summary_data['full_summary'],
             summary_type='integrated_final',
             file_path=file_path,
-            generated_by='ollama_integrated'
+            generated_by='ollama_integrated',
+            template_id=integrated_summary_data.get('template_id'),
+            template_version=integrated_summary_data.get('template_version')
         )
+        await meeting_manager.delete_speculative_summary(meeting_id)
+        summarization_service.clear_summary_steps(meeting_id)
         
         # Update meeting status
         await meeting_manager.update_meeting_status(meeting_id, 'completed')
@@ -309,12 +450,331 @@ async def generate_final_integrated_summary(meeting_id: str):
         logger.info(f"Final integrated summary completed for meeting: {meeting_id}")
         
     except Exception as e:
+        # The final_summary job is retried; mark_final_summary_failed runs once retries are used up
         logger.error(f"Failed to generate final integrated summary: {e}")
-        await meeting_manager.update_processing_status(
-            meeting_id, 
-            summarization_status='failed',
-            error_message=str(e)
+        raise
+
+async def mark_final_summary_failed(meeting_id: str, error_message: str = None):
+    """Record a final summary that failed permanently"""
+    logger.error(f"Final summary of meeting {meeting_id} failed: {error_message}")
+    await meeting_manager.update_processing_status(
+        meeting_id,
+        summarization_status='failed',
+        error_message=error_message
+    )
+
+async def run_summarization(
+    meeting_id: str,
+    transcript_text: str,
+    participants: List[str],
+    duration_minutes: int
+) -> dict:
+    """Summarize a transcript and save it to a file"""
+    summary = await summarization_service.create_summary(
+        meeting_id=meeting_id,
+        transcript=transcript_text,
+        participants=participants,
+        duration=duration_minutes
+    )
+    
+    summary_path = await summarization_service.save_summary(meeting_id, summary)
+    
+    return {
+        "summary": summary,
+        "summary_file": summary_path
+    }
+
+async def speculate_final_summary(meeting_id: str) -> dict:
+    """Draft the final summary from the chunk summaries available now, while the last audio transcribes"""
+    if await meeting_manager.final_summary_claimed(meeting_id):
+        return {"skipped": "final summary already started"}
+    
+    meeting_status = await meeting_manager.get_meeting_status(meeting_id)
+    chunk_summaries = await meeting_manager.get_all_chunk_summaries(meeting_id)
+    if not meeting_status or not chunk_summaries:
+        return {"skipped": "no chunk summaries yet"}
+    
+    # Reduce steps are kept: a from-scratch final run reuses every group the late chunks do not touch
+    draft = await summarization_service.create_final_integrated_summary(
+        meeting_id=meeting_id,
+        chunk_summaries=chunk_summaries,
+        total_duration=meeting_status.get('duration_minutes', 0),
+        all_participants=meeting_status.get('participants', []),
+        keep_steps=True
+    )
+    await meeting_manager.save_speculative_summary(
+        meeting_id, draft['full_summary'], chunk_summaries, draft.get('template_version')
+    )
+    return {"chunks": len(chunk_summaries)}
+
+async def summary_from_draft(
+    meeting_id: str,
+    chunk_summaries: List[Dict],
+    total_duration: int,
+    participants: List[str]
+) -> Optional[dict]:
+    """Final summary from the speculative draft: as is, or updated with the chunks that landed later
+    
+    None when there is no usable draft: none was made, a chunk it covers changed since,
+    the templates changed, or more than FINAL_SPECULATION_MAX_LATE_CHUNKS arrived later.
+    """
+    draft = await meeting_manager.get_speculative_summary(meeting_id)
+    if not draft:
+        return None
+    
+    templates = summarization_service.INTEGRATED_TEMPLATES
+    if draft['template_version'] != summarization_service.templates.version(templates):
+        return None
+    
+    current = {chunk['chunk_index']: meeting_manager.chunk_digest(chunk) for chunk in chunk_summaries}
+    if any(current.get(index) != digest for index, digest in draft['chunk_digests'].items()):
+        logger.info(f"Chunk summaries of meeting {meeting_id} changed since the draft, integrating from scratch")
+        return None
+    
+    late_chunks = [chunk for chunk in chunk_summaries if chunk['chunk_index'] not in draft['chunk_digests']]
+    if len(late_chunks) > final_speculation_max_late_chunks:
+        return None
+    
+    if not late_chunks:
+        logger.info(f"Final summary of meeting {meeting_id} taken from the speculative draft")
+        return {
+            'full_summary': draft['summary_text'],
+            'meeting_id': meeting_id,
+            'generated_at': datetime.now().isoformat(),
+            'participants': participants,
+            'duration_minutes': total_duration,
+            'chunk_count': len(chunk_summaries),
+            'summary_type': 'integrated',
+            'template_id': templates,
+            'template_version': draft['template_version']
+        }
+    
+    return await summarization_service.update_integrated_summary(
+        meeting_id=meeting_id,
+        previous_summary=draft['summary_text'],
+        new_chunks=late_chunks,
+        total_duration=total_duration,
+        all_participants=participants,
+        chunk_count=len(chunk_summaries)
+    )
+
+async def regenerate_chunk_summary(meeting_id: str, chunk_index: int, wait_for_transcripts: bool = False) -> dict:
+    """Regenerate, save and send the summary of a single chunk"""
+    if wait_for_transcripts:
+        # Speaker files of this chunk still being transcribed: check again after another quiet period
+        pending = await job_queue.count_pending(chunk_job_key(meeting_id, chunk_index), 'transcribe')
+        if pending:
+            await job_queue.submit(
+                'chunk_summary',
+                {'meeting_id': meeting_id, 'chunk_index': chunk_index, 'wait_for_transcripts': True},
+                JobPriority.LIVE,
+                delay=chunk_summary_quiet_seconds,
+                dedupe_key=chunk_job_key(meeting_id, chunk_index),
+                group_key=summary_group_key(meeting_id)
+            )
+            return {"deferred": True, "pending_transcriptions": pending}
+    
+    # Get chunk transcript data
+    chunk_data = await meeting_manager.get_chunk_transcript_for_summary(
+        meeting_id, chunk_index
+    )
+    
+    if not chunk_data or not chunk_data.get('transcript_text'):
+        raise MissingJobDataError("No transcript data found for this chunk")
+    
+    # Generate chunk summary
+    chunk_summary_data = await summarization_service.create_realtime_chunk_summary(
+        meeting_id=meeting_id,
+        chunk_index=chunk_index,
+        transcript_text=chunk_data['transcript_text'],
+        participants=chunk_data.get('participants', []),
+        chunk_start_time=chunk_data['chunk_start_time'],
+        chunk_end_time=chunk_data['chunk_end_time']
+    )
+    
+    # Save chunk summary to database
+    await meeting_manager.save_chunk_summary(
+        meeting_id=meeting_id,
+        chunk_index=chunk_index,
+        chunk_start_time=chunk_data['chunk_start_time'],
+        chunk_end_time=chunk_data['chunk_end_time'],
+        transcript_text=chunk_data['transcript_text'],
+        summary_text=chunk_summary_data['summary_text'],
+        key_points=chunk_summary_data['key_points'],
+        participants=chunk_data.get('participants', [])
+    )
+    
+    # Send to Discord
+    await send_chunk_summary_to_discord(meeting_id, chunk_summary_data)
+    
+    return chunk_summary_data
+
+async def build_integrated_summary(meeting_id: str, participants: List[str], total_duration: int) -> Optional[str]:
+    """Build an integrated summary from chunk summaries without saving it"""
+    chunk_summaries = await meeting_manager.get_all_chunk_summaries(meeting_id)
+    if not chunk_summaries:
+        return None
+    
+    integrated_summary_data = await summarization_service.create_final_integrated_summary(
+        meeting_id=meeting_id,
+        chunk_summaries=chunk_summaries,
+        total_duration=total_duration,
+        all_participants=participants
+    )
+    
+    return integrated_summary_data['full_summary']
+
+async def update_rolling_summary(meeting_id: str) -> dict:
+    """Fold transcript segments added since the last update into the running summary"""
+    state = await meeting_manager.get_rolling_summary(meeting_id)
+    previous_id = state['last_transcript_id'] if state else 0
+    
+    delta = await meeting_manager.get_transcript_delta(
+        meeting_id, previous_id, limit=rolling_summary_max_segments
+    )
+    
+    saved = False
+    if delta['segments']:
+        summary_text = await summarization_service.update_rolling_summary(
+            meeting_id=meeting_id,
+            previous_summary=state['summary_text'] if state else None,
+            delta_transcript=delta['transcript_text']
+        )
+        saved = await meeting_manager.save_rolling_summary(
+            meeting_id=meeting_id,
+            summary_text=summary_text,
+            previous_transcript_id=previous_id,
+            last_transcript_id=delta['last_transcript_id'],
+            segments=delta['segments']
+        )
+        if not saved:
+            logger.warning(f"Rolling summary for meeting {meeting_id} was updated concurrently, discarding")
+    
+    # Keep folding while the meeting records; a full delta means a backlog to catch up on right away
+    backlog = delta['segments'] >= rolling_summary_max_segments
+    if backlog or await meeting_manager.get_meeting_state(meeting_id) == 'recording':
+        await job_queue.submit(
+            'rolling_summary',
+            {'meeting_id': meeting_id},
+            JobPriority.LIVE,
+            delay=0 if backlog else rolling_summary_interval,
+            dedupe_key=rolling_job_key(meeting_id)
+        )
+    
+    return {
+        "segments": delta['segments'],
+        "last_transcript_id": delta['last_transcript_id'],
+        "saved": saved
+    }
+
+async def resummarize_meeting(meeting_id: str, skip_up_to_date: bool = True) -> str:
+    """Summarize a stored meeting again through the hierarchical map-reduce pipeline
+    
+    Returns the outcome for the batch run: succeeded, or skipped when the meeting has
+    no transcript or (with skip_up_to_date) already has a summary from the current templates.
+    Unlike the live path it sends no webhooks and leaves the meeting status alone.
+    """
+    templates = summarization_service.HIERARCHICAL_TEMPLATES
+    template_version = summarization_service.templates.version(templates)
+    if skip_up_to_date and await meeting_manager.has_summary_version(meeting_id, templates, template_version):
+        return 'skipped'
+    
+    meeting_status = await meeting_manager.get_meeting_status(meeting_id)
+    chunks = await meeting_manager.get_meeting_transcript_chunks(meeting_id)
+    if not meeting_status or not chunks:
+        return 'skipped'
+    
+    summary_data = await summarization_service.create_hierarchical_summary(
+        meeting_id=meeting_id,
+        chunk_transcripts=chunks,
+        participants=meeting_status.get('participants', []),
+        total_duration=meeting_status.get('duration_minutes') or 0
+    )
+    file_path = await summarization_service.save_summary(meeting_id, summary_data, 'hierarchical')
+    await meeting_manager.save_summary(
+        meeting_id=meeting_id,
+        summary_content=summary_data['full_summary'],
+        summary_type='hierarchical',
+        file_path=file_path,
+        generated_by='ollama_hierarchical',
+        template_id=summary_data.get('template_id'),
+        template_version=summary_data.get('template_version')
+    )
+    return 'succeeded'
+
+async def run_batch_summary(batch_id: str) -> dict:
+    """Re-summarize the next meetings of a batch run, then queue the rest of the run
+    
+    Every meeting is checkpointed as soon as it is done, so a crashed or restarted
+    worker resumes at the first unfinished meeting. Each job only takes
+    BATCH_SUMMARY_MEETINGS_PER_JOB meetings, so live and final work queued meanwhile
+    runs before the batch continues.
+    """
+    run = await meeting_manager.get_batch_run(batch_id, with_meetings=True)
+    if not run:
+        raise MissingJobDataError(f"Batch run not found: {batch_id}")
+    if run['status'] not in ('queued', 'running'):
+        return {"skipped": f"batch run {run['status']}"}
+    
+    await meeting_manager.set_batch_run_status(batch_id, 'running')
+    
+    position = run['processed']
+    meeting_ids = run['meeting_ids']
+    for _ in range(batch_summary_meetings_per_job):
+        if position >= len(meeting_ids):
+            break
+        
+        meeting_id = meeting_ids[position]
+        started = time.perf_counter()
+        error = None
+        try:
+            outcome = await resummarize_meeting(meeting_id, run['skip_up_to_date'])
+        except Exception as e:
+            logger.error(f"Batch {batch_id}: summarizing meeting {meeting_id} failed: {e}")
+            outcome, error = 'failed', str(e)
+        
+        advanced = await meeting_manager.advance_batch_run(
+            batch_id, position, meeting_id, outcome, time.perf_counter() - started, error
         )
+        if not advanced:
+            # Cancelled, or another runner of this batch got there first
+            return {"stopped_at": position}
+        position += 1
+    
+    if position >= len(meeting_ids):
+        await meeting_manager.set_batch_run_status(batch_id, 'completed')
+        logger.info(f"Batch run {batch_id} completed ({len(meeting_ids)} meetings)")
+    else:
+        await job_queue.submit(
+            'batch_summary',
+            {'batch_id': batch_id},
+            JobPriority.BATCH,
+            dedupe_key=f"batch:{batch_id}"
+        )
+    
+    return {"processed": position, "total": len(meeting_ids)}
+
+async def transcription_priority(meeting_id: Optional[str], filename: Optional[str]) -> JobPriority:
+    """Live chunks of an ongoing meeting run before the final flush"""
+    if filename and filename.startswith('chunk_final'):
+        return JobPriority.FINAL
+    
+    state = await meeting_manager.get_meeting_state(meeting_id) if meeting_id else None
+    if state and state != 'recording':
+        return JobPriority.FINAL
+    
+    return JobPriority.LIVE
+
+# Register job handlers
+job_queue.register('transcribe', process_transcription, on_failure=mark_transcription_failed)
+job_queue.register('summarize', run_summarization)
+job_queue.register('chunk_summary', regenerate_chunk_summary)
+job_queue.register('integrated_summary', build_integrated_summary)
+job_queue.register('final_summary', complete_meeting, on_failure=mark_final_summary_failed)
+job_queue.register('final_summary_check', queue_final_summary)
+job_queue.register('rolling_summary', update_rolling_summary)
+job_queue.register('speculative_summary', speculate_final_summary)
+job_queue.register('batch_summary', run_batch_summary)
 
 # Pydantic models
 class TranscriptionRequest(BaseModel):
@@ -328,6 +788,14 @@ class SummarizationRequest(BaseModel):
     participants: List[str]
     duration_minutes: int
 
+class BatchSummarizationRequest(BaseModel):
+    guild_id: Optional[str] = None
+    start_date: Optional[datetime] = None  # Meetings started at or after this
+    end_date: Optional[datetime] = None  # ... and before this
+    statuses: List[str] = ['completed']
+    limit: Optional[int] = None
+    skip_up_to_date: bool = True  # Skip meetings that already have a summary from the current templates
+
 class MeetingStatus(BaseModel):
     meeting_id: str
     status: str
@@ -336,6 +804,17 @@ class MeetingStatus(BaseModel):
     duration_minutes: Optional[int] = None
     transcript_progress: Optional[float] = None
 
+async def initialize_worker_services():
+    """Load the models needed to execute jobs (API with embedded workers, or worker.py)"""
+    # Initialize Whisper model (otherwise loaded by the first transcription in this process)
+    if os.getenv('WHISPER_PRELOAD', 'true').lower() == 'true':
+        await transcription_service.initialize()
+        logger.info("Transcription service initialized")
+    
+    # Check Ollama connection
+    await summarization_service.initialize()
+    logger.info("Summarization service initialized")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and services on startup"""
@@ -343,18 +822,31 @@ async def startup_event():
         init_db()
         logger.info("Database initialized successfully")
         
-        # Initialize Whisper model
-        await transcription_service.initialize()
-        logger.info("Transcription service initialized")
+        # Summaries of the old flat output layout move into their meeting directories
+        await asyncio.to_thread(summarization_service.store.migrate_legacy_files)
+        
+        if not embedded_workers:
+            logger.info("Running as ingestion API only; jobs are processed by worker.py")
+            return
         
-        # Check Ollama connection
-        await summarization_service.initialize()
-        logger.info("Summarization service initialized")
+        await initialize_worker_services()
+        
+        # Start job workers
+        await job_queue.start()
         
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and close pooled HTTP connections on shutdown"""
+    if embedded_workers:
+        await job_queue.stop()
+    await summarization_service.warmer.aclose()
+    await summarization_service.backend.aclose()
+    await http_clients.aclose()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -370,14 +862,17 @@ async def root():
 
 @app.post("/transcribe")
 async def transcribe_audio(
-    background_tasks: BackgroundTasks,
     audio_file: UploadFile = File(...),
     meeting_id: str = Form(None),
     speaker_id: str = Form(None),
-    timestamp: str = Form(None)
+    timestamp: str = Form(None),
+    priority: str = Form(None)
 ):
     """Transcribe audio file to text"""
     try:
+        if meeting_id:
+            summarization_service.warmer.meeting_activity(meeting_id)
+        
         # Validate file type
         if not audio_file.content_type.startswith('audio/'):
             raise HTTPException(status_code=400, detail="File must be an audio file")
@@ -393,47 +888,175 @@ async def transcribe_audio(
         # Save uploaded file temporarily
         temp_path = await transcription_service.save_temp_file(audio_file)
         
-        # Start transcription in background
-        background_tasks.add_task(
-            process_transcription,
-            temp_path,
-            meeting_id,
-            speaker_id,
-            timestamp
+        # Queue transcription; live chunks are dispatched ahead of final flush and backfill
+        if priority:
+            job_priority = JobPriority.parse(priority, JobPriority.LIVE)
+        else:
+            job_priority = await transcription_priority(meeting_id, audio_file.filename)
+        
+        chunk_index = chunk_index_from_filename(audio_file.filename)
+        job_id = await job_queue.submit(
+            'transcribe',
+            {
+                'file_path': temp_path,
+                'meeting_id': meeting_id,
+                'speaker_id': speaker_id,
+                'timestamp': timestamp,
+                'chunk_index': chunk_index
+            },
+            job_priority,
+            group_key=transcription_group_key(meeting_id, chunk_index)
         )
         
         return {
             "message": "Transcription started",
             "meeting_id": meeting_id,
-            "status": "processing"
+            "status": "processing",
+            "job_id": job_id,
+            "priority": job_priority.name.lower()
         }
         
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/transcribe/stream")
+async def transcribe_audio_stream(
+    request: Request,
+    meeting_id: str = None,
+    speaker_id: str = None,
+    timestamp: str = None,
+    chunk_index: str = None,
+    filename: str = None
+):
+    """Transcribe a raw PCM body while it is still being uploaded"""
+    session = None
+    try:
+        if meeting_id:
+            summarization_service.warmer.meeting_activity(meeting_id)
+        
+        # Only raw Discord PCM can be cut into windows without decoding the container
+        content_type = request.headers.get('content-type', '')
+        if not (content_type.startswith('audio/pcm') or content_type.startswith('application/octet-stream')):
+            raise HTTPException(status_code=415, detail="Streaming mode requires raw PCM (audio/pcm)")
+        
+        max_size = int(os.getenv('MAX_FILE_SIZE_MB', 100)) * 1024 * 1024
+        
+        if not embedded_workers:
+            # No ASR model in this process: spool to the shared temp dir and hand off to a worker
+            try:
+                temp_path = await transcription_service.save_temp_stream(
+                    request.stream(),
+                    filename or f"{meeting_id}_{speaker_id}_{chunk_index}.pcm",
+                    max_size
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            job_id = await job_queue.submit(
+                'transcribe',
+                {
+                    'file_path': temp_path,
+                    'meeting_id': meeting_id,
+                    'speaker_id': speaker_id,
+                    'timestamp': timestamp,
+                    'chunk_index': chunk_index
+                },
+                await transcription_priority(meeting_id, filename),
+                group_key=transcription_group_key(meeting_id, chunk_index)
+            )
+            return {
+                "message": "Transcription started",
+                "meeting_id": meeting_id,
+                "status": "processing",
+                "job_id": job_id,
+                "received_bytes": os.path.getsize(temp_path)
+            }
+        
+        await transcription_service.initialize()
+        session = transcription_service.open_pcm_stream(meeting_id, speaker_id, timestamp)
+        temp_path = transcription_service.temp_path(filename or f"{meeting_id}_{speaker_id}_{chunk_index}.pcm")
+        
+        # Complete windows are decoded while the rest of the body is still arriving; the
+        # body is spooled too, so the queued job survives a restart
+        try:
+            async with aiofiles.open(temp_path, 'wb') as spool:
+                async for data in request.stream():
+                    if session.total_bytes + len(data) > max_size:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    await session.feed(data)
+                    await spool.write(data)
+        except BaseException:
+            await transcription_service._cleanup_files([temp_path])
+            raise
+        
+        await session.close_input()
+        
+        stream_id = uuid.uuid4().hex
+        stream_sessions[stream_id] = session
+        # The job may run in another process; drop the unused decode some time after it ends
+        session.add_done_callback(
+            lambda: asyncio.get_running_loop().call_later(
+                STREAM_SESSION_TTL_SECONDS, stream_sessions.pop, stream_id, None
+            )
+        )
+        try:
+            job_id = await job_queue.submit(
+                'transcribe',
+                {
+                    'file_path': temp_path,
+                    'meeting_id': meeting_id,
+                    'speaker_id': speaker_id,
+                    'timestamp': timestamp,
+                    'chunk_index': chunk_index,
+                    'stream_id': stream_id
+                },
+                await transcription_priority(meeting_id, filename),
+                group_key=transcription_group_key(meeting_id, chunk_index)
+            )
+        except BaseException:
+            stream_sessions.pop(stream_id, None)
+            await transcription_service._cleanup_files([temp_path])
+            raise
+        
+        return {
+            "message": "Transcription started",
+            "meeting_id": meeting_id,
+            "status": "processing",
+            "job_id": job_id,
+            "received_bytes": session.total_bytes
+        }
+        
+    except HTTPException:
+        if session:
+            await session.cancel()
+        raise
+    except Exception as e:
+        logger.error(f"Streaming transcription error: {e}")
+        if session:
+            await session.cancel()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/summarize")
 async def summarize_meeting(request: SummarizationRequest):
     """Generate meeting summary from transcript"""
     try:
-        # Generate summary using Ollama
-        summary = await summarization_service.create_summary(
-            meeting_id=request.meeting_id,
-            transcript=request.transcript_text,
-            participants=request.participants,
-            duration=request.duration_minutes
-        )
-        
-        # Save summary to file
-        summary_path = await summarization_service.save_summary(
-            request.meeting_id,
-            summary
+        # The caller is waiting, so this runs in the interactive class
+        job_id = await job_queue.submit(
+            'summarize',
+            {
+                'meeting_id': request.meeting_id,
+                'transcript_text': request.transcript_text,
+                'participants': request.participants,
+                'duration_minutes': request.duration_minutes
+            },
+            JobPriority.INTERACTIVE
         )
+        result = await job_queue.wait(job_id)
         
         return {
             "meeting_id": request.meeting_id,
-            "summary": summary,
-            "summary_file": summary_path,
+            "summary": result["summary"],
+            "summary_file": result["summary_file"],
             "status": "completed"
         }
         
@@ -441,6 +1064,89 @@ async def summarize_meeting(request: SummarizationRequest):
         logger.error(f"Summarization error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/summarize/batch")
+async def start_batch_summarization(request: BatchSummarizationRequest):
+    """Re-summarize every meeting matching a selector in the background, at batch priority"""
+    try:
+        meeting_ids = await meeting_manager.find_meeting_ids(
+            guild_id=request.guild_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            statuses=request.statuses,
+            limit=request.limit
+        )
+        batch_id = uuid.uuid4().hex
+        run = await meeting_manager.create_batch_run(
+            batch_id, request.model_dump(mode='json', exclude={'skip_up_to_date'}), meeting_ids, request.skip_up_to_date
+        )
+        if meeting_ids:
+            await job_queue.submit(
+                'batch_summary',
+                {'batch_id': batch_id},
+                JobPriority.BATCH,
+                dedupe_key=f"batch:{batch_id}"
+            )
+        return run
+        
+    except Exception as e:
+        logger.error(f"Batch summarization error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/summarize/batch")
+async def list_batch_summarizations(limit: int = 20):
+    """Latest batch runs with their progress"""
+    return {"batches": await meeting_manager.list_batch_runs(limit)}
+
+@app.get("/summarize/batch/{batch_id}")
+async def get_batch_summarization(batch_id: str):
+    """Progress, throughput and ETA of a batch run"""
+    run = await meeting_manager.get_batch_run(batch_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Batch run not found")
+    return run
+
+@app.post("/summarize/batch/{batch_id}/cancel")
+async def cancel_batch_summarization(batch_id: str):
+    """Stop a batch run after the meeting in progress"""
+    run = await meeting_manager.get_batch_run(batch_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Batch run not found")
+    await meeting_manager.set_batch_run_status(batch_id, 'cancelled')
+    return await meeting_manager.get_batch_run(batch_id)
+
+@app.post("/summarize/stream")
+async def summarize_meeting_stream(request: SummarizationRequest):
+    """Generate meeting summary and stream it as Server-Sent Events
+    
+    Each `data:` event carries a piece of generated text; a final `done` event
+    carries the saved summary file (or an `error` event if generation failed).
+    """
+    async def event_stream():
+        parts = []
+        try:
+            async for piece in summarization_service.stream_summary(
+                meeting_id=request.meeting_id,
+                transcript=request.transcript_text,
+                participants=request.participants,
+                duration=request.duration_minutes
+            ):
+                parts.append(piece)
+                yield f"data: {json.dumps({'text': piece}, ensure_ascii=False)}\n\n"
+            
+            summary_path = await summarization_service.save_summary(request.meeting_id, ''.join(parts))
+            done = {"meeting_id": request.meeting_id, "summary_file": summary_path, "status": "completed"}
+            yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+            
+        except Exception as e:
+            logger.error(f"Streaming summarization error: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)}, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/meeting/{meeting_id}/status")
 async def get_meeting_status(meeting_id: str) -> MeetingStatus:
     """Get current status of a meeting recording"""
@@ -488,6 +1194,18 @@ async def start_meeting(request: dict):
             participants=participants
         )
         
+        # The first chunk recap should not pay for loading the model
+        summarization_service.warmer.meeting_started(meeting_id)
+        
+        if rolling_summary_enabled:
+            await job_queue.submit(
+                'rolling_summary',
+                {'meeting_id': meeting_id},
+                JobPriority.LIVE,
+                delay=rolling_summary_interval,
+                dedupe_key=rolling_job_key(meeting_id)
+            )
+        
         return {
             "meeting_id": meeting_id,
             "status": "started",
@@ -506,10 +1224,24 @@ async def finalize_meeting(request: dict):
         audio_files_count = request.get("audio_files_count", 1)
         
         await meeting_manager.update_meeting_status(meeting_id, "processing")
+        summarization_service.warmer.meeting_ended(meeting_id)
         
         # Set the total number of chunks to expect
         await meeting_manager.set_total_chunks(meeting_id, audio_files_count)
         
+        # All chunks may already have been transcribed before finalize arrived
+        if await queue_final_summary(meeting_id):
+            logger.info(f"All chunks of meeting {meeting_id} already transcribed, queued final integrated summary")
+        elif final_speculation_enabled:
+            # The last audio is still transcribing: integrate what is there meanwhile
+            await job_queue.submit(
+                'speculative_summary',
+                {'meeting_id': meeting_id},
+                JobPriority.FINAL,
+                dedupe_key=f"speculative:{meeting_id}",
+                group_key=summary_group_key(meeting_id)
+            )
+        
         logger.info(f"Meeting finalized: {meeting_id}, expecting {audio_files_count} audio chunks")
         
         return {
@@ -552,10 +1284,20 @@ async def health_check():
                 },
                 "summarization": {
                     "status": "ready" if summarization_service.is_ready() else "not_ready",
-                    "model": os.getenv('OLLAMA_MODEL', 'gemma2:2b')
+                    "model": os.getenv('OLLAMA_MODEL', 'gemma2:2b'),
+                    "cache": summarization_service.cache.get_stats(),
+                    "compression": summarization_service.compressor.get_stats(),
+                    "llm": summarization_service.backend.get_stats(),
+                    "scheduler": summarization_service.scheduler.get_stats(),
+                    "models": summarization_service.router.models,
+                    "warmup": summarization_service.warmer.get_stats()
                 },
                 "database": {
                     "status": "connected"
+                },
+                "workers": {
+                    "mode": "embedded" if embedded_workers else "external",
+                    "queue": job_queue.get_stats()
                 }
             },
             "version": "1.0.0"
@@ -568,28 +1310,83 @@ async def health_check():
             "timestamp": datetime.now()
         }
 
+@app.get("/jobs/status")
+async def get_job_queue_status():
+    """Get job queue state by priority class"""
+    return job_queue.get_stats()
+
+@app.get("/llm/nodes")
+async def get_llm_nodes():
+    """Get per-node routing state and latency of the LLM backend"""
+    return {
+        **summarization_service.backend.get_stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/llm/scheduler")
+async def get_llm_scheduler():
+    """Get the LLM request queue: waiting and in-flight generations, token budget"""
+    return {
+        **summarization_service.scheduler.get_stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/llm/routes")
+async def get_llm_routes():
+    """Get the model, timeout and concurrency pool of each task tier, and latency per task type"""
+    return {
+        **summarization_service.router.get_stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/llm/warmup")
+async def get_llm_warmup():
+    """Get model warm-up state and the latency of cold versus warm generations"""
+    return {
+        **summarization_service.warmer.get_stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/llm/templates")
+async def get_prompt_templates():
+    """Get the compiled prompt templates: version and estimated token length of each"""
+    return {
+        "templates": summarization_service.templates.describe(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the state of a queued/running/finished job"""
+    job = await job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+async def find_summary_file(meeting_id: str, summary_types: Optional[List[str]] = None) -> Optional[str]:
+    """Newest summary file of a meeting: the path recorded with its Summary row, else the newest file of its directory"""
+    file_path = await meeting_manager.get_summary_file(meeting_id, summary_types)
+    if file_path and os.path.exists(file_path):
+        return file_path
+    # Summaries saved without a row (/summarize) or rows from another OUTPUT_DIR
+    return await summarization_service.store.latest(meeting_id, summary_types)
+
 @app.get("/download/meeting/{meeting_id}/summary")
 async def download_meeting_summary(meeting_id: str):
     """Download meeting summary as Markdown file"""
     try:
-        output_dir = Path(__file__).parent / "output"
-        
-        # Find the summary file for the meeting
-        summary_files = list(output_dir.glob(f"meeting_{meeting_id}_*.md"))
-        if not summary_files:
+        summary_file = await find_summary_file(meeting_id)
+        if not summary_file:
             raise HTTPException(status_code=404, detail="Summary not found")
         
-        summary_file = summary_files[0]  # Get the latest file
-        
-        if not summary_file.exists():
-            raise HTTPException(status_code=404, detail="Summary file not found")
-        
         return FileResponse(
-            path=str(summary_file),
+            path=summary_file,
             filename=f"meeting_summary_{meeting_id}.md",
             media_type="text/markdown"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Download summary error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -721,6 +1518,25 @@ async def get_chunk_summaries(meeting_id: str):
         logger.error(f"Get chunk summaries error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/meeting/{meeting_id}/summaries")
+async def get_meeting_summaries(meeting_id: str):
+    """Get the saved summaries of a meeting and the template versions that produced them"""
+    summaries = await meeting_manager.get_summaries(meeting_id)
+    return {
+        "meeting_id": meeting_id,
+        "summaries": summaries,
+        "count": len(summaries)
+    }
+
+@app.get("/meeting/{meeting_id}/rolling-summary")
+async def get_rolling_summary(meeting_id: str):
+    """Get the running summary of an ongoing meeting"""
+    rolling_summary = await meeting_manager.get_rolling_summary(meeting_id)
+    if not rolling_summary:
+        raise HTTPException(status_code=404, detail="No rolling summary yet")
+    
+    return rolling_summary
+
 @app.get("/meeting/{meeting_id}/unsent-chunk-summaries")
 async def get_unsent_chunk_summaries(meeting_id: str):
     """Get chunk summaries that haven't been sent to UI yet"""
@@ -764,41 +1580,16 @@ async def send_pending_chunk_summaries(meeting_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/meeting/{meeting_id}/generate-chunk-summary/{chunk_index}")
-async def generate_chunk_summary_manually(meeting_id: str, chunk_index: int):
+async def generate_chunk_summary_manually(meeting_id: str, chunk_index: int, priority: str = 'batch'):
     """Manually generate chunk summary for a specific chunk"""
     try:
-        # Get chunk transcript data
-        chunk_data = await meeting_manager.get_chunk_transcript_for_summary(
-            meeting_id, chunk_index
+        # Re-runs must not delay live meetings, so they default to the batch class
+        job_id = await job_queue.submit(
+            'chunk_summary',
+            {'meeting_id': meeting_id, 'chunk_index': chunk_index},
+            JobPriority.parse(priority, JobPriority.BATCH)
         )
-        
-        if not chunk_data or not chunk_data.get('transcript_text'):
-            raise HTTPException(status_code=404, detail="No transcript data found for this chunk")
-        
-        # Generate chunk summary
-        chunk_summary_data = await summarization_service.create_realtime_chunk_summary(
-            meeting_id=meeting_id,
-            chunk_index=chunk_index,
-            transcript_text=chunk_data['transcript_text'],
-            participants=chunk_data.get('participants', []),
-            chunk_start_time=chunk_data['chunk_start_time'],
-            chunk_end_time=chunk_data['chunk_end_time']
-        )
-        
-        # Save chunk summary to database
-        await meeting_manager.save_chunk_summary(
-            meeting_id=meeting_id,
-            chunk_index=chunk_index,
-            chunk_start_time=chunk_data['chunk_start_time'],
-            chunk_end_time=chunk_data['chunk_end_time'],
-            transcript_text=chunk_data['transcript_text'],
-            summary_text=chunk_summary_data['summary_text'],
-            key_points=chunk_summary_data['key_points'],
-            participants=chunk_data.get('participants', [])
-        )
-        
-        # Send to Discord
-        await send_chunk_summary_to_discord(meeting_id, chunk_summary_data)
+        chunk_summary_data = await job_queue.wait(job_id)
         
         return {
             "meeting_id": meeting_id,
@@ -807,6 +1598,8 @@ async def generate_chunk_summary_manually(meeting_id: str, chunk_index: int):
             "status": "completed"
         }
         
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Manual chunk summary generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -892,33 +1685,28 @@ async def download_final_summary(meeting_id: str):
         if not summary_data:
             raise HTTPException(status_code=404, detail="Meeting not found")
         
-        # Try to find the latest summary file
-        output_dir = Path(__file__).parent / "output"
-        summary_files = list(output_dir.glob(f"meeting_{meeting_id}_*.md"))
-        
-        if not summary_files:
-            # Fallback: Generate summary from chunk summaries if available
-            chunk_summaries = await meeting_manager.get_all_chunk_summaries(meeting_id)
-            if chunk_summaries:
-                # Generate integrated summary from chunks
-                participants = summary_data.get('participants', [])
-                total_duration = summary_data.get('duration_minutes', 0)
-                
-                integrated_summary_data = await summarization_service.create_final_integrated_summary(
-                    meeting_id=meeting_id,
-                    chunk_summaries=chunk_summaries,
-                    total_duration=total_duration,
-                    all_participants=participants
-                )
-                
-                summary_content = integrated_summary_data['full_summary']
-            else:
-                raise HTTPException(status_code=404, detail="No summary available for this meeting")
-        else:
-            # Read the latest summary file
-            latest_file = max(summary_files, key=lambda p: p.stat().st_mtime)
-            async with aiofiles.open(latest_file, 'r', encoding='utf-8') as f:
-                summary_content = await f.read()
+        # Try to find the latest final summary file, then any summary file
+        summary_file = await find_summary_file(meeting_id, FINAL_SUMMARY_TYPES) or await find_summary_file(meeting_id)
+        if summary_file:
+            return FileResponse(
+                path=summary_file,
+                filename=f"final_summary_{meeting_id}.md",
+                media_type="text/markdown"
+            )
+        
+        # Fallback: Generate summary from chunk summaries if available
+        job_id = await job_queue.submit(
+            'integrated_summary',
+            {
+                'meeting_id': meeting_id,
+                'participants': summary_data.get('participants', []),
+                'total_duration': summary_data.get('duration_minutes', 0)
+            },
+            JobPriority.INTERACTIVE
+        )
+        summary_content = await job_queue.wait(job_id)
+        if summary_content is None:
+            raise HTTPException(status_code=404, detail="No summary available for this meeting")
         
         return PlainTextResponse(
             content=summary_content,
@@ -928,6 +1716,8 @@ async def download_final_summary(meeting_id: str):
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Download final summary error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
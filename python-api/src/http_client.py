@@ -0,0 +1,70 @@
+import os
+import logging
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class HttpClientPool:
+    """Long-lived, shared httpx clients with connection pooling and keep-alive
+    
+    One AsyncClient per upstream (Ollama, Discord webhook, ...) is created on first
+    use and reused for every request, so TCP connections stay open between calls.
+    Each upstream also gets a semaphore bounding the number of requests in flight.
+    Clients are closed on application shutdown via aclose().
+    """
+    
+    def __init__(self):
+        self.max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS', 20))
+        self.max_keepalive = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', 10))
+        self.keepalive_expiry = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 60))
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+    
+    def get(
+        self,
+        name: str,
+        base_url: str = '',
+        timeout: float = 30.0,
+        max_concurrency: Optional[int] = None
+    ) -> httpx.AsyncClient:
+        """Get (or create) the shared client for an upstream"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=httpx.Timeout(timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._clients[name] = client
+            logger.info(f"Created pooled HTTP client '{name}' {base_url}")
+        
+        if name not in self._limiters:
+            self._limiters[name] = asyncio.Semaphore(max_concurrency or self.max_connections)
+        
+        return client
+    
+    def limiter(self, name: str) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent requests to an upstream"""
+        if name not in self._limiters:
+            self._limiters[name] = asyncio.Semaphore(self.max_connections)
+        return self._limiters[name]
+    
+    async def aclose(self):
+        """Close every client (application shutdown)"""
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client '{name}': {e}")
+        self._clients.clear()
+        self._limiters.clear()
+
+# Shared by all services in this process
+http_clients = HttpClientPool()
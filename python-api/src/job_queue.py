@@ -0,0 +1,622 @@
+import os
+import time
+import json
+import socket
+import logging
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Dict, Callable, Awaitable, Optional, Any
+
+from sqlalchemy import select, update, delete, func
+
+from .models import Job, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class JobPriority(IntEnum):
+    """Priority classes for transcription/summarization jobs (lower runs first)"""
+    INTERACTIVE = 0  # An HTTP caller is waiting on the result
+    LIVE = 1         # Chunks of a meeting that is still being recorded
+    FINAL = 2        # Final flush after the meeting ended
+    BATCH = 3        # Manual re-runs and backfills
+    
+    @classmethod
+    def parse(cls, value, default: 'JobPriority' = None) -> 'JobPriority':
+        """Parse a priority from its name or number"""
+        if isinstance(value, JobPriority):
+            return value
+        try:
+            if isinstance(value, str) and not value.isdigit():
+                return cls[value.upper()]
+            return cls(int(value))
+        except (KeyError, ValueError, TypeError):
+            if default is not None:
+                return default
+            raise ValueError(f"Unknown job priority: {value}")
+
+class JobFailedError(Exception):
+    """Raised by JobQueue.wait when a job ended in the failed state"""
+    
+    def __init__(self, message: str, error_type: Optional[str] = None):
+        super().__init__(message)
+        self.error_type = error_type
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure no retry can fix; the job fails at once"""
+
+class MissingJobDataError(PermanentJobError, LookupError):
+    """The meeting, chunk or run a job works on does not exist"""
+
+# wait() re-raises these by name; any other error is retried, then ends in JobFailedError
+PERMANENT_ERRORS = {
+    'PermanentJobError': PermanentJobError,
+    'MissingJobDataError': MissingJobDataError,
+}
+
+class JobQueue:
+    """Durable, priority-ordered job queue backed by the jobs table
+    
+    Jobs are claimed with an atomic conditional UPDATE and held under a lease that
+    is renewed while the handler runs. Expired leases (crashed or killed workers)
+    are put back in the queue and failures are retried with exponential backoff,
+    so several worker processes can drain the same table safely.
+    """
+    
+    def __init__(self):
+        self.db_session = SessionLocal
+        self.worker_count = int(os.getenv('MAX_CONCURRENT_TRANSCRIPTIONS', 3))
+        # A waiting job gains one priority class every JOB_AGING_SECONDS
+        self.aging_seconds = float(os.getenv('JOB_AGING_SECONDS', 120))
+        self.lease_seconds = float(os.getenv('JOB_LEASE_SECONDS', 300))
+        self.max_attempts = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+        self.retry_base_seconds = float(os.getenv('JOB_RETRY_BASE_SECONDS', 10))
+        self.retry_max_seconds = float(os.getenv('JOB_RETRY_MAX_SECONDS', 600))
+        self.poll_interval = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+        self.retention_hours = float(os.getenv('JOB_RETENTION_HOURS', 24))
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._failure_handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._finished_events: Dict[str, asyncio.Event] = {}
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self._maintenance = None
+        self._running = False
+    
+    def register(
+        self,
+        job_type: str,
+        handler: Callable[..., Awaitable[Any]],
+        on_failure: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        """Register the coroutine that executes a job type
+        
+        on_failure is called with the job payload plus error_message once the job
+        has used up its retries.
+        """
+        self._handlers[job_type] = handler
+        if on_failure:
+            self._failure_handlers[job_type] = on_failure
+    
+    def _sort_key(self, priority: JobPriority, enqueued_at: float) -> float:
+        # Linear aging: effective priority is priority - waited / aging_seconds.
+        # Ordering by priority * aging_seconds + enqueued_at is equivalent and
+        # does not change over time, so it can be an indexed column.
+        return priority * self.aging_seconds + enqueued_at
+    
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base_seconds * (2 ** max(attempts - 1, 0)), self.retry_max_seconds)
+    
+    async def submit(
+        self,
+        job_type: str,
+        payload: Optional[Dict] = None,
+        priority: JobPriority = JobPriority.LIVE,
+        max_attempts: Optional[int] = None,
+        delay: float = 0,
+        dedupe_key: Optional[str] = None,
+        group_key: Optional[str] = None
+    ) -> str:
+        """Persist a job and return its id (claimable after `delay` seconds)
+        
+        A job with a dedupe_key that matches one still waiting in the queue is not
+        added again: the waiting job is pushed back to now + delay instead (debounce)
+        and its id is returned. Once that job has started, a new one is queued.
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        
+        priority = JobPriority.parse(priority)
+        job_id = uuid.uuid4().hex
+        
+        db = self.db_session()
+        try:
+            if dedupe_key:
+                waiting_id = db.query(Job.job_id).filter(
+                    Job.dedupe_key == dedupe_key,
+                    Job.status == 'queued',
+                    Job.attempts == 0
+                ).scalar()
+                if waiting_id:
+                    # The status re-check keeps a worker that claimed it meanwhile from being overridden
+                    postponed = db.execute(
+                        update(Job)
+                        .where(Job.job_id == waiting_id, Job.status == 'queued')
+                        .values(available_at=datetime.utcnow() + timedelta(seconds=delay),
+                                sort_key=self._sort_key(priority, time.time() + delay))
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                    db.commit()
+                    if postponed:
+                        logger.info(f"Merged {job_type} job into waiting job {waiting_id} ({dedupe_key})")
+                        return waiting_id
+            
+            db.add(self.new_job(job_type, payload, priority, max_attempts, delay, dedupe_key, group_key, job_id))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to queue {job_type} job: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        self.wake()
+        logger.info(f"Queued {job_type} job {job_id} with priority {priority.name}")
+        return job_id
+    
+    def new_job(
+        self,
+        job_type: str,
+        payload: Optional[Dict] = None,
+        priority: JobPriority = JobPriority.LIVE,
+        max_attempts: Optional[int] = None,
+        delay: float = 0,
+        dedupe_key: Optional[str] = None,
+        group_key: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Job:
+        """Build a queued job row without saving it
+        
+        For callers that must queue a job in the same transaction as their own
+        update; call wake() once that transaction is committed.
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        
+        priority = JobPriority.parse(priority)
+        return Job(
+            job_id=job_id or uuid.uuid4().hex,
+            job_type=job_type,
+            payload=json.dumps(payload or {}, ensure_ascii=False),
+            dedupe_key=dedupe_key,
+            group_key=group_key,
+            priority=int(priority),
+            sort_key=self._sort_key(priority, time.time() + delay),
+            status='queued',
+            max_attempts=max_attempts or self.max_attempts,
+            available_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+    
+    def wake(self):
+        """Let idle workers of this process look for new jobs now"""
+        self._wakeup.set()
+    
+    async def count_pending(self, group_key: str, job_type: Optional[str] = None, prefix: bool = False) -> int:
+        """Number of queued or running jobs in a group (or in every group starting with group_key)"""
+        db = self.db_session()
+        try:
+            query = db.query(func.count(Job.job_id)).filter(
+                Job.group_key.startswith(group_key, autoescape=True) if prefix else Job.group_key == group_key,
+                Job.status.in_(['queued', 'leased'])
+            )
+            if job_type:
+                query = query.filter(Job.job_type == job_type)
+            return query.scalar()
+        finally:
+            db.close()
+    
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get the stored state of a job"""
+        db = self.db_session()
+        try:
+            job = db.query(Job).filter(Job.job_id == job_id).first()
+            if not job:
+                return None
+            return {
+                'job_id': job.job_id,
+                'job_type': job.job_type,
+                'priority': JobPriority(job.priority).name.lower(),
+                'status': job.status,
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'available_at': job.available_at,
+                'lease_owner': job.lease_owner,
+                'lease_expires_at': job.lease_expires_at,
+                'result': json.loads(job.result) if job.result else None,
+                'last_error': job.last_error,
+                'error_type': job.error_type,
+                'created_at': job.created_at,
+                'started_at': job.started_at,
+                'finished_at': job.finished_at
+            }
+        finally:
+            db.close()
+    
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Any:
+        """Wait for a job to finish and return its result
+        
+        Jobs finished by this process wake the waiter immediately; jobs run by
+        other processes are picked up by polling the table.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        event = self._finished_events.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await self.get_job(job_id)
+                if job is None:
+                    raise KeyError(f"Job not found: {job_id}")
+                
+                if job['status'] == 'completed':
+                    return job['result']
+                if job['status'] == 'failed':
+                    error_class = PERMANENT_ERRORS.get(job['error_type'])
+                    if error_class:
+                        raise error_class(job['last_error'])
+                    raise JobFailedError(job['last_error'] or 'Job failed', job['error_type'])
+                
+                wait_for = self.poll_interval
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError(f"Timed out waiting for job {job_id}")
+                    wait_for = min(wait_for, remaining)
+                
+                try:
+                    await asyncio.wait_for(event.wait(), wait_for)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._finished_events.pop(job_id, None)
+    
+    async def start(self):
+        """Recover abandoned jobs and start the worker tasks"""
+        if self._running:
+            return
+        
+        await self.recover()
+        
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._worker(n)) for n in range(self.worker_count)
+        ]
+        self._maintenance = asyncio.create_task(self._maintenance_loop())
+        logger.info(f"Job queue started with {self.worker_count} workers ({self.owner_id})")
+    
+    async def stop(self):
+        """Stop the worker tasks and hand their jobs back to the queue"""
+        self._running = False
+        tasks = self._workers + ([self._maintenance] if self._maintenance else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._maintenance = None
+        
+        # Release leases held by this process so another worker can pick them up at once
+        db = self.db_session()
+        try:
+            released = db.execute(
+                update(Job)
+                .where(Job.status == 'leased', Job.lease_owner == self.owner_id)
+                .values(status='queued', lease_owner=None, lease_token=None,
+                        lease_expires_at=None, available_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if released:
+                logger.info(f"Released {released} running jobs back to the queue")
+        except Exception as e:
+            logger.error(f"Failed to release job leases: {e}")
+            db.rollback()
+        finally:
+            db.close()
+        
+        logger.info("Job queue stopped")
+    
+    async def recover(self) -> int:
+        """Re-queue jobs whose lease expired (worker crashed, OOM-killed or restarted)"""
+        dead_jobs = []
+        db = self.db_session()
+        try:
+            now = datetime.utcnow()
+            
+            # Leases that already used their last attempt are not retried again
+            exhausted = db.query(Job).filter(
+                Job.status == 'leased',
+                Job.lease_expires_at < now,
+                Job.attempts >= Job.max_attempts
+            ).all()
+            for job in exhausted:
+                dead_jobs.append((job.job_id, job.job_type, job.payload))
+                job.status = 'failed'
+                job.last_error = 'Lease expired after the last attempt'
+                job.error_type = 'LeaseExpired'
+                job.finished_at = now
+                job.lease_owner = None
+                job.lease_token = None
+            db.flush()
+            
+            requeued = db.execute(
+                update(Job)
+                .where(Job.status == 'leased', Job.lease_expires_at < now)
+                .values(status='queued', lease_owner=None, lease_token=None,
+                        lease_expires_at=None, available_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            
+            if requeued or dead_jobs:
+                logger.warning(f"Recovered {requeued} jobs with expired leases, {len(dead_jobs)} gave up")
+        except Exception as e:
+            logger.error(f"Job recovery failed: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+        
+        for job_id, job_type, payload in dead_jobs:
+            await self._notify_failure(job_id, job_type, payload, 'Lease expired after the last attempt')
+        
+        return requeued
+    
+    async def _claim(self) -> Optional[Dict]:
+        """Atomically lease the best available job"""
+        db = self.db_session()
+        try:
+            now = datetime.utcnow()
+            token = uuid.uuid4().hex
+            
+            candidate = (
+                select(Job.job_id)
+                .where(Job.status == 'queued', Job.available_at <= now)
+                .order_by(Job.sort_key)
+                .limit(1)
+                .scalar_subquery()
+            )
+            # The status re-check makes the claim a compare-and-set across processes
+            claimed = db.execute(
+                update(Job)
+                .where(Job.job_id == candidate, Job.status == 'queued')
+                .values(status='leased', lease_owner=self.owner_id, lease_token=token,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        attempts=Job.attempts + 1, started_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            
+            if not claimed:
+                return None
+            
+            job = db.query(Job).filter(Job.lease_token == token).first()
+            if not job:
+                return None
+            
+            return {
+                'job_id': job.job_id,
+                'job_type': job.job_type,
+                'payload': json.loads(job.payload) if job.payload else {},
+                'priority': JobPriority(job.priority),
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'lease_token': token,
+                'created_at': job.created_at
+            }
+        except Exception as e:
+            logger.error(f"Failed to claim job: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    async def _renew_lease(self, job: Dict, handler_task: asyncio.Task):
+        """Keep extending the lease while the handler is running; cancel it once the lease is lost"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            db = self.db_session()
+            try:
+                renewed = db.execute(
+                    update(Job)
+                    .where(Job.job_id == job['job_id'], Job.lease_token == job['lease_token'])
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Failed to renew lease for job {job['job_id']}: {e}")
+                db.rollback()
+                continue
+            finally:
+                db.close()
+            
+            if not renewed:
+                # The lease expired and the job was re-queued (or taken by another worker)
+                logger.warning(f"Lost the lease on {job['job_type']} job {job['job_id']}, cancelling it here")
+                job['lease_lost'] = True
+                handler_task.cancel()
+                return
+    
+    async def _complete(self, job: Dict, result: Any):
+        db = self.db_session()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.job_id == job['job_id'], Job.lease_token == job['lease_token'])
+                .values(status='completed', result=json.dumps(result, ensure_ascii=False, default=str),
+                        finished_at=datetime.utcnow(), lease_owner=None, lease_token=None,
+                        lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to mark job {job['job_id']} completed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    async def _fail(self, job: Dict, error: Exception) -> bool:
+        """Schedule a retry with backoff, or fail the job; returns True if it gave up"""
+        error_type = type(error).__name__
+        if isinstance(error, PermanentJobError) and error_type not in PERMANENT_ERRORS:
+            error_type = 'PermanentJobError'
+        give_up = isinstance(error, PermanentJobError) or job['attempts'] >= job['max_attempts']
+        
+        db = self.db_session()
+        try:
+            values = dict(last_error=str(error), error_type=error_type,
+                          lease_owner=None, lease_token=None, lease_expires_at=None)
+            if give_up:
+                values.update(status='failed', finished_at=datetime.utcnow())
+            else:
+                delay = self._retry_delay(job['attempts'])
+                values.update(status='queued', available_at=datetime.utcnow() + timedelta(seconds=delay))
+                logger.warning(f"{job['job_type']} job {job['job_id']} failed (attempt {job['attempts']}/"
+                               f"{job['max_attempts']}), retrying in {delay:.0f}s: {error}")
+            
+            db.execute(
+                update(Job)
+                .where(Job.job_id == job['job_id'], Job.lease_token == job['lease_token'])
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record failure of job {job['job_id']}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+        
+        if give_up:
+            logger.error(f"{job['job_type']} job {job['job_id']} failed permanently: {error}")
+        return give_up
+    
+    async def _notify_failure(self, job_id: str, job_type: str, payload, error_message: str):
+        handler = self._failure_handlers.get(job_type)
+        if not handler:
+            return
+        try:
+            if isinstance(payload, str):
+                payload = json.loads(payload) if payload else {}
+            await handler(error_message=error_message, **payload)
+        except Exception as e:
+            logger.error(f"Failure handler for job {job_id} raised: {e}")
+    
+    async def _worker(self, worker_index: int):
+        while self._running:
+            job = await self._claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            waited = (datetime.utcnow() - job['created_at']).total_seconds()
+            logger.info(f"Worker {worker_index} running {job['job_type']} job {job['job_id']} "
+                        f"({job['priority'].name}, attempt {job['attempts']}, waited {waited:.1f}s)")
+            
+            renewer = None
+            try:
+                handler = self._handlers.get(job['job_type'])
+                if handler is None:
+                    raise PermanentJobError(f"No handler registered for job type {job['job_type']}")
+                handler_task = asyncio.create_task(handler(**job['payload']))
+                renewer = asyncio.create_task(self._renew_lease(job, handler_task))
+                result = await handler_task
+                await self._complete(job, result)
+            except asyncio.CancelledError:
+                if not job.get('lease_lost'):
+                    raise
+                # The job belongs to whoever holds the lease now; record nothing for it
+            except Exception as e:
+                if await self._fail(job, e):
+                    await self._notify_failure(job['job_id'], job['job_type'], job['payload'], str(e))
+            finally:
+                if renewer:
+                    renewer.cancel()
+                event = self._finished_events.get(job['job_id'])
+                if event:
+                    event.set()
+    
+    async def _maintenance_loop(self):
+        """Periodically re-queue expired leases and purge old finished jobs"""
+        interval = max(self.lease_seconds / 2, self.poll_interval)
+        while self._running:
+            await asyncio.sleep(interval)
+            await self.recover()
+            await self.purge_finished()
+    
+    async def purge_finished(self) -> int:
+        """Delete completed/failed jobs older than JOB_RETENTION_HOURS"""
+        db = self.db_session()
+        try:
+            cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+            purged = db.execute(
+                delete(Job)
+                .where(Job.status.in_(['completed', 'failed']), Job.finished_at < cutoff)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return purged
+        except Exception as e:
+            logger.error(f"Failed to purge finished jobs: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+    
+    def get_stats(self) -> Dict:
+        """Queue state for monitoring"""
+        db = self.db_session()
+        try:
+            now = datetime.utcnow()
+            
+            by_priority = {priority.name.lower(): 0 for priority in JobPriority}
+            rows = db.query(Job.priority, func.count(Job.job_id)).filter(
+                Job.status == 'queued'
+            ).group_by(Job.priority).all()
+            for priority, count in rows:
+                by_priority[JobPriority(priority).name.lower()] = count
+            
+            by_status = dict(
+                db.query(Job.status, func.count(Job.job_id)).group_by(Job.status).all()
+            )
+            
+            # Waiting time counts from when a job became claimable, not from a scheduled submit
+            oldest = db.query(func.min(Job.available_at)).filter(
+                Job.status == 'queued', Job.available_at <= now
+            ).scalar()
+            delayed = db.query(func.count(Job.job_id)).filter(
+                Job.status == 'queued', Job.available_at > now, Job.attempts > 0
+            ).scalar()
+            scheduled = db.query(func.count(Job.job_id)).filter(
+                Job.status == 'queued', Job.available_at > now, Job.attempts == 0
+            ).scalar()
+            
+            return {
+                'owner_id': self.owner_id,
+                'workers': self.worker_count,
+                'aging_seconds': self.aging_seconds,
+                'queued': by_status.get('queued', 0),
+                'retry_backoff': delayed,
+                'scheduled': scheduled,
+                'running': by_status.get('leased', 0),
+                'completed': by_status.get('completed', 0),
+                'failed': by_status.get('failed', 0),
+                'queued_by_priority': by_priority,
+                'oldest_wait_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+                'timestamp': datetime.now().isoformat()
+            }
+        finally:
+            db.close()
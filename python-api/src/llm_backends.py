@@ -0,0 +1,630 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from typing import Dict, List, Optional, AsyncIterator
+
+import httpx
+
+from .http_client import http_clients
+from .text_chunking import TokenEstimator
+
+logger = logging.getLogger(__name__)
+
+class LLMBackend:
+    """Text generation server used by SummarizationService
+    
+    generate() returns, and the last item of stream() carries, a dict shaped like an
+    Ollama /api/generate response: response, done, prompt_eval_count, eval_count and
+    total_duration (nanoseconds), so usage accounting does not depend on the server.
+    """
+    
+    name = 'base'
+    
+    async def ensure_model(self, model: str):
+        """Check that the model can be served (pull it where the server supports that)"""
+    
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Dict,
+        keep_alive: Optional[str] = None,
+        format: Optional[str] = None
+    ) -> Dict:
+        raise NotImplementedError
+    
+    def stream(
+        self,
+        model: str,
+        prompt: str,
+        options: Dict,
+        keep_alive: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        raise NotImplementedError
+    
+    async def load(self, model: str, keep_alive) -> Dict:
+        """Load the model (keep_alive 0: unload it) without generating; returns load_duration where known"""
+        return {}
+    
+    async def probe(self) -> bool:
+        """Cheap liveness check used by BackendPool health probes"""
+        return True
+    
+    def get_stats(self) -> Dict:
+        return {'backend': self.name}
+    
+    async def aclose(self):
+        """Stop background tasks (application shutdown)"""
+
+class OllamaBackend(LLMBackend):
+    """Ollama /api/generate"""
+    
+    name = 'ollama'
+    
+    def __init__(self, host: str, timeout: float, max_concurrency: int, client_name: str = 'ollama'):
+        self.host = host
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.client_name = client_name
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for the Ollama host (created on first use)"""
+        return http_clients.get(
+            self.client_name,
+            base_url=self.host,
+            timeout=self.timeout,
+            max_concurrency=self.max_concurrency
+        )
+    
+    async def ensure_model(self, model: str):
+        logger.info(f"Connecting to Ollama at {self.host}")
+        
+        response = await self.client.get("/api/tags", timeout=10.0)
+        if response.status_code != 200:
+            raise Exception(f"Failed to connect to Ollama: {response.status_code}")
+        
+        model_names = [m['name'] for m in response.json().get('models', [])]
+        logger.info(f"Available Ollama models: {model_names}")
+        
+        if model not in model_names and not any(model in name for name in model_names):
+            logger.warning(f"Model {model} not found. Available models: {model_names}")
+            await self._pull_model(model)
+        else:
+            logger.info(f"Model {model} is available")
+    
+    async def _pull_model(self, model: str):
+        """Pull the required model if not available"""
+        try:
+            logger.info(f"Pulling model {model}...")
+            
+            response = await self.client.post(
+                "/api/pull",
+                json={"name": model},
+                timeout=300.0
+            )
+            
+            if response.status_code == 200:
+                logger.info(f"Successfully pulled model {model}")
+            else:
+                logger.error(f"Failed to pull model {model}: {response.status_code}")
+            
+        except Exception as e:
+            logger.error(f"Error pulling model: {e}")
+    
+    def _payload(self, model: str, prompt: str, options: Dict, keep_alive: Optional[str],
+                 stream: bool, format: Optional[str] = None) -> dict:
+        """Request body for /api/generate"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": dict(options)
+        }
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
+        if format:
+            payload["format"] = format
+        return payload
+    
+    async def load(self, model: str, keep_alive) -> Dict:
+        # A request without a prompt only loads (or with keep_alive 0 unloads) the model
+        response = await self.client.post(
+            "/api/generate", json={"model": model, "keep_alive": keep_alive, "stream": False}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+        return response.json()
+    
+    async def probe(self) -> bool:
+        response = await self.client.get("/api/tags", timeout=5.0)
+        return response.status_code == 200
+    
+    async def generate(self, model, prompt, options, keep_alive=None, format=None) -> Dict:
+        # The client must exist first: creating it sets the concurrency limit
+        client = self.client
+        async with http_clients.limiter(self.client_name):
+            response = await client.post(
+                "/api/generate", json=self._payload(model, prompt, options, keep_alive, False, format)
+            )
+        
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+        return response.json()
+    
+    async def stream(self, model, prompt, options, keep_alive=None) -> AsyncIterator[Dict]:
+        client = self.client
+        async with http_clients.limiter(self.client_name):
+            async with client.stream(
+                "POST", "/api/generate", json=self._payload(model, prompt, options, keep_alive, True)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Ollama API error: {response.status_code} - {body.decode(errors='replace')}")
+                
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get('error'):
+                        raise Exception(f"Ollama API error: {data['error']}")
+                    yield data
+                    if data.get('done'):
+                        break
+
+class OpenAICompatibleBackend(LLMBackend):
+    """OpenAI-style /v1/chat/completions (llama.cpp server, vLLM, ...)"""
+    
+    name = 'openai'
+    
+    def __init__(self, base_url: str, timeout: float, max_concurrency: int):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.max_tokens = int(os.getenv('SUMMARY_OUTPUT_TOKENS', 1024))
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return http_clients.get(
+            'openai',
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_concurrency=self.max_concurrency
+        )
+    
+    def _headers(self) -> dict:
+        return {'Authorization': f"Bearer {self.api_key}"} if self.api_key else {}
+    
+    async def ensure_model(self, model: str):
+        logger.info(f"Connecting to OpenAI-compatible server at {self.base_url}")
+        
+        response = await self.client.get("/models", headers=self._headers(), timeout=10.0)
+        if response.status_code != 200:
+            raise Exception(f"Failed to connect to LLM server: {response.status_code}")
+        
+        model_names = [m.get('id') for m in response.json().get('data', [])]
+        if model not in model_names:
+            # llama.cpp serves whatever model it was started with, whatever the name
+            logger.warning(f"Model {model} not listed by the server, using it anyway: {model_names}")
+    
+    def _payload(self, model: str, prompt: str, options: Dict, stream: bool, format: Optional[str] = None) -> dict:
+        """Request body for /chat/completions; Ollama option names are mapped where they exist"""
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "max_tokens": options.get('num_predict') or self.max_tokens
+        }
+        for name in ('temperature', 'top_p', 'top_k'):
+            if name in options:
+                payload[name] = options[name]
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        if format == 'json':
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+    
+    @staticmethod
+    def _usage(usage: Optional[Dict], started: float) -> Dict:
+        usage = usage or {}
+        return {
+            'done': True,
+            'prompt_eval_count': usage.get('prompt_tokens'),
+            'eval_count': usage.get('completion_tokens'),
+            'total_duration': int((time.perf_counter() - started) * 1e9)
+        }
+    
+    async def generate(self, model, prompt, options, keep_alive=None, format=None) -> Dict:
+        started = time.perf_counter()
+        client = self.client
+        async with http_clients.limiter('openai'):
+            response = await client.post(
+                "/chat/completions",
+                json=self._payload(model, prompt, options, False, format),
+                headers=self._headers()
+            )
+        
+        if response.status_code != 200:
+            raise Exception(f"LLM server error: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        result = self._usage(data.get('usage'), started)
+        result['response'] = data['choices'][0]['message'].get('content') or ''
+        return result
+    
+    async def stream(self, model, prompt, options, keep_alive=None) -> AsyncIterator[Dict]:
+        started = time.perf_counter()
+        usage = None
+        client = self.client
+        async with http_clients.limiter('openai'):
+            async with client.stream(
+                "POST", "/chat/completions",
+                json=self._payload(model, prompt, options, True),
+                headers=self._headers()
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"LLM server error: {response.status_code} - {body.decode(errors='replace')}")
+                
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get('error'):
+                        raise Exception(f"LLM server error: {chunk['error']}")
+                    usage = chunk.get('usage') or usage
+                    for choice in chunk.get('choices') or []:
+                        piece = (choice.get('delta') or {}).get('content')
+                        if piece:
+                            yield {'response': piece, 'done': False}
+        
+        yield self._usage(usage, started)
+
+_FAKE_PHRASES = [
+    "リリース計画を確認しました。",
+    "決済まわりのテストを金曜日までに完了します。",
+    "ドキュメントの更新を担当者が進めます。",
+    "問い合わせ対応の体制を次回までに決めます。",
+    "月曜日にリリース判定を行います。",
+    "残りの課題は優先度順に対応します。",
+]
+
+class FakeBackend(LLMBackend):
+    """Deterministic in-process LLM for load tests without a model
+    
+    Output depends only on the prompt. Timing follows a CPU-bound server: a fixed
+    latency, then prefill and decode at FAKE_LLM_PREFILL_TPS and FAKE_LLM_TPS tokens
+    per second, shared by the generations in flight, with at most FAKE_LLM_PARALLEL
+    of them running at once (like OLLAMA_NUM_PARALLEL).
+    """
+    
+    name = 'fake'
+    
+    def __init__(self):
+        self.latency = float(os.getenv('FAKE_LLM_LATENCY', 0.05))
+        self.prefill_tps = float(os.getenv('FAKE_LLM_PREFILL_TPS', 400))
+        self.decode_tps = float(os.getenv('FAKE_LLM_TPS', 20))
+        self.output_tokens = int(os.getenv('FAKE_LLM_OUTPUT_TOKENS', 200))
+        self.slots = asyncio.Semaphore(int(os.getenv('FAKE_LLM_PARALLEL', 4)))
+        self.token_estimator = TokenEstimator()
+        self.active = 0
+    
+    def _text(self, prompt: str, tokens: int) -> str:
+        """Japanese filler of about `tokens` tokens, chosen by the prompt hash"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        text = ''
+        index = 0
+        while self.token_estimator.estimate(text) < tokens:
+            text += _FAKE_PHRASES[digest[index % len(digest)] % len(_FAKE_PHRASES)]
+            index += 1
+        return text
+    
+    def _response(self, prompt: str, format: Optional[str]) -> str:
+        if format == 'json':
+            # Shaped like the comprehensive summary schema
+            return json.dumps({
+                'full_summary': self._text(prompt, self.output_tokens * 2 // 3),
+                'key_points': [self._text(prompt + str(n), 10) for n in range(3)],
+                'action_items': [self._text(prompt + 'action', 10)]
+            }, ensure_ascii=False)
+        return self._text(prompt, self.output_tokens)
+    
+    async def _run(self, prompt: str, format: Optional[str]) -> AsyncIterator[Dict]:
+        started = time.perf_counter()
+        async with self.slots:
+            self.active += 1
+            try:
+                prompt_tokens = self.token_estimator.estimate(prompt)
+                await asyncio.sleep(self.latency + prompt_tokens * self.active / self.prefill_tps)
+                
+                response = self._response(prompt, format)
+                eval_tokens = 0
+                for start in range(0, len(response), 8):
+                    piece = response[start:start + 8]
+                    piece_tokens = self.token_estimator.estimate(piece)
+                    await asyncio.sleep(piece_tokens * self.active / self.decode_tps)
+                    eval_tokens += piece_tokens
+                    yield {'response': piece, 'done': False}
+            finally:
+                self.active -= 1
+        
+        yield {
+            'done': True,
+            'prompt_eval_count': prompt_tokens,
+            'eval_count': eval_tokens,
+            'total_duration': int((time.perf_counter() - started) * 1e9)
+        }
+    
+    async def generate(self, model, prompt, options, keep_alive=None, format=None) -> Dict:
+        pieces = []
+        async for data in self._run(prompt, format):
+            pieces.append(data.get('response', ''))
+        data['response'] = ''.join(pieces)
+        return data
+    
+    def stream(self, model, prompt, options, keep_alive=None) -> AsyncIterator[Dict]:
+        return self._run(prompt, None)
+
+class _Node:
+    """Routing state of one server in a BackendPool"""
+    
+    def __init__(self, backend: LLMBackend, label: str, max_concurrency: int):
+        self.backend = backend
+        self.label = label
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.circuit = 'closed'  # closed, open, half_open
+        self.open_until = 0.0
+        self.latency_ema: Optional[float] = None
+        self.latencies = deque(maxlen=200)
+        self.first_token_latencies = deque(maxlen=200)
+        self.last_probe_ok: Optional[bool] = None
+    
+    def available(self, now: float) -> bool:
+        if self.circuit == 'open':
+            if now < self.open_until:
+                return False
+            # Open period over: let one trial request through
+            self.circuit = 'half_open'
+        if self.circuit == 'half_open' and self.outstanding > 0:
+            return False
+        return self.outstanding < self.max_concurrency
+    
+    def load(self) -> tuple:
+        # Fewest outstanding requests relative to the cap, then the faster node
+        return (self.outstanding / self.max_concurrency, self.latency_ema or 0.0)
+    
+    @staticmethod
+    def _percentile(values, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+    
+    def get_stats(self) -> Dict:
+        return {
+            'node': self.label,
+            'circuit': self.circuit,
+            'outstanding': self.outstanding,
+            'max_concurrency': self.max_concurrency,
+            'requests': self.requests,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_probe_ok': self.last_probe_ok,
+            'latency_ms_ema': round(self.latency_ema * 1000, 1) if self.latency_ema is not None else None,
+            'latency_ms_p50': self._percentile(self.latencies, 0.5),
+            'latency_ms_p95': self._percentile(self.latencies, 0.95),
+            'first_token_ms_p50': self._percentile(self.first_token_latencies, 0.5),
+            'first_token_ms_p95': self._percentile(self.first_token_latencies, 0.95)
+        }
+
+class NoAvailableNodeError(Exception):
+    """Every node of a BackendPool is at its cap or has an open circuit"""
+
+class BackendPool(LLMBackend):
+    """Several servers of one kind behind least-outstanding-requests routing
+    
+    Each request goes to the node with the fewest requests in flight (relative to
+    its LLM_NODE_MAX_CONCURRENCY cap), waiting while every node is full. A node that
+    fails LLM_CIRCUIT_FAILURES times in a row, or fails a health probe, is taken
+    out of rotation for LLM_CIRCUIT_OPEN_SECONDS and then gets one trial request.
+    Requests that fail before producing output are retried on another node.
+    """
+    
+    def __init__(self, nodes: List[LLMBackend], labels: List[str]):
+        self.name = nodes[0].name
+        node_cap = int(os.getenv('LLM_NODE_MAX_CONCURRENCY', os.getenv('OLLAMA_NUM_PARALLEL', 4)))
+        self.nodes = [_Node(node, label, node_cap) for node, label in zip(nodes, labels)]
+        self.failure_threshold = int(os.getenv('LLM_CIRCUIT_FAILURES', 3))
+        self.open_seconds = float(os.getenv('LLM_CIRCUIT_OPEN_SECONDS', 30))
+        self.probe_interval = float(os.getenv('LLM_HEALTH_INTERVAL', 15))
+        self.wait_timeout = float(os.getenv('LLM_NODE_WAIT_SECONDS', 60))
+        self._released = asyncio.Event()
+        self._probe_task = None
+    
+    async def _acquire(self, exclude: set) -> _Node:
+        """Reserve a slot on the least loaded node that is not excluded"""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            now = time.monotonic()
+            candidates = [node for node in self.nodes if node not in exclude and node.available(now)]
+            if candidates:
+                node = min(candidates, key=_Node.load)
+                node.outstanding += 1
+                node.requests += 1
+                return node
+            
+            if all(node in exclude or node.circuit == 'open' for node in self.nodes):
+                raise NoAvailableNodeError("No LLM node available (all failed or circuit open)")
+            
+            remaining = deadline - now
+            if remaining <= 0:
+                raise NoAvailableNodeError("Timed out waiting for a free LLM node")
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+    
+    def _release(self, node: _Node, error: Optional[Exception] = None, latency: Optional[float] = None):
+        node.outstanding -= 1
+        if error is None:
+            node.consecutive_failures = 0
+            if node.circuit != 'closed':
+                logger.info(f"LLM node {node.label} recovered, closing circuit")
+            node.circuit = 'closed'
+            if latency is not None:
+                node.latencies.append(latency)
+                node.latency_ema = latency if node.latency_ema is None else 0.8 * node.latency_ema + 0.2 * latency
+        else:
+            node.failures += 1
+            node.consecutive_failures += 1
+            if node.circuit == 'half_open' or node.consecutive_failures >= self.failure_threshold:
+                self._open_circuit(node, str(error))
+        self._released.set()
+    
+    def _abandon(self, node: _Node):
+        # Cancelled (deadline, client gone) or closed by the consumer: not the node's fault
+        node.outstanding -= 1
+        self._released.set()
+    
+    def _open_circuit(self, node: _Node, reason: str):
+        if node.circuit != 'open':
+            logger.warning(f"LLM node {node.label} taken out of rotation for {self.open_seconds:.0f}s: {reason}")
+        node.circuit = 'open'
+        node.open_until = time.monotonic() + self.open_seconds
+    
+    async def ensure_model(self, model: str):
+        results = await asyncio.gather(
+            *[node.backend.ensure_model(model) for node in self.nodes], return_exceptions=True
+        )
+        for node, result in zip(self.nodes, results):
+            if isinstance(result, Exception):
+                self._open_circuit(node, str(result))
+        if all(isinstance(result, Exception) for result in results):
+            raise Exception(f"No LLM node reachable: {results[0]}")
+        
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+    
+    async def load(self, model: str, keep_alive) -> Dict:
+        # Every node may serve the next request, so every reachable node loads the model
+        now = time.monotonic()
+        nodes = [node for node in self.nodes if node.circuit != 'open' or now >= node.open_until]
+        results = await asyncio.gather(
+            *[node.backend.load(model, keep_alive) for node in nodes], return_exceptions=True
+        )
+        loaded = [result for result in results if not isinstance(result, Exception)]
+        for node, result in zip(nodes, results):
+            if isinstance(result, Exception):
+                logger.warning(f"LLM node {node.label} could not load {model}: {result}")
+        if not loaded:
+            raise Exception(f"No LLM node loaded {model}")
+        return max(loaded, key=lambda result: result.get('load_duration') or 0)
+    
+    async def _probe_loop(self):
+        """Periodic health probes; a failed probe opens the circuit at once"""
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            for node in self.nodes:
+                try:
+                    node.last_probe_ok = await node.backend.probe()
+                except Exception:
+                    node.last_probe_ok = False
+                if not node.last_probe_ok:
+                    self._open_circuit(node, "health probe failed")
+                elif node.circuit == 'open':
+                    # Reachable again: the next request is the trial
+                    node.open_until = 0.0
+    
+    async def generate(self, model, prompt, options, keep_alive=None, format=None) -> Dict:
+        tried = set()
+        while True:
+            node = await self._acquire(tried)
+            started = time.perf_counter()
+            try:
+                result = await node.backend.generate(model, prompt, options, keep_alive=keep_alive, format=format)
+            except Exception as e:
+                self._release(node, error=e)
+                tried.add(node)
+                if len(tried) == len(self.nodes):
+                    raise
+                logger.warning(f"LLM node {node.label} failed, retrying on another node: {e}")
+                continue
+            except BaseException:
+                self._abandon(node)
+                raise
+            self._release(node, latency=time.perf_counter() - started)
+            return result
+    
+    async def stream(self, model, prompt, options, keep_alive=None) -> AsyncIterator[Dict]:
+        tried = set()
+        while True:
+            node = await self._acquire(tried)
+            started = time.perf_counter()
+            produced = False
+            try:
+                async for data in node.backend.stream(model, prompt, options, keep_alive=keep_alive):
+                    if not produced:
+                        produced = True
+                        node.first_token_latencies.append(time.perf_counter() - started)
+                    yield data
+            except Exception as e:
+                self._release(node, error=e)
+                tried.add(node)
+                # Output already sent cannot be taken back, so only a silent failure moves on
+                if produced or len(tried) == len(self.nodes):
+                    raise
+                logger.warning(f"LLM node {node.label} failed, retrying on another node: {e}")
+                continue
+            except BaseException:
+                self._abandon(node)
+                raise
+            self._release(node, latency=time.perf_counter() - started)
+            return
+    
+    def get_stats(self) -> Dict:
+        return {
+            'backend': self.name,
+            'nodes': [node.get_stats() for node in self.nodes]
+        }
+    
+    async def aclose(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+def create_backend(host: str, timeout: float, max_concurrency: int) -> LLMBackend:
+    """Backend selected by LLM_BACKEND: ollama (default), openai or fake
+    
+    OLLAMA_HOSTS (comma-separated) puts several Ollama servers behind a BackendPool.
+    """
+    kind = os.getenv('LLM_BACKEND', 'ollama').lower()
+    if kind == 'ollama':
+        hosts = [h.strip() for h in os.getenv('OLLAMA_HOSTS', '').split(',') if h.strip()]
+        if hosts:
+            return BackendPool(
+                [OllamaBackend(h, timeout, max_concurrency, client_name=f'ollama:{h}') for h in hosts],
+                hosts
+            )
+        return OllamaBackend(host, timeout, max_concurrency)
+    if kind == 'openai':
+        return OpenAICompatibleBackend(
+            os.getenv('OPENAI_BASE_URL', 'http://localhost:8080/v1'), timeout, max_concurrency
+        )
+    if kind == 'fake':
+        logger.warning("Using the fake LLM backend - summaries are placeholder text")
+        return FakeBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {kind}")
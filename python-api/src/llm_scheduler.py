@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class LLMQueueTimeout(Exception):
+    """A generation waited longer than LLM_QUEUE_TIMEOUT for dispatch"""
+
+class LLMScheduler:
+    """Admission control for every LLM request of this process
+
+    Requests are dispatched in arrival order once fewer than LLM_MAX_IN_FLIGHT are
+    running and the token bucket holds their estimated size (prompt plus expected
+    output), refilled at LLM_TOKENS_PER_SECOND (0 disables the rate limit). A request
+    that is not dispatched within LLM_QUEUE_TIMEOUT fails before reaching the server,
+    so bursts queue here instead of timing out inside Ollama.
+    """
+
+    def __init__(self):
+        self.max_in_flight = max(1, int(os.getenv('LLM_MAX_IN_FLIGHT', os.getenv('OLLAMA_MAX_CONCURRENT_REQUESTS', 4))))
+        self.tokens_per_second = float(os.getenv('LLM_TOKENS_PER_SECOND', 0))
+        # Bucket size: the largest burst admitted at once (and the cap for a single request)
+        self.burst_tokens = float(os.getenv('LLM_TOKEN_BURST', max(self.tokens_per_second * 30, 1)))
+        self.queue_timeout = float(os.getenv('LLM_QUEUE_TIMEOUT', 120))
+        self.in_flight = 0
+        self.tokens = self.burst_tokens
+        self._refilled_at = time.monotonic()
+        self._waiting = deque()
+        self._changed = asyncio.Condition()
+        self.stats = {'dispatched': 0, 'timed_out': 0, 'tokens_admitted': 0, 'total_wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.tokens_per_second > 0:
+            self.tokens = min(self.burst_tokens, self.tokens + (now - self._refilled_at) * self.tokens_per_second)
+        self._refilled_at = now
+
+    def _wait_for_tokens(self, cost: float) -> float:
+        """Seconds until the bucket holds cost tokens"""
+        if self.tokens_per_second <= 0 or self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.tokens_per_second
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Hold a dispatch slot for one generation"""
+        cost = min(float(estimated_tokens), self.burst_tokens) if self.tokens_per_second > 0 else 0.0
+        ticket = object()
+        queued_at = time.monotonic()
+        deadline = queued_at + self.queue_timeout
+
+        async with self._changed:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    token_wait = self._wait_for_tokens(cost)
+                    if self._waiting[0] is ticket and self.in_flight < self.max_in_flight and token_wait == 0:
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timed_out'] += 1
+                        raise LLMQueueTimeout(
+                            f"LLM request not dispatched within {self.queue_timeout:.0f}s "
+                            f"({len(self._waiting)} queued, {self.in_flight} in flight)"
+                        )
+                    try:
+                        # Woken by releases; sleep on our own while only the bucket is short
+                        await asyncio.wait_for(self._changed.wait(), min(remaining, token_wait or remaining))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting.remove(ticket)
+                # The next ticket may be dispatchable now
+                self._changed.notify_all()
+
+            self.in_flight += 1
+            self.tokens -= cost
+            waited = time.monotonic() - queued_at
+            self.stats['dispatched'] += 1
+            self.stats['tokens_admitted'] += int(cost)
+            self.stats['total_wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self.in_flight -= 1
+                self._changed.notify_all()
+
+    def get_stats(self) -> Dict:
+        """Queue state for monitoring"""
+        self._refill()
+        dispatched = self.stats['dispatched']
+        return {
+            'queued': len(self._waiting),
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'tokens_per_second': self.tokens_per_second,
+            'tokens_available': round(self.tokens, 1) if self.tokens_per_second > 0 else None,
+            'queue_timeout_seconds': self.queue_timeout,
+            'dispatched': dispatched,
+            'timed_out': self.stats['timed_out'],
+            'tokens_admitted': self.stats['tokens_admitted'],
+            'avg_wait_seconds': round(self.stats['total_wait_seconds'] / dispatched, 3) if dispatched else 0.0,
+            'max_wait_seconds': round(self.stats['max_wait_seconds'], 3)
+        }
@@ -1,13 +1,17 @@
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, and_, or_, desc
+from sqlalchemy import create_engine, and_, or_, desc, update, case
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 import logging
 import json
+import hashlib
 import os
 from dotenv import load_dotenv
 
-from .models import Meeting, Transcript, Summary, ProcessingStatus, AudioFile, ChunkSummary, get_db, SessionLocal
+from .models import Meeting, Transcript, Summary, ProcessingStatus, AudioFile, ChunkSummary, SummaryStep, RollingSummary, SpeculativeSummary, BatchRun, Job, get_db, SessionLocal
+
+if TYPE_CHECKING:
+    from .summarization import SummarizationService
 
 load_dotenv()
 
@@ -144,6 +148,80 @@ class MeetingManager:
         finally:
             db.close()
     
+    async def has_transcription(self, meeting_id: str, audio_file_path: str) -> bool:
+        """Whether the segment of an audio file is already saved"""
+        db = self.db_session()
+        try:
+            return db.query(Transcript.id).filter(
+                Transcript.meeting_id == meeting_id,
+                Transcript.audio_file_path == audio_file_path
+            ).first() is not None
+        finally:
+            db.close()
+    
+    async def record_transcription(
+        self,
+        meeting_id: str,
+        speaker_id: str,
+        speaker_name: str,
+        text: str,
+        confidence: float,
+        start_time: datetime,
+        duration_seconds: float,
+        audio_file_path: str
+    ) -> bool:
+        """Add the segment of a transcribed audio file and count its chunk as completed
+        
+        Both happen in one transaction, keyed by audio_file_path: a retried job finds the
+        segment already there and changes nothing. Returns False in that case.
+        """
+        db = self.db_session()
+        try:
+            exists = db.query(Transcript.id).filter(
+                Transcript.meeting_id == meeting_id,
+                Transcript.audio_file_path == audio_file_path
+            ).first()
+            if exists:
+                logger.info(f"Transcript of {audio_file_path} already saved for meeting {meeting_id}")
+                return False
+            
+            db.add(Transcript(
+                meeting_id=meeting_id,
+                speaker_id=speaker_id,
+                speaker_name=speaker_name,
+                text=text,
+                confidence=confidence,
+                start_time=start_time,
+                end_time=start_time + timedelta(seconds=duration_seconds),
+                duration_seconds=duration_seconds,
+                audio_file_path=audio_file_path
+            ))
+            db.execute(
+                update(ProcessingStatus)
+                .where(ProcessingStatus.meeting_id == meeting_id)
+                .values(
+                    completed_chunks=ProcessingStatus.completed_chunks + 1,
+                    transcription_progress=case(
+                        (ProcessingStatus.total_chunks > 0,
+                         (ProcessingStatus.completed_chunks + 1) * 1.0 / ProcessingStatus.total_chunks),
+                        else_=ProcessingStatus.transcription_progress
+                    ),
+                    updated_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            
+            logger.info(f"Added transcript segment for meeting {meeting_id}, speaker {speaker_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to record transcription: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     async def get_meeting_transcript(self, meeting_id: str) -> Optional[str]:
         """Get full transcript for a meeting"""
         try:
@@ -216,7 +294,9 @@ class MeetingManager:
         summary_content: str,
         summary_type: str = 'full',
         file_path: Optional[str] = None,
-        generated_by: str = 'ollama'
+        generated_by: str = 'ollama',
+        template_id: Optional[str] = None,
+        template_version: Optional[str] = None
     ) -> Summary:
         """Save meeting summary"""
         try:
@@ -227,7 +307,9 @@ class MeetingManager:
                 summary_type=summary_type,
                 content=summary_content,
                 generated_by=generated_by,
-                file_path=file_path
+                file_path=file_path,
+                template_id=template_id,
+                template_version=template_version
             )
             
             db.add(summary)
@@ -358,6 +440,20 @@ class MeetingManager:
         finally:
             db.close()
     
+    async def get_meeting_state(self, meeting_id: str) -> Optional[str]:
+        """Get only the meeting status value (recording, processing, ...)"""
+        try:
+            db = self.db_session()
+            
+            row = db.query(Meeting.status).filter(Meeting.meeting_id == meeting_id).first()
+            return row[0] if row else None
+            
+        except Exception as e:
+            logger.error(f"Failed to get meeting state: {e}")
+            return None
+        finally:
+            db.close()
+    
     async def get_recent_meetings(self, guild_id: str, limit: int = 10) -> List[Dict]:
         """Get recent meetings for a guild"""
         try:
@@ -402,6 +498,9 @@ class MeetingManager:
             db.query(Summary).filter(Summary.meeting_id == meeting_id).delete()
             db.query(Transcript).filter(Transcript.meeting_id == meeting_id).delete()
             db.query(AudioFile).filter(AudioFile.meeting_id == meeting_id).delete()
+            db.query(SummaryStep).filter(SummaryStep.meeting_id == meeting_id).delete()
+            db.query(RollingSummary).filter(RollingSummary.meeting_id == meeting_id).delete()
+            db.query(SpeculativeSummary).filter(SpeculativeSummary.meeting_id == meeting_id).delete()
             db.query(ProcessingStatus).filter(ProcessingStatus.meeting_id == meeting_id).delete()
             db.query(Meeting).filter(Meeting.meeting_id == meeting_id).delete()
             
@@ -487,19 +586,28 @@ class MeetingManager:
         """Increment the count of completed transcription chunks"""
         try:
             db = self.db_session()
+            
+            # Single UPDATE so concurrent workers/processes never lose an increment
+            db.execute(
+                update(ProcessingStatus)
+                .where(ProcessingStatus.meeting_id == meeting_id)
+                .values(
+                    completed_chunks=ProcessingStatus.completed_chunks + 1,
+                    transcription_progress=case(
+                        (ProcessingStatus.total_chunks > 0,
+                         (ProcessingStatus.completed_chunks + 1) * 1.0 / ProcessingStatus.total_chunks),
+                        else_=ProcessingStatus.transcription_progress
+                    ),
+                    updated_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            
             status = db.query(ProcessingStatus).filter(
                 ProcessingStatus.meeting_id == meeting_id
             ).first()
-            
             if status:
-                status.completed_chunks += 1
-                status.updated_at = datetime.utcnow()
-                
-                # Update progress
-                if status.total_chunks > 0:
-                    status.transcription_progress = status.completed_chunks / status.total_chunks
-                
-                db.commit()
                 logger.info(f"Updated chunk progress for {meeting_id}: {status.completed_chunks}/{status.total_chunks}")
             
         except Exception as e:
@@ -532,37 +640,87 @@ class MeetingManager:
         finally:
             db.close()
     
-    async def check_all_chunks_completed(self, meeting_id: str) -> bool:
-        """Check if all transcription chunks are completed"""
+    async def claim_final_summary(self, meeting_id: str, job: Optional[Job] = None) -> bool:
+        """Atomically claim the right to trigger the final summary
+        
+        Returns True for exactly one caller across all workers/processes, and
+        only once every expected chunk has been transcribed. The final summary
+        job is saved in the same transaction as the claim, so a claim never
+        exists without its job.
+        """
         try:
             db = self.db_session()
-            status = db.query(ProcessingStatus).filter(
-                ProcessingStatus.meeting_id == meeting_id
-            ).first()
-            
-            if not status:
-                return False
-            
-            # Check if all chunks are completed
-            is_complete = (status.total_chunks > 0 and 
-                          status.completed_chunks >= status.total_chunks and
-                          status.transcription_status != 'failed')
+            now = datetime.utcnow()
+            
+            claimed = db.execute(
+                update(ProcessingStatus)
+                .where(
+                    ProcessingStatus.meeting_id == meeting_id,
+                    ProcessingStatus.final_summary_claimed_at.is_(None),
+                    ProcessingStatus.total_chunks > 0,
+                    ProcessingStatus.completed_chunks >= ProcessingStatus.total_chunks,
+                    or_(ProcessingStatus.transcription_status.is_(None),
+                        ProcessingStatus.transcription_status != 'failed')
+                )
+                .values(
+                    final_summary_claimed_at=now,
+                    transcription_status='completed',
+                    processing_end=now
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if claimed and job is not None:
+                db.add(job)
+            db.commit()
             
-            if is_complete:
-                status.transcription_status = 'completed'
-                status.processing_end = datetime.utcnow()
-                db.commit()
+            if claimed:
+                logger.info(f"Claimed final summary for meeting {meeting_id}")
+            return claimed == 1
             
-            return is_complete
+        except Exception as e:
+            logger.error(f"Failed to claim final summary: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    async def awaiting_final_summary(self, meeting_id: str) -> bool:
+        """Whether the meeting is finalized and its final summary not claimed yet"""
+        db = self.db_session()
+        try:
+            return db.query(ProcessingStatus.meeting_id).filter(
+                ProcessingStatus.meeting_id == meeting_id,
+                ProcessingStatus.total_chunks > 0,
+                ProcessingStatus.final_summary_claimed_at.is_(None)
+            ).first() is not None
+        finally:
+            db.close()
+    
+    async def final_summary_claimed(self, meeting_id: str) -> bool:
+        """Whether the final summary of a meeting has been triggered"""
+        try:
+            db = self.db_session()
+            row = db.query(ProcessingStatus.final_summary_claimed_at).filter(
+                ProcessingStatus.meeting_id == meeting_id
+            ).first()
+            return bool(row and row[0])
             
         except Exception as e:
-            logger.error(f"Failed to check chunk completion: {e}")
+            logger.error(f"Failed to check final summary claim: {e}")
             return False
         finally:
             db.close()
     
-    async def trigger_hierarchical_summarization(self, meeting_id: str) -> bool:
-        """Trigger hierarchical summarization for a completed meeting"""
+    async def trigger_hierarchical_summarization(
+        self,
+        meeting_id: str,
+        summarization_service: 'SummarizationService'
+    ) -> bool:
+        """Trigger hierarchical summarization for a completed meeting
+        
+        summarization_service is the process's shared SummarizationService, so the
+        run goes through its LLM scheduler, backend pool and model tiers.
+        """
         try:
             # Get meeting info
             db = self.db_session()
@@ -587,10 +745,6 @@ class MeetingManager:
                 )
                 return False
             
-            # Import summarization service
-            from .summarization import SummarizationService
-            summarization_service = SummarizationService()
-            
             # Create hierarchical summary
             summary_data = await summarization_service.create_hierarchical_summary(
                 meeting_id=meeting_id,
@@ -600,7 +754,7 @@ class MeetingManager:
             )
             
             # Save summary to file
-            file_path = await summarization_service.save_summary(meeting_id, summary_data)
+            file_path = await summarization_service.save_summary(meeting_id, summary_data, 'hierarchical')
             
             # Save to database
             await self.save_summary(
@@ -608,7 +762,9 @@ class MeetingManager:
                 summary_content=summary_data['full_summary'],
                 summary_type='hierarchical',
                 file_path=file_path,
-                generated_by='ollama_hierarchical'
+                generated_by='ollama_hierarchical',
+                template_id=summary_data.get('template_id'),
+                template_version=summary_data.get('template_version')
             )
             
             # Update meeting status
@@ -619,13 +775,9 @@ class MeetingManager:
             return True
             
         except Exception as e:
+            # Raised to the final_summary job, which retries and records the failure
             logger.error(f"Failed to trigger hierarchical summarization: {e}")
-            await self.update_processing_status(
-                meeting_id, 
-                summarization_status='failed',
-                error_message=str(e)
-            )
-            return False
+            raise
         finally:
             db.close()
     
@@ -870,6 +1022,32 @@ class MeetingManager:
         finally:
             db.close()
     
+    async def get_unsummarized_chunk_indexes(self, meeting_id: str, chunk_duration_minutes: int = 30) -> List[int]:
+        """Chunk windows that have transcripts but no chunk summary (the final flush after the last full chunk)"""
+        try:
+            db = self.db_session()
+            
+            meeting = db.query(Meeting).filter(Meeting.meeting_id == meeting_id).first()
+            if not meeting or not meeting.start_time:
+                return []
+            
+            chunk_seconds = chunk_duration_minutes * 60
+            start_times = db.query(Transcript.start_time).filter(Transcript.meeting_id == meeting_id).all()
+            with_transcripts = {
+                max(0, int((start_time - meeting.start_time).total_seconds() // chunk_seconds))
+                for (start_time,) in start_times if start_time
+            }
+            summarized = {
+                index for (index,) in db.query(ChunkSummary.chunk_index).filter(ChunkSummary.meeting_id == meeting_id)
+            }
+            return sorted(with_transcripts - summarized)
+            
+        except Exception as e:
+            logger.error(f"Failed to get unsummarized chunks: {e}")
+            return []
+        finally:
+            db.close()
+    
     async def get_chunk_transcript_for_summary(self, meeting_id: str, chunk_index: int, chunk_duration_minutes: int = 30) -> Dict:
         """Get transcript text for a specific chunk"""
         try:
@@ -923,4 +1101,425 @@ class MeetingManager:
             logger.error(f"Failed to get chunk transcript: {e}")
             return {}
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+    
+    async def get_summaries(self, meeting_id: str) -> List[Dict]:
+        """Get the saved summaries of a meeting (newest first) with the template versions that produced them"""
+        try:
+            db = self.db_session()
+            summaries = db.query(Summary).filter(
+                Summary.meeting_id == meeting_id
+            ).order_by(Summary.generated_at.desc()).all()
+            
+            return [
+                {
+                    'id': summary.id,
+                    'summary_type': summary.summary_type,
+                    'generated_by': summary.generated_by,
+                    'generated_at': summary.generated_at.isoformat() if summary.generated_at else None,
+                    'file_path': summary.file_path,
+                    'template_id': summary.template_id,
+                    'template_version': summary.template_version,
+                    'content': summary.content
+                }
+                for summary in summaries
+            ]
+            
+        except Exception as e:
+            logger.error(f"Failed to get summaries: {e}")
+            return []
+        finally:
+            db.close()
+    
+    async def get_summary_file(self, meeting_id: str, summary_types: Optional[List[str]] = None) -> Optional[str]:
+        """File path of the newest saved summary (of one of summary_types), or None"""
+        try:
+            db = self.db_session()
+            query = db.query(Summary.file_path).filter(
+                Summary.meeting_id == meeting_id,
+                Summary.file_path.isnot(None)
+            )
+            if summary_types:
+                query = query.filter(Summary.summary_type.in_(summary_types))
+            row = query.order_by(Summary.generated_at.desc()).first()
+            return row.file_path if row else None
+            
+        except Exception as e:
+            logger.error(f"Failed to get summary file: {e}")
+            return None
+        finally:
+            db.close()
+    
+    async def get_rolling_summary(self, meeting_id: str) -> Optional[Dict]:
+        """Get the running summary of a meeting"""
+        try:
+            db = self.db_session()
+            state = db.query(RollingSummary).filter(RollingSummary.meeting_id == meeting_id).first()
+            if not state:
+                return None
+            
+            return {
+                'meeting_id': meeting_id,
+                'summary_text': state.summary_text,
+                'last_transcript_id': state.last_transcript_id,
+                'segments_folded': state.segments_folded,
+                'updates': state.updates,
+                'updated_at': state.updated_at.isoformat() if state.updated_at else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to get rolling summary: {e}")
+            return None
+        finally:
+            db.close()
+    
+    async def get_transcript_delta(self, meeting_id: str, after_transcript_id: int, limit: int = 200) -> Dict:
+        """Get transcript segments added since after_transcript_id (oldest first, at most limit)"""
+        try:
+            db = self.db_session()
+            
+            transcripts = db.query(Transcript).filter(
+                and_(
+                    Transcript.meeting_id == meeting_id,
+                    Transcript.id > after_transcript_id
+                )
+            ).order_by(Transcript.id).limit(limit).all()
+            
+            # Segments of different speakers arrive out of order; present them chronologically
+            ordered = sorted(transcripts, key=lambda transcript: transcript.start_time)
+            
+            return {
+                'transcript_text': '\n'.join(f"[{t.speaker_name}]: {t.text}" for t in ordered),
+                'participants': sorted({t.speaker_name for t in ordered}),
+                'segments': len(transcripts),
+                'last_transcript_id': transcripts[-1].id if transcripts else after_transcript_id
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to get transcript delta: {e}")
+            return {'transcript_text': '', 'participants': [], 'segments': 0, 'last_transcript_id': after_transcript_id}
+        finally:
+            db.close()
+    
+    async def save_rolling_summary(
+        self,
+        meeting_id: str,
+        summary_text: str,
+        previous_transcript_id: int,
+        last_transcript_id: int,
+        segments: int
+    ) -> bool:
+        """Store a new running summary unless another worker already advanced it"""
+        try:
+            db = self.db_session()
+            
+            if previous_transcript_id == 0 and not db.query(RollingSummary).filter(
+                RollingSummary.meeting_id == meeting_id
+            ).first():
+                db.add(RollingSummary(
+                    meeting_id=meeting_id,
+                    summary_text=summary_text,
+                    last_transcript_id=last_transcript_id,
+                    segments_folded=segments,
+                    updates=1
+                ))
+                db.commit()
+                return True
+            
+            # Compare-and-set on the last folded segment
+            result = db.execute(
+                update(RollingSummary)
+                .where(
+                    RollingSummary.meeting_id == meeting_id,
+                    RollingSummary.last_transcript_id == previous_transcript_id
+                )
+                .values(
+                    summary_text=summary_text,
+                    last_transcript_id=last_transcript_id,
+                    segments_folded=RollingSummary.segments_folded + segments,
+                    updates=RollingSummary.updates + 1,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            db.commit()
+            return result.rowcount == 1
+            
+        except Exception as e:
+            logger.error(f"Failed to save rolling summary: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    @staticmethod
+    def chunk_digest(chunk: Dict) -> str:
+        """Fingerprint of a chunk summary, to tell which chunks changed since a draft"""
+        content = f"{chunk.get('summary_text') or ''}\0{chunk.get('key_points') or ''}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    
+    async def save_speculative_summary(
+        self,
+        meeting_id: str,
+        summary_text: str,
+        chunk_summaries: List[Dict],
+        template_version: Optional[str] = None
+    ) -> bool:
+        """Store the draft final summary and the chunk summaries it was made from"""
+        try:
+            db = self.db_session()
+            
+            db.merge(SpeculativeSummary(
+                meeting_id=meeting_id,
+                summary_text=summary_text,
+                chunk_digests=json.dumps({
+                    str(chunk['chunk_index']): self.chunk_digest(chunk) for chunk in chunk_summaries
+                }),
+                template_version=template_version,
+                created_at=datetime.utcnow()
+            ))
+            db.commit()
+            
+            logger.info(f"Saved speculative final summary for meeting {meeting_id} ({len(chunk_summaries)} chunks)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to save speculative summary: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    async def get_speculative_summary(self, meeting_id: str) -> Optional[Dict]:
+        """Get the draft final summary of a meeting"""
+        try:
+            db = self.db_session()
+            draft = db.query(SpeculativeSummary).filter(SpeculativeSummary.meeting_id == meeting_id).first()
+            if not draft:
+                return None
+            
+            return {
+                'meeting_id': meeting_id,
+                'summary_text': draft.summary_text,
+                'chunk_digests': {int(index): digest for index, digest in json.loads(draft.chunk_digests).items()},
+                'template_version': draft.template_version,
+                'created_at': draft.created_at.isoformat() if draft.created_at else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to get speculative summary: {e}")
+            return None
+        finally:
+            db.close()
+    
+    async def delete_speculative_summary(self, meeting_id: str):
+        """Drop the draft once the final summary is saved"""
+        try:
+            db = self.db_session()
+            db.query(SpeculativeSummary).filter(SpeculativeSummary.meeting_id == meeting_id).delete()
+            db.commit()
+            
+        except Exception as e:
+            logger.error(f"Failed to delete speculative summary: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    async def find_meeting_ids(
+        self,
+        guild_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        statuses: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """Ids of the meetings matching a selector, oldest first"""
+        db = self.db_session()
+        try:
+            query = db.query(Meeting.meeting_id)
+            if guild_id:
+                query = query.filter(Meeting.discord_guild_id == guild_id)
+            if start_date:
+                query = query.filter(Meeting.start_time >= start_date)
+            if end_date:
+                query = query.filter(Meeting.start_time < end_date)
+            if statuses:
+                query = query.filter(Meeting.status.in_(statuses))
+            
+            query = query.order_by(Meeting.start_time, Meeting.meeting_id)
+            if limit:
+                query = query.limit(limit)
+            return [row.meeting_id for row in query.all()]
+            
+        finally:
+            db.close()
+    
+    async def has_summary_version(self, meeting_id: str, template_id: str, template_version: str) -> bool:
+        """Whether a saved summary of the meeting was made from these template versions"""
+        db = self.db_session()
+        try:
+            return db.query(Summary.id).filter(
+                Summary.meeting_id == meeting_id,
+                Summary.template_id == template_id,
+                Summary.template_version == template_version
+            ).first() is not None
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _batch_run_dict(run: BatchRun) -> Dict:
+        """Progress of a batch run with its throughput and the estimated time left"""
+        finished = run.status in ('completed', 'cancelled')
+        elapsed = None
+        if run.started_at:
+            elapsed = ((run.finished_at if finished and run.finished_at else datetime.utcnow()) - run.started_at).total_seconds()
+        
+        remaining = run.total - run.position
+        rate = run.position / elapsed if elapsed and run.position else None
+        eta_seconds = None
+        if not finished and rate:
+            # Wall-clock rate, so time spent queued behind live work is part of the estimate
+            eta_seconds = remaining / rate
+        
+        return {
+            'batch_id': run.batch_id,
+            'status': run.status,
+            'selector': json.loads(run.selector),
+            'skip_up_to_date': run.skip_up_to_date,
+            'total': run.total,
+            'processed': run.position,
+            'remaining': remaining,
+            'succeeded': run.succeeded,
+            'skipped': run.skipped,
+            'failed': run.failed,
+            'progress': round(run.position / run.total, 3) if run.total else 1.0,
+            'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+            'meetings_per_hour': round(rate * 3600, 2) if rate else None,
+            'avg_seconds_per_meeting': round(run.busy_seconds / run.position, 1) if run.position else None,
+            'eta_seconds': round(eta_seconds) if eta_seconds is not None else None,
+            'eta_at': (datetime.utcnow() + timedelta(seconds=eta_seconds)).isoformat() if eta_seconds is not None else None,
+            'errors': json.loads(run.errors) if run.errors else [],
+            'created_at': run.created_at.isoformat() if run.created_at else None,
+            'started_at': run.started_at.isoformat() if run.started_at else None,
+            'finished_at': run.finished_at.isoformat() if run.finished_at else None
+        }
+    
+    async def create_batch_run(self, batch_id: str, selector: Dict, meeting_ids: List[str], skip_up_to_date: bool = True) -> Dict:
+        """Record a batch run over a fixed list of meetings"""
+        db = self.db_session()
+        try:
+            run = BatchRun(
+                batch_id=batch_id,
+                selector=json.dumps(selector, ensure_ascii=False, default=str),
+                meeting_ids=json.dumps(meeting_ids),
+                total=len(meeting_ids),
+                skip_up_to_date=skip_up_to_date,
+                status='queued' if meeting_ids else 'completed',
+                finished_at=None if meeting_ids else datetime.utcnow()
+            )
+            db.add(run)
+            db.commit()
+            
+            logger.info(f"Created batch run {batch_id} over {len(meeting_ids)} meetings")
+            return self._batch_run_dict(run)
+            
+        except Exception as e:
+            logger.error(f"Failed to create batch run: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def get_batch_run(self, batch_id: str, with_meetings: bool = False) -> Optional[Dict]:
+        """Progress of a batch run (plus its meeting list and checkpoint for the runner)"""
+        db = self.db_session()
+        try:
+            run = db.query(BatchRun).filter(BatchRun.batch_id == batch_id).first()
+            if not run:
+                return None
+            
+            result = self._batch_run_dict(run)
+            if with_meetings:
+                result['meeting_ids'] = json.loads(run.meeting_ids)
+            return result
+            
+        finally:
+            db.close()
+    
+    async def list_batch_runs(self, limit: int = 20) -> List[Dict]:
+        """Latest batch runs, newest first"""
+        db = self.db_session()
+        try:
+            runs = db.query(BatchRun).order_by(desc(BatchRun.created_at)).limit(limit).all()
+            return [self._batch_run_dict(run) for run in runs]
+        finally:
+            db.close()
+    
+    async def advance_batch_run(
+        self,
+        batch_id: str,
+        position: int,
+        meeting_id: str,
+        outcome: str,
+        seconds: float,
+        error: Optional[str] = None
+    ) -> bool:
+        """Checkpoint one finished meeting (outcome: succeeded, skipped or failed)
+        
+        Only advances from the given position, so a duplicate runner of the same batch
+        (e.g. after a lease expired) cannot count a meeting twice; returns False then.
+        """
+        db = self.db_session()
+        try:
+            values = {
+                'position': BatchRun.position + 1,
+                outcome: getattr(BatchRun, outcome) + 1,
+                'busy_seconds': BatchRun.busy_seconds + seconds,
+                'updated_at': datetime.utcnow()
+            }
+            if error:
+                run = db.query(BatchRun).filter(BatchRun.batch_id == batch_id).first()
+                errors = json.loads(run.errors) if run and run.errors else []
+                errors.append({'position': position, 'meeting_id': meeting_id, 'error': error})
+                values['errors'] = json.dumps(errors[-20:], ensure_ascii=False)
+            
+            advanced = db.execute(
+                update(BatchRun)
+                .where(BatchRun.batch_id == batch_id, BatchRun.position == position, BatchRun.status == 'running')
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return bool(advanced)
+            
+        except Exception as e:
+            logger.error(f"Failed to checkpoint batch run {batch_id}: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    async def set_batch_run_status(self, batch_id: str, status: str) -> bool:
+        """Move a batch run to running, completed or cancelled (finished runs stay as they are)"""
+        db = self.db_session()
+        try:
+            values = {'status': status, 'updated_at': datetime.utcnow()}
+            if status == 'running':
+                values['started_at'] = case((BatchRun.started_at.is_(None), datetime.utcnow()), else_=BatchRun.started_at)
+            else:
+                values['finished_at'] = datetime.utcnow()
+            
+            changed = db.execute(
+                update(BatchRun)
+                .where(BatchRun.batch_id == batch_id, BatchRun.status.in_(['queued', 'running']))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return bool(changed)
+            
+        except Exception as e:
+            logger.error(f"Failed to update batch run {batch_id}: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
@@ -0,0 +1,139 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ModelRoute:
+    """Model, deadline and concurrency pool of one tier"""
+    
+    def __init__(self, tier: str, model: str, timeout: float, max_concurrency: int):
+        self.tier = tier
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self._pool = asyncio.Semaphore(self.max_concurrency)
+    
+    def get_stats(self) -> Dict:
+        return {
+            'tier': self.tier,
+            'model': self.model,
+            'timeout_seconds': self.timeout,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency
+        }
+
+class _TaskLatency:
+    """Latency record of one task type"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.completed = 0
+        self.failures = 0
+        self.partial = 0
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=200)
+    
+    @staticmethod
+    def _percentile(values, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+    
+    def get_stats(self) -> Dict:
+        completed = self.completed
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'partial': self.partial,
+            'latency_ms_avg': round(self.total_seconds / completed * 1000, 1) if completed else None,
+            'latency_ms_p50': self._percentile(self.latencies, 0.5),
+            'latency_ms_p95': self._percentile(self.latencies, 0.95)
+        }
+
+class ModelRouter:
+    """Per-task model selection: small and fast for live recaps, large for the final summary
+    
+    Every task type belongs to a tier. The chunk tier (chunk summaries, key points,
+    rolling updates) uses OLLAMA_CHUNK_MODEL, the final tier (integrated and
+    hierarchical summaries with their reduce steps) OLLAMA_FINAL_MODEL; both fall
+    back to OLLAMA_MODEL, which serves every other task. Each tier has its own
+    deadline (OLLAMA_<TIER>_TIMEOUT) and pool (LLM_<TIER>_MAX_IN_FLIGHT), taken
+    before the process-wide scheduler slot, so a long final summary cannot occupy
+    every slot while chunk recaps are due.
+    """
+    
+    TASK_TIERS = {
+        'chunk_summary': 'chunk',
+        'chunk_key_points': 'chunk',
+        'rolling_summary': 'chunk',
+        'hierarchical_chunk': 'final',
+        'hierarchical_summary': 'final',
+        'integrated_summary': 'final',
+        'reduce': 'final'
+    }
+    
+    def __init__(self, default_model: str, default_timeout: float, max_in_flight: int):
+        self.routes = {'default': ModelRoute('default', default_model, default_timeout, max_in_flight)}
+        for tier, concurrency in (('chunk', max_in_flight), ('final', max(1, max_in_flight // 2))):
+            prefix = tier.upper()
+            self.routes[tier] = ModelRoute(
+                tier,
+                os.getenv(f'OLLAMA_{prefix}_MODEL') or default_model,
+                float(os.getenv(f'OLLAMA_{prefix}_TIMEOUT', default_timeout)),
+                int(os.getenv(f'LLM_{prefix}_MAX_IN_FLIGHT', concurrency))
+            )
+        self.latency: Dict[str, _TaskLatency] = {}
+    
+    def route(self, task: str) -> ModelRoute:
+        return self.routes[self.TASK_TIERS.get(task, 'default')]
+    
+    @property
+    def models(self) -> List[str]:
+        """Distinct models of all tiers"""
+        return list(dict.fromkeys(route.model for route in self.routes.values()))
+    
+    @property
+    def max_timeout(self) -> float:
+        return max(route.timeout for route in self.routes.values())
+    
+    @asynccontextmanager
+    async def slot(self, task: str):
+        """Hold a place in the task's tier pool and time the generation"""
+        route = self.route(task)
+        latency = self.latency.setdefault(task, _TaskLatency())
+        started = time.perf_counter()
+        async with route._pool:
+            route.in_flight += 1
+            latency.requests += 1
+            try:
+                yield route
+            except Exception:
+                latency.failures += 1
+                raise
+            else:
+                elapsed = time.perf_counter() - started
+                latency.completed += 1
+                latency.total_seconds += elapsed
+                latency.latencies.append(elapsed)
+            finally:
+                route.in_flight -= 1
+    
+    def record_partial(self, task: str):
+        """A generation of this task hit its deadline and kept partial output"""
+        self.latency.setdefault(task, _TaskLatency()).partial += 1
+    
+    def get_stats(self) -> Dict:
+        return {
+            'tiers': {tier: route.get_stats() for tier, route in self.routes.items()},
+            'tasks': {
+                task: {'tier': self.TASK_TIERS.get(task, 'default'), **latency.get_stats()}
+                for task, latency in sorted(self.latency.items())
+            }
+        }
@@ -0,0 +1,224 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import and_, func, or_
+
+from .llm_backends import LLMBackend
+from .models import Meeting, ModelActivity, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class ModelWarmer:
+    """Keeps the summary models loaded while meetings run and unloads them after idle
+    
+    The models are loaded at startup and again when a meeting starts, with
+    MODEL_WARMUP_KEEP_ALIVE so they outlive the gap between two chunk recaps; every
+    generation sends the same keep_alive. While a meeting is active the load is
+    refreshed every MODEL_WARMUP_REFRESH_SECONDS. Once no meeting is active and nothing was generated for MODEL_IDLE_RELEASE_SECONDS
+    (0 leaves unloading to Ollama's keep_alive) the models are unloaded. A meeting
+    stops counting as active when it is finalized or silent for that long.
+    
+    The Ollama server is shared by every API and worker process, so a process only
+    unloads when the database agrees: no meeting is recording, none in processing was
+    updated within the idle period, and no process recorded a generation in it.
+    
+    Every generation is classified by the load_duration Ollama reports: above
+    COLD_LOAD_SECONDS the model had to be loaded first.
+    """
+    
+    COLD_LOAD_SECONDS = 0.5
+    # At most one ModelActivity write per model and process in this interval
+    ACTIVITY_WRITE_SECONDS = 30
+    MAX_RECORDING_HOURS = 24
+    
+    def __init__(self, backend: LLMBackend, models: List[str]):
+        self.backend = backend
+        self.models = models
+        self.enabled = os.getenv('MODEL_WARMUP_ENABLED', 'true').lower() == 'true'
+        # Generations send it too, so no request shortens how long Ollama keeps the models
+        # (and their prompt caches); OLLAMA_KEEP_ALIVE is the older name of the setting
+        self.keep_alive = os.getenv('MODEL_WARMUP_KEEP_ALIVE', os.getenv('OLLAMA_KEEP_ALIVE', '60m'))
+        self.refresh_seconds = float(os.getenv('MODEL_WARMUP_REFRESH_SECONDS', 600))
+        self.idle_release_seconds = float(os.getenv('MODEL_IDLE_RELEASE_SECONDS', 3600))
+        self.active_meetings: Dict[str, float] = {}
+        self.loaded = False
+        self.last_activity = time.monotonic()
+        self.last_warm = 0.0
+        self._lock = asyncio.Lock()
+        self._loop_task = None
+        self._tasks = set()
+        self.warmups: Dict[str, Dict] = {}
+        self.releases = 0
+        self._activity_written: Dict[str, float] = {}
+        self.calls = {
+            'cold': {'count': 0, 'load_seconds': 0.0, 'latencies': deque(maxlen=200)},
+            'warm': {'count': 0, 'load_seconds': 0.0, 'latencies': deque(maxlen=200)}
+        }
+    
+    async def start(self):
+        """Load the models and start the refresh/release loop"""
+        if not self.enabled:
+            return
+        await self.warm('startup')
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop())
+    
+    async def warm(self, reason: str):
+        """Load every model (or reset its keep_alive if already loaded)"""
+        async with self._lock:
+            for model in self.models:
+                started = time.perf_counter()
+                try:
+                    result = await self.backend.load(model, self.keep_alive)
+                except Exception as e:
+                    logger.warning(f"Warm-up of {model} failed ({reason}): {e}")
+                    continue
+                load_seconds = (result.get('load_duration') or 0) / 1e9
+                self.warmups[model] = {
+                    'reason': reason,
+                    'at': time.time(),
+                    'load_ms': round(load_seconds * 1000, 1),
+                    'request_ms': round((time.perf_counter() - started) * 1000, 1),
+                    'was_cold': load_seconds >= self.COLD_LOAD_SECONDS
+                }
+                logger.info(f"Model {model} warm ({reason}, load {load_seconds:.2f}s)")
+            self.loaded = True
+            self.last_warm = time.monotonic()
+            self.last_activity = self.last_warm
+    
+    async def release(self):
+        """Unload every model now"""
+        async with self._lock:
+            for model in self.models:
+                try:
+                    await self.backend.load(model, 0)
+                except Exception as e:
+                    logger.warning(f"Unloading {model} failed: {e}")
+            self.loaded = False
+            self.releases += 1
+            logger.info(f"Released idle models {self.models}")
+    
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        # Keep a reference until done so the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def meeting_started(self, meeting_id: str):
+        """Warm the models in the background so the first recap does not pay the load"""
+        if not self.enabled:
+            return
+        self.active_meetings[meeting_id] = time.monotonic()
+        self._spawn(self.warm(f'meeting {meeting_id}'))
+    
+    def meeting_activity(self, meeting_id: str):
+        if self.enabled and meeting_id in self.active_meetings:
+            self.active_meetings[meeting_id] = time.monotonic()
+    
+    def meeting_ended(self, meeting_id: str):
+        self.active_meetings.pop(meeting_id, None)
+        self.last_activity = time.monotonic()
+    
+    def record_generation(self, result: Dict):
+        """Classify a finished generation as cold or warm by its load_duration"""
+        load_seconds = (result.get('load_duration') or 0) / 1e9
+        kind = 'cold' if load_seconds >= self.COLD_LOAD_SECONDS else 'warm'
+        calls = self.calls[kind]
+        calls['count'] += 1
+        calls['load_seconds'] += load_seconds
+        calls['latencies'].append((result.get('total_duration') or 0) / 1e9)
+        self.loaded = True
+        self.last_activity = time.monotonic()
+        self._record_shared_activity(result.get('model') or self.models[0])
+        if kind == 'cold':
+            logger.warning(f"Cold model load of {load_seconds:.2f}s inside a generation")
+    
+    def _record_shared_activity(self, model: str):
+        now = time.monotonic()
+        if now - self._activity_written.get(model, 0.0) < self.ACTIVITY_WRITE_SECONDS:
+            return
+        self._activity_written[model] = now
+        db = SessionLocal()
+        try:
+            db.merge(ModelActivity(model=model, last_used_at=datetime.utcnow()))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Could not record model activity: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def _shared_idle(self) -> bool:
+        """Whether no process has a live meeting or a recent generation, by the shared database"""
+        since = datetime.utcnow() - timedelta(seconds=self.idle_release_seconds)
+        db = SessionLocal()
+        try:
+            # A recording meeting may go without status updates for hours; one left behind
+            # by a crashed bot stops holding the models after MAX_RECORDING_HOURS
+            live_meetings = db.query(func.count(Meeting.meeting_id)).filter(or_(
+                and_(Meeting.status == 'recording',
+                     Meeting.start_time >= datetime.utcnow() - timedelta(hours=self.MAX_RECORDING_HOURS)),
+                and_(Meeting.status == 'processing', Meeting.updated_at >= since)
+            )).scalar()
+            last_used = db.query(func.max(ModelActivity.last_used_at)).scalar()
+            return not live_meetings and (last_used is None or last_used < since)
+        finally:
+            db.close()
+    
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(min(self.refresh_seconds, 60))
+            now = time.monotonic()
+            try:
+                if self.idle_release_seconds > 0:
+                    for meeting_id, seen in list(self.active_meetings.items()):
+                        if now - seen >= self.idle_release_seconds:
+                            self.active_meetings.pop(meeting_id, None)
+                if self.active_meetings:
+                    if now - self.last_warm >= self.refresh_seconds:
+                        await self.warm('refresh')
+                elif self.loaded and self.idle_release_seconds > 0 and now - self.last_activity >= self.idle_release_seconds:
+                    if await asyncio.to_thread(self._shared_idle):
+                        await self.release()
+                    else:
+                        # Another process is still using the models: check again after another idle period
+                        self.last_activity = now
+            except Exception as e:
+                logger.error(f"Model keep-alive loop error: {e}")
+    
+    async def aclose(self):
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        for task in list(self._tasks):
+            task.cancel()
+    
+    @staticmethod
+    def _call_stats(calls: Dict) -> Dict:
+        latencies = sorted(calls['latencies'])
+        return {
+            'count': calls['count'],
+            'avg_load_ms': round(calls['load_seconds'] / calls['count'] * 1000, 1) if calls['count'] else None,
+            'latency_ms_p50': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            'latency_ms_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None
+        }
+    
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            'enabled': self.enabled,
+            'models': self.models,
+            'loaded': self.loaded,
+            'keep_alive': self.keep_alive,
+            'active_meetings': len(self.active_meetings),
+            'idle_seconds': round(now - self.last_activity, 1),
+            'releases': self.releases,
+            'warmups': self.warmups,
+            'cold_calls': self._call_stats(self.calls['cold']),
+            'warm_calls': self._call_stats(self.calls['warm'])
+        }
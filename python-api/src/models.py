@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, Float
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, DateTime, Boolean, Text, Float
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -46,12 +47,14 @@ class Summary(Base):
     __tablename__ = 'summaries'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    meeting_id = Column(String, nullable=False)
+    meeting_id = Column(String, nullable=False, index=True)
     summary_type = Column(String, default='full')  # full, key_points, action_items
     content = Column(Text, nullable=False)
     generated_by = Column(String, default='ollama')  # AI model used
     generated_at = Column(DateTime, default=datetime.utcnow)
-    file_path = Column(String, nullable=True)  # Path to saved summary file
+    file_path = Column(String, nullable=True)  # Saved summary file, <OUTPUT_DIR>/<meeting>/<type>_<sha256>.md
+    template_id = Column(String, nullable=True)  # Prompt template(s) used, "a+b" for several
+    template_version = Column(String, nullable=True)  # Their versions, in the same order
 
 class ProcessingStatus(Base):
     """Track processing status of meetings"""
@@ -67,6 +70,7 @@ class ProcessingStatus(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     total_chunks = Column(Integer, default=0)  # Total number of audio chunks
     completed_chunks = Column(Integer, default=0)  # Number of completed transcriptions
+    final_summary_claimed_at = Column(DateTime, nullable=True)  # Set once by whichever worker triggers the final summary
 
 class AudioFile(Base):
     """Track audio files and cleanup"""
@@ -99,11 +103,126 @@ class ChunkSummary(Base):
     generated_at = Column(DateTime, default=datetime.utcnow)
     sent_to_ui = Column(Boolean, default=False)  # Whether sent to Discord/UI
 
+class RollingSummary(Base):
+    """Running recap of a meeting, updated from new transcript segments while it records"""
+    __tablename__ = 'rolling_summaries'
+    
+    meeting_id = Column(String, primary_key=True)
+    summary_text = Column(Text, nullable=False)
+    last_transcript_id = Column(Integer, default=0)  # Highest Transcript.id folded in
+    segments_folded = Column(Integer, default=0)
+    updates = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SpeculativeSummary(Base):
+    """Final summary drafted from the chunk summaries available at finalize, before the last chunk lands"""
+    __tablename__ = 'speculative_summaries'
+    
+    meeting_id = Column(String, primary_key=True)
+    summary_text = Column(Text, nullable=False)
+    chunk_digests = Column(Text, nullable=False)  # JSON {chunk_index: digest} of the chunk summaries used
+    template_version = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SummaryStep(Base):
+    """Intermediate map/reduce results of a long summary, so a crashed run resumes"""
+    __tablename__ = 'summary_steps'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    meeting_id = Column(String, nullable=False, index=True)
+    input_hash = Column(String, nullable=False, unique=True)  # sha256 of model + prompt
+    level = Column(Integer, default=0)  # 0 map, 1.. reduce levels
+    output_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SummaryCacheEntry(Base):
+    """Memoized LLM outputs keyed by input content, template version, model and options"""
+    __tablename__ = 'summary_cache'
+    
+    cache_key = Column(String, primary_key=True)  # sha256 over all key parts
+    template_id = Column(String, nullable=False)
+    template_version = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)
+    output = Column(Text, nullable=False)  # JSON
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class Job(Base):
+    """Durable background jobs (transcription, summarization)"""
+    __tablename__ = 'jobs'
+    
+    job_id = Column(String, primary_key=True)
+    job_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=True)  # JSON keyword arguments for the handler
+    dedupe_key = Column(String, nullable=True, index=True)  # Submits with the same key merge while queued
+    group_key = Column(String, nullable=True, index=True)  # Related jobs, e.g. all speaker files of a chunk
+    priority = Column(Integer, default=1)  # 0 interactive, 1 live, 2 final, 3 batch
+    sort_key = Column(Float, nullable=False, index=True)  # priority * aging + enqueue epoch
+    status = Column(String, default='queued', index=True)  # queued, leased, completed, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Not claimable before this (retry backoff)
+    lease_owner = Column(String, nullable=True)  # Worker holding the job
+    lease_token = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)  # JSON handler return value
+    last_error = Column(Text, nullable=True)
+    error_type = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ModelActivity(Base):
+    """Last generation per model, shared by every API and worker process using the LLM server"""
+    __tablename__ = 'model_activity'
+    
+    model = Column(String, primary_key=True)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+class BatchRun(Base):
+    """Re-summarization of many meetings, checkpointed after every meeting"""
+    __tablename__ = 'batch_runs'
+    
+    batch_id = Column(String, primary_key=True)
+    selector = Column(Text, nullable=False)  # JSON guild_id, start_date, end_date, statuses, limit
+    meeting_ids = Column(Text, nullable=False)  # JSON list, selected once at creation
+    total = Column(Integer, default=0)
+    position = Column(Integer, default=0)  # Meetings done; the next run resumes here
+    succeeded = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)  # No transcript, or summary already from the current templates
+    failed = Column(Integer, default=0)
+    busy_seconds = Column(Float, default=0.0)  # Time spent summarizing, without queue waits
+    errors = Column(Text, nullable=True)  # JSON list of the latest {meeting_id, error}
+    skip_up_to_date = Column(Boolean, default=True)
+    status = Column(String, default='queued')  # queued, running, completed, cancelled
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Database connection setup
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./meetings.db')
-engine = create_engine(DATABASE_URL, echo=False)
+_is_sqlite = DATABASE_URL.startswith('sqlite')
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    # Several uvicorn/worker processes share the file: wait for locks instead of failing
+    connect_args={'timeout': 30} if _is_sqlite else {}
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run while another process writes"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
 def get_db():
     """Get database session"""
     db = SessionLocal()
@@ -112,7 +231,39 @@ def get_db():
     finally:
         db.close()
 
+def _add_missing_columns():
+    """Add columns and indexes introduced after a table was first created (create_all skips existing tables)"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"Added column {table.name}.{column.name}")
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    print(f"Added index {index.name}")
+
 def init_db():
     """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    # Every uvicorn worker runs this at startup; losing the race to another process is fine
+    for attempt in range(3):
+        try:
+            Base.metadata.create_all(bind=engine)
+            _add_missing_columns()
+            break
+        except OperationalError as e:
+            if attempt == 2 or 'already exists' not in str(e) and 'duplicate column' not in str(e):
+                raise
     print("Database tables created successfully")
\ No newline at end of file
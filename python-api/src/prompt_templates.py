@@ -0,0 +1,103 @@
+import hashlib
+import logging
+from string import Formatter
+from typing import Dict, Iterable, List, Optional
+
+from .text_chunking import TokenEstimator
+
+logger = logging.getLogger(__name__)
+
+class PromptTemplate:
+    """A prompt template parsed once into static text and {field} slots
+    
+    render() joins the precomputed pieces with the field values instead of running
+    str.format over the whole template on every call. The version is a hash of the
+    template text, so any edit yields a new version (and new summary cache keys).
+    """
+    
+    def __init__(self, template_id: str, text: str, estimator: TokenEstimator):
+        self.template_id = template_id
+        self.text = text
+        self.version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+        self._estimator = estimator
+        
+        self.parts = []
+        for literal, field, format_spec, conversion in Formatter().parse(text):
+            if field is not None and (format_spec or conversion or not field.isidentifier()):
+                raise ValueError(f"Template {template_id}: only plain {{name}} fields are supported")
+            self.parts.append((literal, field))
+        self.fields = [field for _, field in self.parts if field]
+        self.static_text = ''.join(literal for literal, _ in self.parts)
+        self.static_raw_tokens = estimator.raw_estimate(self.static_text)
+    
+    @property
+    def static_tokens(self) -> int:
+        """Estimated tokens of the template without any field values"""
+        return int(self.static_raw_tokens * self._estimator.correction) + 1
+    
+    def render(self, **values) -> str:
+        """Prompt with the fields filled in (values not used by this template are ignored)"""
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise KeyError(f"Template {self.template_id} needs {missing}")
+        
+        pieces = []
+        for literal, field in self.parts:
+            pieces.append(literal)
+            if field:
+                pieces.append(str(values[field]))
+        return ''.join(pieces)
+    
+    def estimate_tokens(self, **values) -> int:
+        """Estimated prompt tokens for these field values (missing fields count as empty)"""
+        raw = self.static_raw_tokens + sum(
+            self._estimator.raw_estimate(str(values[field])) for field in self.fields if field in values
+        )
+        return int(raw * self._estimator.correction) + 1
+    
+    def describe(self) -> Dict:
+        return {
+            'template_id': self.template_id,
+            'version': self.version,
+            'fields': sorted(set(self.fields)),
+            'static_tokens': self.static_tokens,
+            'static_chars': len(self.static_text)
+        }
+
+class TemplateRegistry:
+    """Compiled prompt templates by id"""
+    
+    def __init__(self, templates: Dict[str, str], estimator: TokenEstimator):
+        self.estimator = estimator
+        self._templates: Dict[str, PromptTemplate] = {}
+        for template_id, text in templates.items():
+            self.register(template_id, text)
+    
+    def register(self, template_id: str, text: str) -> PromptTemplate:
+        template = PromptTemplate(template_id, text, self.estimator)
+        self._templates[template_id] = template
+        logger.debug(f"Compiled template {template_id} v{template.version} (~{template.static_tokens} tokens)")
+        return template
+    
+    def __getitem__(self, template_id: str) -> PromptTemplate:
+        return self._templates[template_id]
+    
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._templates
+    
+    def get(self, template_id: str) -> Optional[PromptTemplate]:
+        return self._templates.get(template_id)
+    
+    def version(self, template_id: str) -> str:
+        """Version of a template, or of several joined with '+' ("a+b")"""
+        return '+'.join(
+            self._templates[name].version if name in self._templates else ''
+            for name in template_id.split('+')
+        )
+    
+    def describe(self) -> List[Dict]:
+        return [template.describe() for template in self._templates.values()]
+
+def join_sections(sections: Iterable[Dict[str, str]], separator: str = "\n\n") -> str:
+    """Render time-ranged summaries as 【range】 blocks in one join"""
+    return separator.join(f"【{section['time_range']}】\n{section['summary']}" for section in sections)
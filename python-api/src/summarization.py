@@ -1,39 +1,105 @@
 import ollama
 import os
-import aiofiles
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterator
 import logging
 import asyncio
 import json
+import time
+import hashlib
 import httpx
+from sqlalchemy.exc import IntegrityError
+
+from .llm_backends import create_backend
+from .llm_scheduler import LLMScheduler
+from .model_routing import ModelRouter
+from .model_warmup import ModelWarmer
+from .models import SessionLocal, SummaryStep
+from .summary_cache import SummaryCache
+from .summary_store import SummaryStore
+from .prompt_templates import TemplateRegistry, join_sections
+from .text_chunking import TokenEstimator, chunk_transcript
+from .transcript_compression import TranscriptCompressor
 
 logger = logging.getLogger(__name__)
 
 class SummarizationService:
-    """Service for meeting summarization using Ollama"""
+    """Service for meeting summarization using Ollama (or another LLM_BACKEND)"""
+    
+    # Template used by each create_summary() type
+    SUMMARY_TEMPLATES = {
+        'full': 'meeting_summary',
+        'comprehensive': 'comprehensive_json',
+        'key_points': 'key_points',
+        'action_items': 'action_items'
+    }
+    
+    # Templates behind create_final_integrated_summary()
+    INTEGRATED_TEMPLATES = 'integrated_summary+hierarchical_reduce'
+    # Templates behind create_hierarchical_summary()
+    HIERARCHICAL_TEMPLATES = 'hierarchical_chunk+hierarchical_reduce+hierarchical_final'
     
     def __init__(self):
-        self.client = None
         self.host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
         self.model = os.getenv('OLLAMA_MODEL', 'gemma2:2b')
         self.timeout = int(os.getenv('OLLAMA_TIMEOUT', 300))
+        # Requests in flight to Ollama from this process; extra prompts wait for a slot
+        self.max_concurrent_requests = int(os.getenv('OLLAMA_MAX_CONCURRENT_REQUESTS', 4))
+        # Consume Ollama's token stream so a timeout keeps what was already generated
+        self.stream_generation = os.getenv('OLLAMA_STREAM', 'true').lower() == 'true'
+        self.partial_notice = "\n\n（生成がタイムアウトしたため、ここまでの途中結果です）"
+        # Context window requested from Ollama; transcripts that do not fit are map-reduced
+        self.context_tokens = int(os.getenv('OLLAMA_NUM_CTX', 8192))
+        self.output_tokens = int(os.getenv('SUMMARY_OUTPUT_TOKENS', 1024))
+        self.token_estimator = TokenEstimator()
+        # combined: one JSON-structured generation for all sections; split: one prompt per section
+        self.summary_mode = os.getenv('SUMMARY_MODE', 'combined').lower()
+        # Ollama usage reported by this instance (benchmarks, health)
+        self.usage = {'calls': 0, 'prompt_tokens': 0, 'eval_tokens': 0, 'llm_seconds': 0.0}
+        self.generation_options = {
+            "temperature": 0.3,  # Lower temperature for more consistent output
+            "top_p": 0.9,
+            "top_k": 40,
+            "num_ctx": self.context_tokens
+        }
+        # Memoized outputs: identical inputs never reach Ollama twice
+        self.cache = SummaryCache()
+        # Fillers, repeats and low-ranked sentences are cut before transcripts reach a prompt
+        self.compressor = TranscriptCompressor()
+        # Map/reduce steps run at most this many at once; match the server's OLLAMA_NUM_PARALLEL
+        self.num_parallel = int(os.getenv('OLLAMA_NUM_PARALLEL', 4))
+        self.map_retries = int(os.getenv('SUMMARY_MAP_RETRIES', 2))
+        self.reduce_fanin = max(2, int(os.getenv('SUMMARY_REDUCE_FANIN', 6)))
+        # Every generation of this process waits here for a slot; the deadline starts at dispatch
+        self.scheduler = LLMScheduler()
+        # Model, deadline and concurrency pool per task tier (chunk recaps, final summary, other)
+        self.router = ModelRouter(self.model, self.timeout, self.scheduler.max_in_flight)
+        # Server protocol: ollama, openai (llama.cpp server) or fake (load tests)
+        self.backend = create_backend(self.host, self.router.max_timeout, self.max_concurrent_requests)
+        # Preloads the models for meetings and unloads them when idle; times cold and warm calls
+        self.warmer = ModelWarmer(self.backend, self.router.models)
         self.output_dir = os.getenv('OUTPUT_DIR', './output')
         self._ensure_output_dir()
+        # Summary files: one directory per meeting, content-addressed names, atomic writes
+        self.store = SummaryStore(self.output_dir)
         
-        # Summary templates
-        self.templates = {
+        # Summary templates. Every template starts with the same transcript block and puts
+        # the task after it, so follow-up prompts on one transcript share a prompt prefix
+        # and Ollama reuses the cached prefill instead of evaluating the transcript again.
+        # Each is compiled once; its version (a hash of the text) is stored with every summary.
+        self.templates = TemplateRegistry({
             'meeting_summary': """
-以下は会議の文字起こしです。この内容を基に、日本語で分かりやすい議事録を作成してください。
+【文字起こし】
+{transcript}
+
+【指示】
+上記は会議の文字起こしです。この内容を基に、日本語で分かりやすい議事録を作成してください。
 
 【会議情報】
 - 会議ID: {meeting_id}
 - 参加者: {participants}
 - 時間: {duration}分
 
-【文字起こし】
-{transcript}
-
 【出力形式】
 # 会議議事録
 
@@ -56,24 +122,28 @@ class SummarizationService:
 """,
 
             'chunk_summary': """
-以下は会議の一部（{time_range}）の文字起こしです。
+【文字起こし】
+{transcript}
+
+【指示】
+上記は会議の一部（{time_range}）の文字起こしです。
 この部分の内容を150文字程度で要約してください。
 
 【時間帯】{time_range}
 【参加者】{participants}
-【文字起こし】
-{transcript}
 
 【要約（150文字程度）】
 """,
 
             'chunk_key_points': """
-以下は会議の一部（{time_range}）の文字起こしです。
+【文字起こし】
+{transcript}
+
+【指示】
+上記は会議の一部（{time_range}）の文字起こしです。
 この部分の重要なポイントを2-3個、箇条書きで抽出してください。
 
 【時間帯】{time_range}
-【文字起こし】
-{transcript}
 
 【重要ポイント】
 • 
@@ -81,11 +151,168 @@ class SummarizationService:
 • 
 """,
             
-            'key_points': """
-以下の会議文字起こしから、重要なポイントを3-5つ抽出してください：
+            'comprehensive_json': """
+【文字起こし】
+{transcript}
+
+【指示】
+上記は会議の文字起こしです。この内容を基に、日本語の議事録・重要ポイント・アクションアイテムを作成してください。
 
+【会議情報】
+- 会議ID: {meeting_id}
+- 参加者: {participants}
+- 時間: {duration}分
+- 日時: {date}
+- 参加者数: {participant_count}名
+
+【出力形式】
+次のキーを持つJSONオブジェクトだけを出力してください：
+- "full_summary": Markdown形式の議事録（「## 📝 主な議題・内容」「## ✅ 決定事項」「## 📋 アクションアイテム」「## 💭 その他・メモ」の見出しを含める）
+- "key_points": 重要なポイント3-5個の文字列の配列
+- "action_items": 今後のタスク・宿題の文字列の配列（担当者が明記されていれば「タスク - 担当者」の形で。無ければ空配列）
+""",
+            
+            'hierarchical_chunk': """
+【文字起こし】
 {transcript}
 
+【指示】
+上記は会議の一部（{time_range}）の文字起こしです。
+この部分の要点を200文字程度で要約してください。
+
+【要約】
+""",
+            
+            'hierarchical_reduce': """
+以下は会議の{time_range}の各時間帯の要約です。
+時系列の流れ・決定事項・タスクを残したまま、1つの要約（400文字程度）に統合してください。
+
+{summaries}
+
+【統合した要約】
+""",
+            
+            'hierarchical_final': """
+以下は{total_duration}分間の会議の各時間帯の要約です。
+これらを統合して、会議全体の議事録を作成してください。
+
+【会議情報】
+- 会議ID: {meeting_id}
+- 参加者: {participants}
+- 総時間: {total_duration}分
+
+【各時間帯の要約】
+{combined_summaries}
+
+【出力形式】
+# 会議議事録
+
+## 📋 会議概要
+- **日時**: {date}
+- **時間**: {total_duration}分
+- **参加者**: {participant_count}名
+
+## 📝 会議の流れ
+（時系列での主要トピックを記載）
+
+## ⭐ 主な議題・決定事項
+（重要な決定事項を箇条書きで）
+
+## ✅ 今後のアクション
+（必要なアクションアイテムを記載）
+
+## 📌 補足事項
+（その他の重要事項があれば記載）
+""",
+            
+            'integrated_summary': """
+以下は{total_duration}分間の会議の各時間帯の要約です。
+これらを統合して、会議全体の包括的な議事録を作成してください。
+
+【会議情報】
+- 会議ID: {meeting_id}
+- 総時間: {total_duration}分
+- 参加者: {participants}
+
+【各時間帯の要約】
+{combined_chunk_text}
+
+【出力形式】
+# 🎙️ 会議議事録（統合版）
+
+## 📋 会議概要
+- **日時**: {date}
+- **総時間**: {total_duration}分
+- **参加者**: {participant_count}名
+
+## 📝 会議全体の流れ
+（時系列での主要な話し合いの流れを記載）
+
+## ⭐ 主要な議題・決定事項
+（会議で決まった重要事項を箇条書きで）
+
+## ✅ アクションアイテム
+（今後必要なタスクや宿題を記載）
+
+## 📌 補足事項
+（その他の重要な情報があれば記載）
+
+## 🕐 時間帯別要約
+（各時間帯の詳細な内容）
+""",
+            
+            'integrated_update': """
+【これまでの議事録】
+{previous_summary}
+
+【追加の時間帯の要約】
+{new_sections}
+
+【指示】
+上記の議事録は、会議の最後の時間帯の要約がそろう前に作成されたものです。
+追加の時間帯の内容を反映して、議事録全体を更新してください。
+- 見出しと構成はそのまま維持してください
+- 追加分の決定事項・アクションアイテム・補足事項を該当する節に統合してください
+- 「時間帯別要約」に追加の時間帯を加えてください
+- 追加分と矛盾する記述は追加分に合わせて修正してください
+- 総時間は{total_duration}分、参加者は{participants}です
+
+更新後の議事録全体のみを出力してください。
+""",
+            
+            'rolling_update': """
+【これまでの要約】
+{previous_summary}
+
+【新しい発言】
+{transcript}
+
+【指示】
+上記は進行中の会議のこれまでの要約と、その後の新しい発言です。
+新しい発言の内容を反映して、会議全体の最新の要約を400文字程度で作成してください。
+話題の流れ・決定事項・タスクは残し、古い細部は簡潔にまとめてください。
+
+【最新の要約】
+""",
+            
+            'partial_summary': """
+【文字起こし】
+{transcript}
+
+【指示】
+上記は長い会議の文字起こしの一部（{part}/{total}）です。
+後で会議全体の議事録にまとめるため、この部分の話題・決定事項・タスクと発言者を漏らさず簡潔なメモにしてください。
+
+【メモ】
+""",
+            
+            'key_points': """
+【文字起こし】
+{transcript}
+
+【指示】
+上記の会議文字起こしから、重要なポイントを3-5つ抽出してください。
+
 出力は以下の形式で：
 • ポイント1
 • ポイント2
@@ -93,68 +320,41 @@ class SummarizationService:
 """,
             
             'action_items': """
-以下の会議文字起こしから、アクションアイテム（今後のタスク・宿題）を抽出してください：
-
+【文字起こし】
 {transcript}
 
+【指示】
+上記の会議文字起こしから、アクションアイテム（今後のタスク・宿題）を抽出してください。
+
 出力は以下の形式で：
 □ タスク1 - 担当者（もし明記されていれば）
 □ タスク2 - 担当者（もし明記されていれば）
 """
-        }
+        }, self.token_estimator)
     
     def _ensure_output_dir(self):
         """Ensure output directory exists"""
         os.makedirs(self.output_dir, exist_ok=True)
     
+    def model_id(self, task: str = 'summary') -> str:
+        """Model identity in cache keys and step hashes; other backends never share Ollama's entries"""
+        model = self.router.route(task).model
+        if self.backend.name == 'ollama':
+            return model
+        return f"{self.backend.name}:{model}"
+    
     async def initialize(self):
-        """Initialize Ollama connection"""
+        """Initialize the LLM backend connection"""
         try:
-            logger.info(f"Connecting to Ollama at {self.host}")
-            
-            # Test connection
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.host}/api/tags")
-                if response.status_code == 200:
-                    models = response.json()
-                    logger.info(f"Available Ollama models: {[m['name'] for m in models.get('models', [])]}")
-                    
-                    # Check if our model is available
-                    model_names = [m['name'] for m in models.get('models', [])]
-                    if self.model not in model_names and not any(self.model in name for name in model_names):
-                        logger.warning(f"Model {self.model} not found. Available models: {model_names}")
-                        # Try to pull the model
-                        await self._pull_model()
-                    else:
-                        logger.info(f"Model {self.model} is available")
-                else:
-                    raise Exception(f"Failed to connect to Ollama: {response.status_code}")
-            
-            logger.info("Ollama connection established successfully")
+            for model in self.router.models:
+                await self.backend.ensure_model(model)
+            logger.info(f"LLM backend '{self.backend.name}' ready")
+            await self.warmer.start()
             
         except Exception as e:
-            logger.error(f"Failed to initialize Ollama: {e}")
+            logger.error(f"Failed to initialize LLM backend: {e}")
             raise
     
-    async def _pull_model(self):
-        """Pull the required model if not available"""
-        try:
-            logger.info(f"Pulling model {self.model}...")
-            
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    f"{self.host}/api/pull",
-                    json={"name": self.model}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully pulled model {self.model}")
-                else:
-                    logger.error(f"Failed to pull model {self.model}: {response.status_code}")
-                    
-        except Exception as e:
-            logger.error(f"Error pulling model: {e}")
-    
     def is_ready(self) -> bool:
         """Check if summarization service is ready"""
         try:
@@ -163,6 +363,36 @@ class SummarizationService:
         except:
             return False
     
+    def _build_summary_prompt(
+        self,
+        meeting_id: str,
+        transcript: str,
+        participants: List[str],
+        duration: int,
+        summary_type: str = 'full'
+    ) -> str:
+        """Fill the template for a summary type"""
+        return self._summary_template(summary_type).render(
+            transcript=transcript,
+            **self._summary_fields(meeting_id, participants, duration)
+        )
+    
+    def _summary_template(self, summary_type: str):
+        template_id = self.SUMMARY_TEMPLATES.get(summary_type)
+        if template_id is None:
+            raise ValueError(f"Unknown summary type: {summary_type}")
+        return self.templates[template_id]
+    
+    def _summary_fields(self, meeting_id: str, participants: List[str], duration: int) -> Dict:
+        """Template values besides the transcript"""
+        return {
+            'meeting_id': meeting_id,
+            'participants': ', '.join(participants),
+            'duration': duration,
+            'date': datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'participant_count': len(participants)
+        }
+    
     async def create_summary(
         self,
         meeting_id: str,
@@ -174,28 +404,20 @@ class SummarizationService:
         """Create meeting summary using Ollama"""
         try:
             logger.info(f"Creating {summary_type} summary for meeting {meeting_id}")
+            transcript = await asyncio.to_thread(self.compressor.compress, transcript)
             
-            if summary_type == 'full':
-                template = self.templates['meeting_summary']
-                prompt = template.format(
-                    meeting_id=meeting_id,
-                    participants=', '.join(participants),
-                    duration=duration,
-                    transcript=transcript,
-                    date=datetime.now().strftime('%Y-%m-%d %H:%M'),
-                    participant_count=len(participants)
-                )
-            elif summary_type == 'key_points':
-                template = self.templates['key_points']
-                prompt = template.format(transcript=transcript)
-            elif summary_type == 'action_items':
-                template = self.templates['action_items']
-                prompt = template.format(transcript=transcript)
-            else:
-                raise ValueError(f"Unknown summary type: {summary_type}")
+            async def generate():
+                prompt = await self._summary_prompt(meeting_id, transcript, participants, duration, summary_type)
+            
+                # Generate summary using Ollama
+                summary = await self._generate_with_ollama(prompt)
+                return summary, not summary.endswith(self.partial_notice)
             
-            # Generate summary using Ollama
-            summary = await self._generate_with_ollama(prompt)
+            summary = await self._cached(
+                self.SUMMARY_TEMPLATES.get(summary_type, summary_type),
+                {'meeting_id': meeting_id, 'transcript': transcript, 'participants': participants, 'duration': duration},
+                generate
+            )
             
             logger.info(f"Summary generated successfully for meeting {meeting_id}")
             return summary
@@ -204,37 +426,196 @@ class SummarizationService:
             logger.error(f"Failed to create summary: {e}")
             raise
     
-    async def _generate_with_ollama(self, prompt: str) -> str:
-        """Generate text using Ollama API"""
+    async def _summary_prompt(
+        self,
+        meeting_id: str,
+        transcript: str,
+        participants: List[str],
+        duration: int,
+        summary_type: str
+    ) -> str:
+        """Summary prompt for a compressed transcript, map-reduced first if it exceeds the template's budget"""
+        budget = self._transcript_budget(meeting_id, participants, duration, summary_type)
+        fitted = await self._fit_transcript(meeting_id, transcript, budget)
+        return self._build_summary_prompt(meeting_id, fitted, participants, duration, summary_type)
+    
+    async def _cached(self, template_id: str, content, generate, task: str = 'summary'):
+        """Memoized output for these inputs, or the result of generate() (then stored)
+        
+        template_id names the templates the output depends on ("a+b" for several), task
+        the one whose model produces it; generate returns (output, cacheable) so failed
+        or timed-out outputs are not kept.
+        """
+        template_version = self.templates.version(template_id)
+        key = self.cache.make_key(template_id, template_version, self.model_id(task), self.generation_options, content)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        output, cacheable = await generate()
+        if cacheable:
+            self.cache.put(key, output)
+        return output
+    
+    def _transcript_budget(
+        self,
+        meeting_id: str,
+        participants: List[str],
+        duration: int,
+        summary_type: str
+    ) -> int:
+        """Tokens left for the transcript once the template and the answer are accounted for"""
+        template_tokens = self._summary_template(summary_type).estimate_tokens(
+            **self._summary_fields(meeting_id, participants, duration)
+        )
+        return self.context_tokens - self.output_tokens - template_tokens
+    
+    async def _fit_transcript(
+        self,
+        meeting_id: str,
+        transcript: str,
+        budget: int,
+        depth: int = 0,
+        task: str = 'summary'
+    ) -> str:
+        """Return the transcript, or map-reduced notes of it (made by task's model) if it exceeds the token budget"""
+        transcript_tokens = self.token_estimator.estimate(transcript)
+        if transcript_tokens <= budget:
+            return transcript
+        
+        map_budget = self.context_tokens - self.output_tokens - self.templates['partial_summary'].estimate_tokens(part=0, total=0)
+        chunks = chunk_transcript(transcript, map_budget, self.token_estimator)
+        logger.info(
+            f"Transcript of meeting {meeting_id} is ~{transcript_tokens} tokens (budget {budget}); "
+            f"summarizing {len(chunks)} parts first"
+        )
+        
+        notes = []
+        for i, chunk in enumerate(chunks):
+            prompt = self.templates['partial_summary'].render(part=i + 1, total=len(chunks), transcript=chunk)
+            note = await self._generate_with_ollama(prompt, task=task)
+            notes.append(f"[パート {i + 1}/{len(chunks)}]\n{note.strip()}")
+        
+        combined = "\n\n".join(notes)
+        if depth >= 3:
+            # Notes are not shrinking; keep what fits rather than looping
+            logger.warning(f"Map-reduce for meeting {meeting_id} did not converge; truncating notes")
+            return chunk_transcript(combined, budget, self.token_estimator)[0]
+        return await self._fit_transcript(meeting_id, combined, budget, depth + 1, task)
+    
+    async def stream_summary(
+        self,
+        meeting_id: str,
+        transcript: str,
+        participants: List[str],
+        duration: int,
+        summary_type: str = 'full'
+    ) -> AsyncIterator[str]:
+        """Create meeting summary, yielding text as Ollama generates it"""
+        logger.info(f"Streaming {summary_type} summary for meeting {meeting_id}")
+        # Same prompt as create_summary
+        transcript = await asyncio.to_thread(self.compressor.compress, transcript)
+        prompt = await self._summary_prompt(meeting_id, transcript, participants, duration, summary_type)
+        
+        async for piece in self._stream_until_deadline(prompt):
+            yield piece
+    
+    def _record_usage(self, prompt: str, result: dict):
+        """Account the token counts and durations of a finished generation"""
+        self.token_estimator.calibrate(prompt, result.get('prompt_eval_count'))
+        self.usage['calls'] += 1
+        self.usage['prompt_tokens'] += result.get('prompt_eval_count') or 0
+        self.usage['eval_tokens'] += result.get('eval_count') or 0
+        self.usage['llm_seconds'] += (result.get('total_duration') or 0) / 1e9
+        self.warmer.record_generation(result)
+    
+    def _estimated_tokens(self, prompt: str) -> int:
+        """Scheduler cost of a generation: prompt plus the expected output"""
+        return self.token_estimator.estimate(prompt) + self.output_tokens
+    
+    async def _generate_with_ollama(self, prompt: str, format: Optional[str] = None, task: str = 'summary') -> str:
+        """Generate text with the model of task's tier"""
+        if self.stream_generation and not format:
+            return ''.join([piece async for piece in self._stream_until_deadline(prompt, task)])
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.host}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.3,  # Lower temperature for more consistent output
-                            "top_p": 0.9,
-                            "top_k": 40
-                        }
-                    }
+            async with self.router.slot(task) as route, self.scheduler.slot(self._estimated_tokens(prompt)):
+                result = await asyncio.wait_for(
+                    self.backend.generate(
+                        route.model, prompt, self.generation_options, keep_alive=self.warmer.keep_alive, format=format
+                    ),
+                    timeout=route.timeout
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get('response', '')
-                else:
-                    raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+            self._record_usage(prompt, result)
+            return result.get('response', '')
                     
-        except httpx.TimeoutException:
-            logger.error("Ollama request timed out")
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            logger.error(f"Ollama request for {task} timed out")
             raise Exception("Request to Ollama timed out")
         except Exception as e:
             logger.error(f"Ollama generation error: {e}")
             raise
     
+    async def _generate_sequentially(self, requests: List[tuple]) -> list:
+        """Generate (task, prompt) requests that share a transcript prefix one after another
+        
+        Sent concurrently they land in different Ollama slots and each prefills the
+        transcript; in order, every follow-up reuses the cached prefix (the tasks must
+        map to the same model for that). The first failure (scheduler queue timeout,
+        backend error) is raised, so the job fails and the queue retries it later
+        instead of a placeholder being saved as the summary.
+        """
+        results = []
+        for task, prompt in requests:
+            results.append(await self._generate_with_ollama(prompt, task=task))
+        return results
+    
+    async def stream_with_ollama(self, prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Generate text through the LLM backend, yielding each piece of the token stream"""
+        async for data in self.backend.stream(
+            model or self.model, prompt, self.generation_options, keep_alive=self.warmer.keep_alive
+        ):
+            if data.get('response'):
+                yield data['response']
+            if data.get('done'):
+                # The backend ends the stream after this item
+                self._record_usage(prompt, data)
+    
+    async def _stream_until_deadline(self, prompt: str, task: str = 'summary') -> AsyncIterator[str]:
+        """Stream a generation for at most the timeout of task's tier
+        
+        On timeout the text generated so far is kept and followed by partial_notice;
+        only a timeout before the first token is an error.
+        """
+        async with self.router.slot(task) as route, self.scheduler.slot(self._estimated_tokens(prompt)):
+            deadline = time.monotonic() + route.timeout
+            stream = self.stream_with_ollama(prompt, route.model)
+            produced = False
+            try:
+                while True:
+                    try:
+                        piece = await asyncio.wait_for(
+                            stream.__anext__(), timeout=max(deadline - time.monotonic(), 0)
+                        )
+                    except StopAsyncIteration:
+                        return
+                    except (asyncio.TimeoutError, httpx.TimeoutException):
+                        if not produced:
+                            raise Exception("Request to Ollama timed out")
+                        logger.warning(f"Ollama generation for {task} timed out after {route.timeout}s - keeping partial output")
+                        self.router.record_partial(task)
+                        yield self.partial_notice
+                        return
+                
+                    produced = True
+                    yield piece
+            except Exception as e:
+                logger.error(f"Ollama generation error: {e}")
+                raise
+            finally:
+                await stream.aclose()
+    
     async def create_comprehensive_summary(
         self,
         meeting_id: str,
@@ -246,31 +627,39 @@ class SummarizationService:
         try:
             logger.info(f"Creating comprehensive summary for meeting {meeting_id}")
             
-            # Generate different types of summaries concurrently
-            tasks = []
-            
-            # Full summary
-            tasks.append(
-                self.create_summary(meeting_id, transcript, participants, duration, 'full')
-            )
-            
-            # Key points
-            tasks.append(
-                self.create_summary(meeting_id, transcript, participants, duration, 'key_points')
+            # Condense an oversized transcript once instead of once per summary type
+            budget = min(
+                self._transcript_budget(meeting_id, participants, duration, summary_type)
+                for summary_type in ('comprehensive', 'full', 'key_points', 'action_items')
             )
+            transcript = await self._fit_transcript(meeting_id, transcript, budget)
             
-            # Action items
-            tasks.append(
-                self.create_summary(meeting_id, transcript, participants, duration, 'action_items')
-            )
+            if self.summary_mode == 'combined':
+                # One prefill of the transcript for all three sections
+                sections = await self._create_structured_summary(meeting_id, transcript, participants, duration)
+                if sections:
+                    sections.update({
+                        'meeting_id': meeting_id,
+                        'generated_at': datetime.now().isoformat(),
+                        'participants': participants,
+                        'duration_minutes': duration
+                    })
+                    logger.info(f"Comprehensive summary completed for meeting {meeting_id} (single pass)")
+                    return sections
+                logger.warning(f"Structured summary unusable for meeting {meeting_id}; falling back to split prompts")
             
-            # Wait for all summaries to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # One after another so the key points and action items prompts reuse the
+            # transcript prefix cached by the full summary prompt
+            results = []
+            for summary_type in ('full', 'key_points', 'action_items'):
+                results.append(
+                    await self.create_summary(meeting_id, transcript, participants, duration, summary_type)
+                )
             
             summary_data = {
-                'full_summary': results[0] if not isinstance(results[0], Exception) else "要約生成に失敗しました",
-                'key_points': results[1] if not isinstance(results[1], Exception) else "重要ポイントの抽出に失敗しました",
-                'action_items': results[2] if not isinstance(results[2], Exception) else "アクションアイテムの抽出に失敗しました",
+                'full_summary': results[0],
+                'key_points': results[1],
+                'action_items': results[2],
                 'meeting_id': meeting_id,
                 'generated_at': datetime.now().isoformat(),
                 'participants': participants,
@@ -284,13 +673,69 @@ class SummarizationService:
             logger.error(f"Failed to create comprehensive summary: {e}")
             raise
     
-    async def save_summary(self, meeting_id: str, summary_data: Dict[str, str]) -> str:
-        """Save summary to markdown file"""
+    async def _create_structured_summary(
+        self,
+        meeting_id: str,
+        transcript: str,
+        participants: List[str],
+        duration: int
+    ) -> Optional[Dict[str, str]]:
+        """Generate all summary sections in one JSON response; None if it fails validation"""
+        async def generate():
+            prompt = self._build_summary_prompt(meeting_id, transcript, participants, duration, 'comprehensive')
+            try:
+                response = await self._generate_with_ollama(prompt, format='json')
+            except Exception as e:
+                logger.warning(f"Structured summary generation failed: {e}")
+                return None, False
+            sections = self._parse_structured_summary(response)
+            return sections, sections is not None
+        
+        return await self._cached(
+            'comprehensive_json',
+            {'meeting_id': meeting_id, 'transcript': transcript, 'participants': participants, 'duration': duration},
+            generate
+        )
+    
+    def _parse_structured_summary(self, response: str) -> Optional[Dict[str, str]]:
+        """Validate the JSON sections and render them like the split-prompt outputs"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"meeting_{meeting_id}_{timestamp}.md"
-            file_path = os.path.join(self.output_dir, filename)
+            data = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            logger.warning("Structured summary is not valid JSON")
+            return None
+        
+        if not isinstance(data, dict):
+            return None
+        
+        full_summary = data.get('full_summary')
+        if not isinstance(full_summary, str) or not full_summary.strip():
+            logger.warning("Structured summary has no full_summary")
+            return None
+        
+        sections = {'full_summary': full_summary.strip()}
+        for key, bullet, empty in (
+            ('key_points', '•', None),
+            ('action_items', '□', 'アクションアイテムはありません'),
+        ):
+            value = data.get(key)
+            if isinstance(value, str):
+                value = [line for line in value.splitlines() if line.strip()]
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                logger.warning(f"Structured summary has invalid {key}")
+                return None
+            if not value and empty is None:
+                logger.warning(f"Structured summary has no {key}")
+                return None
             
+            items = [item.strip().lstrip('•□-* ').strip() for item in value]
+            sections[key] = '\n'.join(f"{bullet} {item}" for item in items if item) or empty
+        
+        return sections
+    
+    async def save_summary(self, meeting_id: str, summary_data: Dict[str, str], summary_type: str = 'full') -> str:
+        """Save summary to a markdown file in the meeting's directory"""
+        try:
             # Create markdown content
             if isinstance(summary_data, dict):
                 markdown_content = self._format_comprehensive_markdown(summary_data)
@@ -298,9 +743,7 @@ class SummarizationService:
                 # Simple string summary
                 markdown_content = f"# 会議議事録\n\n**会議ID**: {meeting_id}\n**生成日時**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n{summary_data}"
             
-            # Save to file
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(markdown_content)
+            file_path = await self.store.write(meeting_id, summary_type, markdown_content)
             
             logger.info(f"Summary saved to: {file_path}")
             return file_path
@@ -353,100 +796,196 @@ class SummarizationService:
         try:
             logger.info(f"Creating hierarchical summary for {len(chunk_transcripts)} chunks")
             
-            # Phase 1: Summarize each chunk individually
-            chunk_summaries = []
-            for i, chunk in enumerate(chunk_transcripts):
-                logger.info(f"Summarizing chunk {i+1}/{len(chunk_transcripts)}")
+            async def generate():
+                # Phase 1 (map): summarize chunks in parallel, as many at once as Ollama has slots
+                chunk_budget = self.context_tokens - self.output_tokens - self.templates['hierarchical_chunk'].static_tokens
                 
-                chunk_prompt = f"""
-以下は会議の一部（{i*30}分〜{(i+1)*30}分）の文字起こしです。
-この部分の要点を200文字程度で要約してください。
-
-【文字起こし】
-{chunk['text']}
-
-【要約】
-"""
-                chunk_summary = await self._generate_with_ollama(chunk_prompt)
-                chunk_summaries.append({
-                    'chunk_index': i,
-                    'time_range': f"{i*30}分〜{(i+1)*30}分",
-                    'summary': chunk_summary.strip()
-                })
+                async def summarize_chunk(i: int, chunk: Dict[str, str]) -> Dict[str, str]:
+                    time_range = f"{i*30}分〜{(i+1)*30}分"
+                    logger.info(f"Summarizing chunk {i+1}/{len(chunk_transcripts)}")
+                    transcript = await self._fit_transcript(meeting_id, chunk['text'], chunk_budget, task='hierarchical_chunk')
+                    chunk_prompt = self.templates['hierarchical_chunk'].render(
+                        time_range=time_range,
+                        transcript=transcript
+                    )
+                    chunk_summary = await self._generate_step(
+                        meeting_id, 0, chunk_prompt, f"Chunk {i+1}/{len(chunk_transcripts)}", 'hierarchical_chunk'
+                    )
+                    return {
+                        'chunk_index': i,
+                        'time_range': time_range,
+                        'summary': chunk_summary.strip()
+                    }
                 
-                # Small delay to avoid overwhelming Ollama
-                await asyncio.sleep(1)
-            
-            # Phase 2: Create final summary from chunk summaries
-            combined_summaries = "\n\n".join([
-                f"【{cs['time_range']}】\n{cs['summary']}" 
-                for cs in chunk_summaries
-            ])
-            
-            final_prompt = f"""
-以下は{total_duration}分間の会議の各30分ごとの要約です。
-これらを統合して、会議全体の議事録を作成してください。
-
-【会議情報】
-- 会議ID: {meeting_id}
-- 参加者: {', '.join(participants)}
-- 総時間: {total_duration}分
-
-【各時間帯の要約】
-{combined_summaries}
-
-【出力形式】
-# 会議議事録
-
-## 📋 会議概要
-- **日時**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
-- **時間**: {total_duration}分
-- **参加者**: {len(participants)}名
-
-## 📝 会議の流れ
-（時系列での主要トピックを記載）
-
-## ⭐ 主な議題・決定事項
-（重要な決定事項を箇条書きで）
-
-## ✅ 今後のアクション
-（必要なアクションアイテムを記載）
-
-## 📌 補足事項
-（その他の重要事項があれば記載）
-"""
+                chunk_summaries = await self._map_bounded(chunk_transcripts, summarize_chunk)
+                
+                # Phase 2 (reduce): merge neighbouring summaries until the final prompt fits
+                budget = self.context_tokens - self.output_tokens - self.token_estimator.estimate(
+                    self._hierarchical_final_prompt(meeting_id, participants, total_duration, '')
+                )
+                sections = await self._tree_reduce(meeting_id, chunk_summaries, budget, max_sections=self.reduce_fanin)
+                combined_summaries = join_sections(sections)
+                
+                final_prompt = self._hierarchical_final_prompt(meeting_id, participants, total_duration, combined_summaries)
+                final_summary = await self._generate_with_ollama(final_prompt, task='hierarchical_summary')
+                self.clear_summary_steps(meeting_id)
+                
+                result = {'full_summary': final_summary, 'chunk_summaries': chunk_summaries}
+                return result, not final_summary.endswith(self.partial_notice)
             
-            final_summary = await self._generate_with_ollama(final_prompt)
+            template_id = self.HIERARCHICAL_TEMPLATES
+            result = await self._cached(
+                template_id,
+                {
+                    'meeting_id': meeting_id,
+                    'chunks': [chunk['text'] for chunk in chunk_transcripts],
+                    'participants': participants,
+                    'duration': total_duration
+                },
+                generate,
+                task='hierarchical_summary'
+            )
             
             # Return comprehensive result
             return {
-                'full_summary': final_summary,
-                'chunk_summaries': chunk_summaries,
+                'full_summary': result['full_summary'],
+                'chunk_summaries': result['chunk_summaries'],
                 'meeting_id': meeting_id,
                 'generated_at': datetime.now().isoformat(),
                 'participants': participants,
                 'duration_minutes': total_duration,
-                'chunk_count': len(chunk_transcripts)
+                'chunk_count': len(chunk_transcripts),
+                'template_id': template_id,
+                'template_version': self.templates.version(template_id)
             }
             
         except Exception as e:
             logger.error(f"Failed to create hierarchical summary: {e}")
             raise
     
+    def _hierarchical_final_prompt(
+        self,
+        meeting_id: str,
+        participants: List[str],
+        total_duration: int,
+        combined_summaries: str
+    ) -> str:
+        """Final prompt of the hierarchical summary"""
+        return self.templates['hierarchical_final'].render(
+            meeting_id=meeting_id,
+            participants=', '.join(participants),
+            total_duration=total_duration,
+            combined_summaries=combined_summaries,
+            date=datetime.now().strftime('%Y-%m-%d %H:%M'),
+            participant_count=len(participants)
+        )
+            
+    async def _tree_reduce(
+        self,
+        meeting_id: str,
+        sections: List[Dict[str, str]],
+        budget: int,
+        max_sections: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Merge groups of reduce_fanin neighbouring summaries, level by level
+            
+        Recurses until the sections fit the final prompt's budget (and number at most
+        max_sections). Every merge is persisted as a SummaryStep, so a run that crashed
+        mid-reduce picks up the finished groups instead of regenerating them.
+        """
+        level = 0
+            
+        while len(sections) > 1:
+            combined_tokens = sum(self.token_estimator.estimate(cs['summary']) for cs in sections)
+            if combined_tokens <= budget and (max_sections is None or len(sections) <= max_sections):
+                break
+            
+            level += 1
+            groups = [sections[i:i + self.reduce_fanin] for i in range(0, len(sections), self.reduce_fanin)]
+            logger.info(f"Reduce level {level}: merging {len(sections)} summaries into {len(groups)}")
+            
+            async def merge_group(index: int, group: List[Dict[str, str]]) -> Dict[str, str]:
+                time_range = f"{group[0]['time_range'].split('〜')[0]}〜{group[-1]['time_range'].split('〜')[-1]}"
+                if len(group) == 1:
+                    return {**group[0], 'time_range': time_range}
+                
+                prompt = self.templates['hierarchical_reduce'].render(
+                    time_range=time_range,
+                    summaries=join_sections(group)
+                )
+                merged = await self._generate_step(meeting_id, level, prompt, f"Reduce level {level} group {index + 1}", 'reduce')
+                return {'chunk_index': index, 'time_range': time_range, 'summary': merged.strip()}
+            
+            sections = await self._map_bounded(groups, merge_group)
+        
+        return sections
+    
+    async def _generate_step(self, meeting_id: str, level: int, prompt: str, label: str, task: str) -> str:
+        """Generate one map/reduce step, reusing its persisted result from an earlier run"""
+        input_hash = hashlib.sha256(f"{self.model_id(task)}\0{prompt}".encode('utf-8')).hexdigest()
+        
+        db = SessionLocal()
+        try:
+            step = db.query(SummaryStep).filter(SummaryStep.input_hash == input_hash).first()
+            if step:
+                logger.info(f"{label}: resumed from saved step")
+                return step.output_text
+        finally:
+            db.close()
+        
+        output = await self._generate_with_retries(prompt, label, task)
+        if output.endswith(self.partial_notice):
+            # Timed out: do not make a truncated result permanent
+            return output
+        
+        db = SessionLocal()
+        try:
+            db.add(SummaryStep(meeting_id=meeting_id, input_hash=input_hash, level=level, output_text=output))
+            db.commit()
+        except IntegrityError:
+            # Another worker finished the same step first
+            db.rollback()
+        finally:
+            db.close()
+        return output
+    
+    def clear_summary_steps(self, meeting_id: str):
+        """Drop a meeting's intermediate results once its summary is complete"""
+        db = SessionLocal()
+        try:
+            db.query(SummaryStep).filter(SummaryStep.meeting_id == meeting_id).delete()
+            db.commit()
+        finally:
+            db.close()
+    
+    async def _map_bounded(self, items: list, func) -> list:
+        """Run func(index, item) for every item, num_parallel at a time; results keep input order"""
+        semaphore = asyncio.Semaphore(self.num_parallel)
+        
+        async def run(index, item):
+            async with semaphore:
+                return await func(index, item)
+        
+        return await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+    
+    async def _generate_with_retries(self, prompt: str, label: str, task: str) -> str:
+        """Generate, retrying failures with exponential backoff (map/reduce steps)"""
+        for attempt in range(self.map_retries + 1):
+            try:
+                return await self._generate_with_ollama(prompt, task=task)
+            except Exception as e:
+                if attempt == self.map_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"{label} failed ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+    
     async def cleanup_old_summaries(self, days: int = 30):
         """Clean up old summary files"""
         try:
-            current_time = datetime.now()
-            cutoff_time = current_time.timestamp() - (days * 24 * 60 * 60)
-            
-            for filename in os.listdir(self.output_dir):
-                if filename.endswith('.md'):
-                    file_path = os.path.join(self.output_dir, filename)
-                    file_stat = os.stat(file_path)
-                    
-                    if file_stat.st_mtime < cutoff_time:
-                        os.remove(file_path)
-                        logger.info(f"Cleaned up old summary: {filename}")
+            removed = await asyncio.to_thread(self.store.cleanup, days)
+            if removed:
+                logger.info(f"Cleaned up {removed} old summaries")
                         
         except Exception as e:
             logger.error(f"Summary cleanup failed: {e}")
@@ -495,34 +1034,48 @@ class SummarizationService:
             start_minutes = chunk_index * 30
             end_minutes = (chunk_index + 1) * 30
             time_range = f"{start_minutes}分〜{end_minutes}分"
+            # The raw text is stored with the chunk; prompts get the compressed one
+            compressed_text = await asyncio.to_thread(self.compressor.compress, transcript_text)
             
-            # Generate chunk summary
-            summary_template = self.templates['chunk_summary']
-            summary_prompt = summary_template.format(
-                time_range=time_range,
-                participants=', '.join(participants),
-                transcript=transcript_text
-            )
-            
-            # Generate key points
-            key_points_template = self.templates['chunk_key_points']
-            key_points_prompt = key_points_template.format(
-                time_range=time_range,
-                transcript=transcript_text
-            )
-            
-            # Generate both in parallel
-            summary_task = self._generate_with_ollama(summary_prompt)
-            key_points_task = self._generate_with_ollama(key_points_prompt)
+            async def generate():
+                # A 30 minute chunk of dense conversation can exceed the context on its own
+                chunk_budget = self.context_tokens - self.output_tokens - self.templates['chunk_summary'].estimate_tokens(
+                    time_range=time_range, participants=', '.join(participants)
+                )
+                prompt_transcript = await self._fit_transcript(meeting_id, compressed_text, chunk_budget, task='chunk_summary')
+                
+                # Generate chunk summary
+                summary_template = self.templates['chunk_summary']
+                summary_prompt = summary_template.render(
+                    time_range=time_range,
+                    participants=', '.join(participants),
+                    transcript=prompt_transcript
+                )
+                
+                # Generate key points
+                key_points_template = self.templates['chunk_key_points']
+                key_points_prompt = key_points_template.render(
+                    time_range=time_range,
+                    transcript=prompt_transcript
+                )
+                
+                # Sequential: the key points prompt shares the transcript prefix cached by the summary prompt
+                summary_result, key_points_result = await self._generate_sequentially(
+                    [('chunk_summary', summary_prompt), ('chunk_key_points', key_points_prompt)]
+                )
+                
+                cacheable = not any(
+                    result.endswith(self.partial_notice) for result in (summary_result, key_points_result)
+                )
+                return {'summary_text': summary_result.strip(), 'key_points': key_points_result.strip()}, cacheable
             
-            summary_result, key_points_result = await asyncio.gather(
-                summary_task, key_points_task, return_exceptions=True
+            sections = await self._cached(
+                'chunk_summary+chunk_key_points',
+                {'time_range': time_range, 'transcript': compressed_text, 'participants': participants},
+                generate,
+                task='chunk_summary'
             )
             
-            # Handle results
-            summary_text = summary_result if not isinstance(summary_result, Exception) else "要約生成に失敗しました"
-            key_points_text = key_points_result if not isinstance(key_points_result, Exception) else "重要ポイントの抽出に失敗しました"
-            
             chunk_summary_data = {
                 'meeting_id': meeting_id,
                 'chunk_index': chunk_index,
@@ -530,8 +1083,8 @@ class SummarizationService:
                 'chunk_start_time': chunk_start_time.isoformat(),
                 'chunk_end_time': chunk_end_time.isoformat(),
                 'transcript_text': transcript_text,
-                'summary_text': summary_text.strip(),
-                'key_points': key_points_text.strip(),
+                'summary_text': sections['summary_text'],
+                'key_points': sections['key_points'],
                 'participants': participants,
                 'generated_at': datetime.now().isoformat()
             }
@@ -543,6 +1096,37 @@ class SummarizationService:
             logger.error(f"Failed to create chunk summary: {e}")
             raise
     
+    async def update_rolling_summary(
+        self,
+        meeting_id: str,
+        previous_summary: Optional[str],
+        delta_transcript: str
+    ) -> str:
+        """Fold new transcript segments into a meeting's running summary
+        
+        The prompt holds only the previous summary and the new segments, so the cost
+        of an update stays constant however long the meeting runs.
+        """
+        try:
+            previous_summary = previous_summary or "（まだありません）"
+            budget = self.context_tokens - self.output_tokens - self.templates['rolling_update'].estimate_tokens(
+                previous_summary=previous_summary
+            )
+            delta_transcript = await self._fit_transcript(meeting_id, delta_transcript, budget, task='rolling_summary')
+            
+            prompt = self.templates['rolling_update'].render(
+                previous_summary=previous_summary,
+                transcript=delta_transcript
+            )
+            summary = await self._generate_with_ollama(prompt, task='rolling_summary')
+            
+            logger.info(f"Rolling summary updated for meeting {meeting_id}")
+            return summary.strip()
+            
+        except Exception as e:
+            logger.error(f"Failed to update rolling summary: {e}")
+            raise
+    
     def format_chunk_summary_for_discord(self, chunk_data: Dict[str, str]) -> str:
         """Format chunk summary for Discord posting"""
         try:
@@ -570,65 +1154,49 @@ class SummarizationService:
         meeting_id: str,
         chunk_summaries: List[Dict],
         total_duration: int,
-        all_participants: List[str]
+        all_participants: List[str],
+        keep_steps: bool = False
     ) -> Dict[str, str]:
-        """Create final integrated summary from all chunk summaries"""
+        """Create final integrated summary from all chunk summaries
+        
+        keep_steps leaves the persisted reduce steps in place (speculative drafts), so
+        the run that follows reuses every group the late chunks do not touch.
+        """
         try:
             logger.info(f"Creating final integrated summary for meeting {meeting_id}")
             
-            # Combine all chunk summaries
-            combined_chunk_text = ""
-            for chunk in chunk_summaries:
-                time_range = chunk.get('time_range', f"チャンク{chunk.get('chunk_index', '?')}")
-                summary = chunk.get('summary_text', '')
-                key_points = chunk.get('key_points', '')
+            async def generate():
+                # Merge chunk summaries level by level until they fit one prompt
+                sections = self._chunk_sections(chunk_summaries)
+                budget = self.context_tokens - self.output_tokens - self.token_estimator.estimate(
+                    self._integrated_prompt(meeting_id, total_duration, all_participants, '')
+                )
+                sections = await self._tree_reduce(meeting_id, sections, budget)
                 
-                combined_chunk_text += f"""
-【{time_range}】
-要約: {summary}
-重要ポイント: {key_points}
-
-"""
-            
-            # Create integrated summary prompt
-            integrated_prompt = f"""
-以下は{total_duration}分間の会議の各時間帯の要約です。
-これらを統合して、会議全体の包括的な議事録を作成してください。
-
-【会議情報】
-- 会議ID: {meeting_id}
-- 総時間: {total_duration}分
-- 参加者: {', '.join(all_participants)}
-
-【各時間帯の要約】
-{combined_chunk_text}
-
-【出力形式】
-# 🎙️ 会議議事録（統合版）
-
-## 📋 会議概要
-- **日時**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
-- **総時間**: {total_duration}分
-- **参加者**: {len(all_participants)}名
-
-## 📝 会議全体の流れ
-（時系列での主要な話し合いの流れを記載）
-
-## ⭐ 主要な議題・決定事項
-（会議で決まった重要事項を箇条書きで）
-
-## ✅ アクションアイテム
-（今後必要なタスクや宿題を記載）
-
-## 📌 補足事項
-（その他の重要な情報があれば記載）
-
-## 🕐 時間帯別要約
-（各時間帯の詳細な内容）
-"""
+                combined_chunk_text = join_sections(sections)
+                integrated_prompt = self._integrated_prompt(meeting_id, total_duration, all_participants, combined_chunk_text)
+                
+                # Generate integrated summary
+                integrated_summary = await self._generate_with_ollama(integrated_prompt, task='integrated_summary')
+                if not keep_steps:
+                    self.clear_summary_steps(meeting_id)
+                return integrated_summary, not integrated_summary.endswith(self.partial_notice)
             
-            # Generate integrated summary
-            integrated_summary = await self._generate_with_ollama(integrated_prompt)
+            template_id = self.INTEGRATED_TEMPLATES
+            integrated_summary = await self._cached(
+                template_id,
+                {
+                    'meeting_id': meeting_id,
+                    'chunks': [
+                        [chunk.get('time_range'), chunk.get('summary_text'), chunk.get('key_points')]
+                        for chunk in chunk_summaries
+                    ],
+                    'participants': all_participants,
+                    'duration': total_duration
+                },
+                generate,
+                task='integrated_summary'
+            )
             
             # Save integrated summary
             summary_data = {
@@ -638,7 +1206,9 @@ class SummarizationService:
                 'participants': all_participants,
                 'duration_minutes': total_duration,
                 'chunk_count': len(chunk_summaries),
-                'summary_type': 'integrated'
+                'summary_type': 'integrated',
+                'template_id': template_id,
+                'template_version': self.templates.version(template_id)
             }
             
             logger.info(f"Final integrated summary completed for meeting {meeting_id}")
@@ -646,4 +1216,77 @@ class SummarizationService:
             
         except Exception as e:
             logger.error(f"Failed to create integrated summary: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _chunk_sections(self, chunk_summaries: List[Dict]) -> List[Dict[str, str]]:
+        """Chunk summaries as time-ranged sections of the integrated prompts"""
+        return [
+            {
+                'time_range': chunk.get('time_range', f"チャンク{chunk.get('chunk_index', '?')}"),
+                'summary': f"要約: {chunk.get('summary_text', '')}\n重要ポイント: {chunk.get('key_points', '')}"
+            }
+            for chunk in chunk_summaries
+        ]
+    
+    async def update_integrated_summary(
+        self,
+        meeting_id: str,
+        previous_summary: str,
+        new_chunks: List[Dict],
+        total_duration: int,
+        all_participants: List[str],
+        chunk_count: int
+    ) -> Optional[Dict[str, str]]:
+        """Fold late chunk summaries into a speculative final summary
+        
+        One generation over the draft and the new sections instead of reducing every
+        chunk again. Returns None when they do not fit one prompt; the caller then
+        builds the summary from scratch.
+        """
+        try:
+            template = self.templates['integrated_update']
+            values = {
+                'previous_summary': previous_summary,
+                'new_sections': join_sections(self._chunk_sections(new_chunks)),
+                'total_duration': total_duration,
+                'participants': ', '.join(all_participants)
+            }
+            if template.estimate_tokens(**values) > self.context_tokens - self.output_tokens:
+                logger.info(f"Late chunks of meeting {meeting_id} do not fit an update prompt")
+                return None
+            
+            logger.info(f"Updating speculative final summary of meeting {meeting_id} with {len(new_chunks)} late chunks")
+            summary = await self._generate_with_ollama(template.render(**values), task='integrated_summary')
+            
+            return {
+                'full_summary': summary,
+                'meeting_id': meeting_id,
+                'generated_at': datetime.now().isoformat(),
+                'participants': all_participants,
+                'duration_minutes': total_duration,
+                'chunk_count': chunk_count,
+                'summary_type': 'integrated',
+                'template_id': f"{self.INTEGRATED_TEMPLATES}+integrated_update",
+                'template_version': self.templates.version(f"{self.INTEGRATED_TEMPLATES}+integrated_update")
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to update integrated summary: {e}")
+            raise
+    
+    def _integrated_prompt(
+        self,
+        meeting_id: str,
+        total_duration: int,
+        all_participants: List[str],
+        combined_chunk_text: str
+    ) -> str:
+        """Final prompt of the integrated summary"""
+        return self.templates['integrated_summary'].render(
+            meeting_id=meeting_id,
+            total_duration=total_duration,
+            participants=', '.join(all_participants),
+            combined_chunk_text=combined_chunk_text,
+            date=datetime.now().strftime('%Y-%m-%d %H:%M'),
+            participant_count=len(all_participants)
+        )
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from .models import SessionLocal, SummaryCacheEntry
+
+logger = logging.getLogger(__name__)
+
+def content_hash(content: Any) -> str:
+    """Stable sha256 of JSON-serializable input"""
+    serialized = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """DB-backed memo of summary outputs
+    
+    Entries are keyed by (content hash, template id, template version, model,
+    generation options), so identical inputs never reach Ollama twice while any
+    change to the transcript, prompt, model or options misses. The least recently
+    used entries beyond SUMMARY_CACHE_MAX_ENTRIES and entries unused for
+    SUMMARY_CACHE_TTL_DAYS are evicted.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv('SUMMARY_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', 2000))
+        self.ttl = timedelta(days=int(os.getenv('SUMMARY_CACHE_TTL_DAYS', 30)))
+        self._puts_since_eviction = 0
+    
+    def make_key(self, template_id: str, template_version: str, model: str, options: dict, content: Any) -> dict:
+        """Key parts for get()/put()"""
+        parts = {
+            'template_id': template_id,
+            'template_version': template_version,
+            'model': model,
+            'options': options,
+            'content_hash': content_hash(content)
+        }
+        parts['cache_key'] = content_hash(parts)
+        return parts
+    
+    def get(self, key: dict) -> Optional[Any]:
+        """Cached output, or None"""
+        if not self.enabled:
+            return None
+        
+        db = SessionLocal()
+        try:
+            entry = db.query(SummaryCacheEntry).filter(SummaryCacheEntry.cache_key == key['cache_key']).first()
+            if not entry:
+                return None
+            if entry.last_used_at and datetime.utcnow() - entry.last_used_at > self.ttl:
+                db.delete(entry)
+                db.commit()
+                return None
+            
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_used_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Summary cache hit for {key['template_id']} ({key['content_hash'][:12]})")
+            return json.loads(entry.output)
+        except Exception as e:
+            logger.warning(f"Summary cache read failed: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    def put(self, key: dict, output: Any):
+        """Store an output (first writer wins if two workers race)"""
+        if not self.enabled:
+            return
+        
+        db = SessionLocal()
+        try:
+            db.add(SummaryCacheEntry(
+                cache_key=key['cache_key'],
+                template_id=key['template_id'],
+                template_version=key['template_version'],
+                model=key['model'],
+                content_hash=key['content_hash'],
+                output=json.dumps(output, ensure_ascii=False)
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        except Exception as e:
+            logger.warning(f"Summary cache write failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+        
+        self._puts_since_eviction += 1
+        if self._puts_since_eviction >= 50:
+            self.evict()
+    
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        self._puts_since_eviction = 0
+        db = SessionLocal()
+        try:
+            removed = db.query(SummaryCacheEntry).filter(
+                SummaryCacheEntry.last_used_at < datetime.utcnow() - self.ttl
+            ).delete(synchronize_session=False)
+            
+            excess = db.query(SummaryCacheEntry).count() - self.max_entries
+            if excess > 0:
+                stale_keys = [
+                    row.cache_key for row in db.query(SummaryCacheEntry.cache_key)
+                    .order_by(SummaryCacheEntry.last_used_at.asc())
+                    .limit(excess)
+                ]
+                removed += db.query(SummaryCacheEntry).filter(
+                    SummaryCacheEntry.cache_key.in_(stale_keys)
+                ).delete(synchronize_session=False)
+            
+            db.commit()
+            if removed:
+                logger.info(f"Evicted {removed} summary cache entries")
+            return removed
+        except Exception as e:
+            logger.warning(f"Summary cache eviction failed: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+    
+    def get_stats(self) -> dict:
+        """Entry and hit counts"""
+        db = SessionLocal()
+        try:
+            entries = db.query(SummaryCacheEntry).count()
+            hits = sum(row.hits or 0 for row in db.query(SummaryCacheEntry.hits))
+            return {'enabled': self.enabled, 'entries': entries, 'hits': hits, 'max_entries': self.max_entries}
+        finally:
+            db.close()
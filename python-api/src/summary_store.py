@@ -0,0 +1,142 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+
+logger = logging.getLogger(__name__)
+
+class SummaryStore:
+    """Content-addressed summary files, one directory per meeting
+    
+    A summary is written to <OUTPUT_DIR>/<meeting>/<summary_type>_<sha256[:16]>.md, so
+    the same text always lands in the same file and an existing file is never
+    rewritten. Files are written to a temporary name in the same directory and
+    renamed over the target, so a reader never sees a partial file.
+    
+    The Summary rows (file_path) index the files. Without a row, the latest summary
+    is the most recently written file of the meeting directory: there is no index
+    file that API and worker processes could overwrite for each other.
+    """
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+    
+    def meeting_dir(self, meeting_id: str) -> str:
+        name = re.sub(r'[^\w.-]', '_', meeting_id)
+        if name.strip('.') == '':
+            name = hashlib.sha256(meeting_id.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.output_dir, name)
+    
+    @staticmethod
+    async def _write_atomic(path: str, content: str):
+        """Write to a temporary file next to path, then rename it over path"""
+        temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+        try:
+            async with aiofiles.open(temp_path, 'w', encoding='utf-8') as f:
+                await f.write(content)
+                await f.flush()
+                await asyncio.to_thread(os.fsync, f.fileno())
+            await aiofiles.os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    async def write(self, meeting_id: str, summary_type: str, content: str) -> str:
+        """Store a summary and make it the meeting's latest; returns its path"""
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        directory = self.meeting_dir(meeting_id)
+        safe_type = re.sub(r'[^\w-]', '_', summary_type)
+        path = os.path.join(directory, f"{safe_type}_{digest[:16]}.md")
+        
+        await aiofiles.os.makedirs(directory, exist_ok=True)
+        try:
+            # Same text as a stored summary: keep the file, but date it as the latest
+            await asyncio.to_thread(os.utime, path)
+        except FileNotFoundError:
+            await self._write_atomic(path, content)
+        return path
+    
+    async def latest(self, meeting_id: str, summary_types: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Path of the newest summary (of the first of summary_types that has one), or None"""
+        return await asyncio.to_thread(self._latest, self.meeting_dir(meeting_id), summary_types)
+    
+    @staticmethod
+    def _latest(directory: str, summary_types: Optional[Iterable[str]]) -> Optional[str]:
+        newest: Dict[str, Tuple[float, str]] = {}
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return None
+        
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.name.endswith('.md'):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            summary_type = entry.name.rsplit('_', 1)[0]
+            for key in (summary_type, None):
+                if key not in newest or mtime > newest[key][0]:
+                    newest[key] = (mtime, entry.path)
+        
+        for summary_type in (summary_types if summary_types is not None else [None]):
+            safe_type = None if summary_type is None else re.sub(r'[^\w-]', '_', summary_type)
+            if safe_type in newest:
+                return newest[safe_type][1]
+        return None
+    
+    def migrate_legacy_files(self) -> int:
+        """Move meeting_<id>_<timestamp>.md files of the flat layout into their meeting directories"""
+        moved = 0
+        try:
+            entries = list(os.scandir(self.output_dir))
+        except FileNotFoundError:
+            return 0
+        
+        for entry in sorted((e for e in entries if e.is_file()), key=lambda e: e.stat().st_mtime):
+            match = self.LEGACY_PATTERN.match(entry.name)
+            if not match:
+                continue
+            meeting_id = match.group(1)
+            directory = self.meeting_dir(meeting_id)
+            try:
+                with open(entry.path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                os.makedirs(directory, exist_ok=True)
+                os.replace(entry.path, os.path.join(directory, f"full_{digest[:16]}.md"))
+                moved += 1
+            except OSError as e:
+                logger.warning(f"Could not migrate summary {entry.name}: {e}")
+        
+        if moved:
+            logger.info(f"Moved {moved} summaries into per-meeting directories")
+        return moved
+    
+    def cleanup(self, days: int) -> int:
+        """Remove summary files older than days, and meeting directories left empty"""
+        cutoff_time = time.time() - days * 24 * 60 * 60
+        removed = 0
+        for directory in os.scandir(self.output_dir):
+            if not directory.is_dir():
+                continue
+            remaining = 0
+            for entry in os.scandir(directory.path):
+                if entry.stat().st_mtime < cutoff_time:
+                    os.remove(entry.path)
+                    removed += 1
+                else:
+                    remaining += 1
+            if remaining == 0:
+                os.rmdir(directory.path)
+        return removed
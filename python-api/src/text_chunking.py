@@ -0,0 +1,110 @@
+import os
+import re
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Calibrated against gemma2 on Japanese meeting transcripts: kana/kanji average
+# about one token per character, ASCII words about four characters per token.
+CJK_TOKENS_PER_CHAR = float(os.getenv('CJK_TOKENS_PER_CHAR', 1.0))
+OTHER_CHARS_PER_TOKEN = float(os.getenv('OTHER_CHARS_PER_TOKEN', 4.0))
+
+_CJK_PATTERN = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+_SENTENCE_END = re.compile(r'(?<=[。！？!?\.])')
+
+class TokenEstimator:
+    """Character-based token estimate for prompts, corrected by observed counts
+    
+    Ollama reports prompt_eval_count for every generation; feeding it back through
+    calibrate() keeps the estimate close to the model's real tokenizer.
+    """
+    
+    def __init__(self):
+        self.correction = 1.0
+    
+    def raw_estimate(self, text: str) -> float:
+        cjk_chars = len(_CJK_PATTERN.findall(text))
+        other_chars = len(text) - cjk_chars
+        return cjk_chars * CJK_TOKENS_PER_CHAR + other_chars / OTHER_CHARS_PER_TOKEN
+    
+    def estimate(self, text: str) -> int:
+        """Estimated token count of text"""
+        return int(self.raw_estimate(text) * self.correction) + 1
+    
+    def calibrate(self, text: str, actual_tokens: int):
+        """Move the correction factor towards an observed token count"""
+        raw = self.raw_estimate(text)
+        if raw < 50 or not actual_tokens:
+            return
+        ratio = actual_tokens / raw
+        if not 0.5 <= ratio <= 2.0:
+            # Prompt cache hits report only the uncached suffix
+            return
+        # Exponential moving average so a single odd prompt does not dominate
+        self.correction = 0.8 * self.correction + 0.2 * ratio
+
+def split_speaker_turns(transcript: str) -> List[str]:
+    """Split a transcript into speaker turns
+    
+    A turn starts at a line beginning with "[" ("[HH:MM:SS] name:" or
+    "[name]: text"); following lines belong to the same turn.
+    """
+    turns = []
+    current = []
+    for line in transcript.splitlines():
+        if line.startswith('[') and current:
+            turns.append('\n'.join(current))
+            current = []
+        if line.strip() or current:
+            current.append(line)
+    if current:
+        turns.append('\n'.join(current))
+    return [turn.strip('\n') for turn in turns if turn.strip()]
+
+def _split_oversized(text: str, max_tokens: int, estimator: TokenEstimator) -> List[str]:
+    """Split a single turn that exceeds the budget at sentence ends (hard cut as last resort)"""
+    pieces = []
+    current = ''
+    for sentence in _SENTENCE_END.split(text):
+        if not sentence:
+            continue
+        if current and estimator.estimate(current + sentence) > max_tokens:
+            pieces.append(current)
+            current = ''
+        while estimator.estimate(sentence) > max_tokens:
+            # Proportional cut of a sentence without punctuation
+            cut = max(1, int(len(sentence) * max_tokens / estimator.estimate(sentence)))
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        current += sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_transcript(transcript: str, max_tokens: int, estimator: TokenEstimator) -> List[str]:
+    """Pack speaker turns into chunks of at most max_tokens (estimated)"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for turn in split_speaker_turns(transcript):
+        turn_tokens = estimator.estimate(turn)
+        if turn_tokens > max_tokens:
+            pieces = _split_oversized(turn, max_tokens, estimator)
+        else:
+            pieces = [turn]
+        
+        for piece in pieces:
+            piece_tokens = estimator.estimate(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append('\n'.join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    
+    if current:
+        chunks.append('\n'.join(current))
+    
+    logger.debug(f"Split transcript into {len(chunks)} chunks of <= {max_tokens} tokens")
+    return chunks
@@ -0,0 +1,163 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+from typing import List, Tuple
+
+from .text_chunking import split_speaker_turns
+
+logger = logging.getLogger(__name__)
+
+# Hesitations Whisper writes out. Words that are also demonstratives or adverbs
+# (あの, その, まあ, なんか) only count as fillers when a pause follows them; answers
+# such as ええ and うん ("yes") are never removed.
+_FILLERS = re.compile(
+    r'(?:えー+と?|えっと|ええと|あー+|うー+ん|んー+|あのー+|そのー+|まあー+'
+    r'|(?:あの|その|まあ|なんか)(?=[、,\s])'
+    r'|\b(?:um+|uh+|erm)\b)[、,\s]*',
+    re.IGNORECASE
+)
+# Whisper loops: the same short phrase three or more times in a row. The phrase may not
+# contain digits, so 1000000 or 2020-02-02 are never read as a repeated unit.
+_LOOPS = re.compile(r'([^\d]{2,20}?)(?:[、,\s]*\1){2,}')
+_SENTENCE_END = re.compile(r'(?<=[。！？!?])')
+# Sentences carrying decisions, owners and deadlines survive compression first
+_KEEP = re.compile(r'決定|決め|決ま|担当|期限|締め切り|までに|お願いします|やります|タスク|宿題|TODO|次回|\d')
+_TURN_HEADER = re.compile(r'^(\[[^\]\n]*\][^:\n]*:)[ \t]*(.*)$', re.DOTALL)
+
+def remove_fillers(text: str) -> str:
+    """Drop hesitation words and collapse Whisper repetition loops"""
+    text = _LOOPS.sub(r'\1', text)
+    text = _FILLERS.sub('', text)
+    return re.sub(r'[ \t]{2,}', ' ', text)
+
+def _bigrams(sentence: str) -> Counter:
+    # Character bigrams: works for Japanese without a morphological analyzer
+    chars = re.sub(r'\s+', '', sentence)
+    return Counter(chars[i:i + 2] for i in range(len(chars) - 1))
+
+class TranscriptCompressor:
+    """CPU-only extractive compression of a transcript before it goes to the LLM
+    
+    Fillers and repetition loops are removed, near-duplicate sentences (character
+    bigram Jaccard >= COMPRESSION_DUPLICATE_THRESHOLD) are collapsed, and when the
+    text is longer than COMPRESSION_MIN_CHARS the highest-ranked sentences are kept
+    up to COMPRESSION_RATIO of the original length. Ranking is TextRank over TF-IDF
+    bigram vectors, restricted to neighbouring sentences so it stays linear. Speaker
+    headers and the original order are preserved.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+        self.ratio = float(os.getenv('COMPRESSION_RATIO', 0.7))
+        self.min_chars = int(os.getenv('COMPRESSION_MIN_CHARS', 2000))
+        self.duplicate_threshold = float(os.getenv('COMPRESSION_DUPLICATE_THRESHOLD', 0.8))
+        self.window = 10
+        self.stats = {'calls': 0, 'chars_in': 0, 'chars_out': 0}
+    
+    def _split(self, transcript: str) -> List[Tuple[str, List[str]]]:
+        """Speaker turns as (header, sentences)"""
+        turns = []
+        for turn in split_speaker_turns(transcript):
+            match = _TURN_HEADER.match(turn)
+            header, body = (match.group(1), match.group(2)) if match else ('', turn)
+            sentences = [s.strip() for s in _SENTENCE_END.split(remove_fillers(body)) if s.strip()]
+            turns.append((header, sentences))
+        return turns
+    
+    def _drop_duplicates(self, turns: List[Tuple[str, List[str]]]) -> List[Tuple[str, List[str]]]:
+        recent = []
+        result = []
+        for header, sentences in turns:
+            kept = []
+            for sentence in sentences:
+                grams = set(_bigrams(sentence))
+                duplicate = grams and any(
+                    len(grams & other) / len(grams | other) >= self.duplicate_threshold for other in recent
+                )
+                if duplicate:
+                    continue
+                kept.append(sentence)
+                recent.append(grams)
+                if len(recent) > 50:
+                    recent.pop(0)
+            result.append((header, kept))
+        return result
+    
+    def _rank(self, sentences: List[str]) -> List[float]:
+        """Windowed TextRank score of every sentence"""
+        counts = [_bigrams(sentence) for sentence in sentences]
+        document_frequency = Counter(gram for count in counts for gram in count)
+        total = len(sentences)
+        vectors = []
+        for count in counts:
+            vector = {gram: tf * math.log(1 + total / document_frequency[gram]) for gram, tf in count.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            vectors.append({gram: weight / norm for gram, weight in vector.items()})
+        
+        edges = [[] for _ in range(total)]
+        for i in range(total):
+            for j in range(i + 1, min(total, i + 1 + self.window)):
+                small, large = sorted((vectors[i], vectors[j]), key=len)
+                weight = sum(value * large.get(gram, 0.0) for gram, value in small.items())
+                if weight > 0:
+                    edges[i].append((j, weight))
+                    edges[j].append((i, weight))
+        
+        out_weight = [sum(weight for _, weight in edge) or 1.0 for edge in edges]
+        scores = [1.0] * total
+        for _ in range(20):
+            scores = [
+                0.15 + 0.85 * sum(scores[j] * weight / out_weight[j] for j, weight in edges[i])
+                for i in range(total)
+            ]
+        
+        return [
+            score * (2.0 if _KEEP.search(sentence) else 1.0)
+            for score, sentence in zip(scores, sentences)
+        ]
+    
+    def compress(self, transcript: str) -> str:
+        """Compressed transcript (unchanged when disabled)"""
+        if not self.enabled or not transcript:
+            return transcript
+        
+        turns = self._drop_duplicates(self._split(transcript))
+        flat = [(t, s) for t, (_, sentences) in enumerate(turns) for s in range(len(sentences))]
+        keep = set(flat)
+        
+        length = sum(len(turns[t][1][s]) for t, s in flat)
+        if length > self.min_chars and self.ratio < 1.0:
+            scores = self._rank([turns[t][1][s] for t, s in flat])
+            budget = len(transcript) * self.ratio
+            keep = set()
+            used = 0
+            for index in sorted(range(len(flat)), key=lambda i: -scores[i]):
+                t, s = flat[index]
+                if used + len(turns[t][1][s]) > budget:
+                    continue
+                keep.add((t, s))
+                used += len(turns[t][1][s])
+        
+        lines = []
+        for t, (header, sentences) in enumerate(turns):
+            kept = ''.join(sentence for s, sentence in enumerate(sentences) if (t, s) in keep)
+            if kept:
+                lines.append(f"{header} {kept}" if header else kept)
+        compressed = '\n'.join(lines)
+        
+        self.stats['calls'] += 1
+        self.stats['chars_in'] += len(transcript)
+        self.stats['chars_out'] += len(compressed)
+        logger.info(f"Compressed transcript {len(transcript)} -> {len(compressed)} chars")
+        return compressed
+    
+    def get_stats(self) -> dict:
+        chars_in = self.stats['chars_in']
+        return {
+            'enabled': self.enabled,
+            'ratio': self.ratio,
+            **self.stats,
+            'saved_fraction': round(1 - self.stats['chars_out'] / chars_in, 3) if chars_in else 0.0
+        }
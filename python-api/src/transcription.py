@@ -7,19 +7,134 @@ from typing import Optional
 import logging
 import asyncio
 from pydub import AudioSegment
+import numpy as np
 import hashlib
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Discord voice PCM format: 48kHz, 16-bit, mono
+PCM_SAMPLE_RATE = 48000
+PCM_SAMPLE_WIDTH = 2
+PCM_CHANNELS = 1
+
+class PcmStreamSession:
+    """Pipelined transcription of a raw PCM upload consumed as a stream"""
+    
+    def __init__(self, service, meeting_id: Optional[str], speaker_id: Optional[str],
+                 timestamp: Optional[str], window_seconds: int):
+        self.service = service
+        self.meeting_id = meeting_id
+        self.speaker_id = speaker_id
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.window_bytes = window_seconds * PCM_SAMPLE_RATE * PCM_SAMPLE_WIDTH * PCM_CHANNELS
+        self.window_seconds = window_seconds
+        self.total_bytes = 0
+        self._buffer = bytearray()
+        self._windows = asyncio.Queue()
+        self._window_count = 0
+        self._decoder = asyncio.create_task(self._decode_windows())
+    
+    async def feed(self, data: bytes):
+        """Append received bytes and hand every complete window to the decoder"""
+        if not data:
+            return
+        self.total_bytes += len(data)
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.window_bytes:
+            window = bytes(self._buffer[:self.window_bytes])
+            del self._buffer[:self.window_bytes]
+            await self._enqueue_window(window)
+    
+    async def close_input(self):
+        """Flush the trailing partial window and signal end of stream"""
+        # Drop a dangling odd byte so the sample buffer stays aligned
+        remainder = len(self._buffer) - (len(self._buffer) % PCM_SAMPLE_WIDTH)
+        if remainder > 0:
+            await self._enqueue_window(bytes(self._buffer[:remainder]))
+        self._buffer.clear()
+        await self._windows.put(None)
+    
+    async def cancel(self):
+        """Abort decoding (e.g. when the upload is rejected)"""
+        self._decoder.cancel()
+        try:
+            await self._decoder
+        except (asyncio.CancelledError, Exception):
+            pass
+    
+    async def result(self) -> dict:
+        """Wait for all windows to be decoded and return the merged transcript"""
+        return await self._decoder
+    
+    def add_done_callback(self, callback):
+        """Call callback() once decoding has ended: finished, failed or cancelled"""
+        self._decoder.add_done_callback(lambda _: callback())
+    
+    async def _enqueue_window(self, window: bytes):
+        await self._windows.put((self._window_count, window))
+        self._window_count += 1
+    
+    async def _decode_windows(self) -> dict:
+        texts = []
+        segments = []
+        word_probabilities = []
+        language = self.service.language
+        
+        while True:
+            item = await self._windows.get()
+            if item is None:
+                break
+            
+            index, window = item
+            offset = index * self.window_seconds
+            result = await self.service.transcribe_pcm_window(window)
+            logger.info(f"Decoded stream window {index} for {self.meeting_id} ({len(window)} bytes)")
+            
+            text = result.get("text", "").strip()
+            if text:
+                texts.append(text)
+            language = result.get("language", language)
+            
+            for segment in result.get("segments", []):
+                segment = dict(segment)
+                segment["start"] = segment.get("start", 0.0) + offset
+                segment["end"] = segment.get("end", 0.0) + offset
+                segments.append(segment)
+                for word in segment.get("words", []):
+                    if "probability" in word:
+                        word_probabilities.append(word["probability"])
+        
+        duration = self.total_bytes / (PCM_SAMPLE_RATE * PCM_SAMPLE_WIDTH * PCM_CHANNELS)
+        
+        return {
+            "meeting_id": self.meeting_id,
+            "speaker_id": self.speaker_id,
+            "timestamp": self.timestamp,
+            "text": " ".join(texts),
+            "language": language,
+            "confidence": sum(word_probabilities) / len(word_probabilities) if word_probabilities else 0.0,
+            "segments": segments,
+            "duration": duration,
+            "windows": self._window_count,
+            "processing_time": datetime.now().isoformat()
+        }
+
 class TranscriptionService:
     """Service for audio transcription using OpenAI Whisper"""
     
     def __init__(self):
         self.model = None
+        self._model_lock = None
         self.model_name = os.getenv('WHISPER_MODEL', 'base')
         self.language = os.getenv('WHISPER_LANGUAGE', 'ja')
         self.device = os.getenv('WHISPER_DEVICE', 'cpu')
         self.temp_dir = os.getenv('TEMP_DIR', './temp')
+        self.stream_window_seconds = int(os.getenv('STREAM_WINDOW_SECONDS', 30))
+        # Whisper decodes of transcription jobs and stream windows together; the job queue
+        # runs as many transcription jobs per process
+        self.max_concurrent_decodes = int(os.getenv('MAX_CONCURRENT_TRANSCRIPTIONS', 3))
+        self._decode_slots = None
         self._ensure_temp_dir()
     
     def _ensure_temp_dir(self):
@@ -27,21 +142,36 @@ class TranscriptionService:
         os.makedirs(self.temp_dir, exist_ok=True)
     
     async def initialize(self):
-        """Initialize Whisper model"""
-        try:
-            logger.info(f"Loading Whisper model: {self.model_name}")
-            # Load model in a thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            self.model = await loop.run_in_executor(
-                None, 
-                whisper.load_model, 
-                self.model_name, 
-                self.device
-            )
-            logger.info("Whisper model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load Whisper model: {e}")
-            raise
+        """Initialize Whisper model (once per process, however often it is called)"""
+        if self.model is not None:
+            return
+        
+        if self._model_lock is None:
+            self._model_lock = asyncio.Lock()
+        
+        async with self._model_lock:
+            if self.model is not None:
+                return
+            try:
+                logger.info(f"Loading Whisper model: {self.model_name} (pid {os.getpid()})")
+                # Load model in a thread to avoid blocking
+                loop = asyncio.get_event_loop()
+                self.model = await loop.run_in_executor(
+                    None, 
+                    whisper.load_model, 
+                    self.model_name, 
+                    self.device
+                )
+                logger.info("Whisper model loaded successfully")
+            except Exception as e:
+                logger.error(f"Failed to load Whisper model: {e}")
+                raise
+    
+    def _decode_slot(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent Whisper decodes in this process"""
+        if self._decode_slots is None:
+            self._decode_slots = asyncio.Semaphore(self.max_concurrent_decodes)
+        return self._decode_slots
     
     def is_ready(self) -> bool:
         """Check if transcription service is ready"""
@@ -68,6 +198,32 @@ class TranscriptionService:
             logger.error(f"Failed to save temp file: {e}")
             raise
     
+    def temp_path(self, filename: str) -> str:
+        """Unique path for an upload in the temp directory"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.temp_dir, f"{timestamp}_{uuid.uuid4().hex[:8]}_{os.path.basename(filename)}")
+    
+    async def save_temp_stream(self, byte_stream, filename: str, max_size: Optional[int] = None) -> str:
+        """Save a streamed request body to the temp directory"""
+        file_path = self.temp_path(filename)
+        
+        try:
+            size = 0
+            async with aiofiles.open(file_path, 'wb') as f:
+                async for data in byte_stream:
+                    size += len(data)
+                    if max_size is not None and size > max_size:
+                        raise ValueError("File too large")
+                    await f.write(data)
+            
+            logger.info(f"Saved streamed temp file: {file_path} ({size} bytes)")
+            return file_path
+            
+        except Exception as e:
+            logger.error(f"Failed to save streamed temp file: {e}")
+            await self._cleanup_files([file_path])
+            raise
+    
     async def optimize_audio(self, input_path: str) -> str:
         """Optimize audio for Whisper processing"""
         try:
@@ -114,23 +270,30 @@ class TranscriptionService:
         file_path: str, 
         meeting_id: Optional[str] = None,
         speaker_id: Optional[str] = None,
-        timestamp: Optional[str] = None
+        timestamp: Optional[str] = None,
+        keep_input: bool = False
     ) -> dict:
-        """Transcribe audio file to text"""
+        """Transcribe audio file to text
+        
+        keep_input leaves the audio file in place, for callers that delete it only
+        once the result is saved.
+        """
+        optimized_path = None
         try:
-            if not self.is_ready():
-                raise RuntimeError("Transcription service not initialized")
+            # Lazily load the model if this process skipped preloading
+            await self.initialize()
             
             # Optimize audio for better transcription
             optimized_path = await self.optimize_audio(file_path)
             
             # Perform transcription in executor to avoid blocking
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._transcribe_sync,
-                optimized_path
-            )
+            async with self._decode_slot():
+                result = await loop.run_in_executor(
+                    None,
+                    self._transcribe_sync,
+                    optimized_path
+                )
             
             # Parse result
             transcript_data = {
@@ -146,20 +309,53 @@ class TranscriptionService:
             }
             
             # Clean up temporary files
-            await self._cleanup_files([file_path, optimized_path])
+            await self._cleanup_files([optimized_path] if keep_input else [file_path, optimized_path])
             
             logger.info(f"Transcription completed for {meeting_id}")
             return transcript_data
             
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
-            await self._cleanup_files([file_path])
+            # Keep the uploaded file so the job can be retried
+            if optimized_path and optimized_path != file_path:
+                await self._cleanup_files([optimized_path])
             raise
     
-    def _transcribe_sync(self, file_path: str) -> dict:
-        """Synchronous transcription for executor"""
+    def open_pcm_stream(
+        self,
+        meeting_id: Optional[str] = None,
+        speaker_id: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> PcmStreamSession:
+        """Start a pipelined transcription session for a raw PCM stream"""
+        if not self.is_ready():
+            raise RuntimeError("Transcription service not initialized")
+        
+        return PcmStreamSession(self, meeting_id, speaker_id, timestamp, self.stream_window_seconds)
+    
+    async def transcribe_pcm_window(self, pcm_data: bytes) -> dict:
+        """Transcribe one window of raw Discord PCM without touching disk"""
+        loop = asyncio.get_event_loop()
+        async with self._decode_slot():
+            audio = await loop.run_in_executor(None, self._pcm_to_whisper_audio, pcm_data)
+            return await loop.run_in_executor(None, self._transcribe_sync, audio)
+    
+    def _pcm_to_whisper_audio(self, pcm_data: bytes) -> np.ndarray:
+        """Convert 48kHz 16-bit PCM to the 16kHz float32 array Whisper expects"""
+        audio = AudioSegment(
+            data=pcm_data,
+            sample_width=PCM_SAMPLE_WIDTH,
+            frame_rate=PCM_SAMPLE_RATE,
+            channels=PCM_CHANNELS
+        )
+        audio = audio.set_frame_rate(16000)
+        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+        return samples / 32768.0
+    
+    def _transcribe_sync(self, audio) -> dict:
+        """Synchronous transcription for executor (file path or 16kHz float32 array)"""
         return self.model.transcribe(
-            file_path,
+            audio,
             language=self.language,
             task="transcribe",
             word_timestamps=True,
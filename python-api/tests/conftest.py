@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import types
+import uuid
+from datetime import datetime
+
+import pytest
+
+# src.models binds its engine to DATABASE_URL at import: point it at a scratch database
+# before any test module imports the package
+_db_dir = tempfile.mkdtemp(prefix='meetings-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'meetings.db')}"
+os.environ.setdefault('OUTPUT_DIR', os.path.join(_db_dir, 'output'))
+os.environ.setdefault('TEMP_DIR', os.path.join(_db_dir, 'temp'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class StubTranscriptionService:
+    """Stands in for the Whisper service: same file handling, a fixed transcript, no model"""
+    
+    def __init__(self):
+        self.temp_dir = os.environ['TEMP_DIR']
+        os.makedirs(self.temp_dir, exist_ok=True)
+    
+    async def initialize(self):
+        pass
+    
+    def is_ready(self) -> bool:
+        return True
+    
+    def temp_path(self, filename: str) -> str:
+        return os.path.join(self.temp_dir, f"{uuid.uuid4().hex[:8]}_{os.path.basename(filename)}")
+    
+    async def save_temp_file(self, upload_file) -> str:
+        file_path = self.temp_path(upload_file.filename or 'audio')
+        with open(file_path, 'wb') as f:
+            f.write(await upload_file.read())
+        return file_path
+    
+    async def transcribe_file(self, file_path, meeting_id=None, speaker_id=None, timestamp=None, keep_input=False):
+        if not keep_input:
+            await self._cleanup_files([file_path])
+        return {
+            'text': 'hello',
+            'confidence': 0.9,
+            'duration': 1.0,
+            'timestamp': timestamp or datetime.now().isoformat()
+        }
+    
+    async def _cleanup_files(self, file_paths):
+        for file_path in file_paths:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+@pytest.fixture(scope='session')
+def main_module():
+    """main.py with StubTranscriptionService, so it imports without whisper, pydub or a model"""
+    if 'main' not in sys.modules:
+        stub = types.ModuleType('src.transcription')
+        stub.TranscriptionService = StubTranscriptionService
+        sys.modules['src.transcription'] = stub
+    import main
+    return main
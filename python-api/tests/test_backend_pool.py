@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from src.llm_backends import BackendPool, LLMBackend
+
+class SlowBackend(LLMBackend):
+    name = 'slow'
+    
+    async def generate(self, model, prompt, options, keep_alive=None, format=None):
+        await asyncio.sleep(10)
+        return {'response': 'late', 'done': True}
+    
+    async def stream(self, model, prompt, options, keep_alive=None):
+        await asyncio.sleep(10)
+        yield {'response': 'late', 'done': True}
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv('LLM_NODE_MAX_CONCURRENCY', '2')
+    monkeypatch.setenv('LLM_NODE_WAIT_SECONDS', '0.2')
+    return BackendPool([SlowBackend()], ['slow'])
+
+async def _consume(pool):
+    async for _ in pool.stream('m', 'p', {}):
+        pass
+
+def test_timed_out_generations_release_the_node(pool):
+    async def run():
+        for _ in range(5):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(pool.generate('m', 'p', {}), 0.01)
+        return pool.nodes[0]
+    
+    node = asyncio.run(run())
+    assert node.outstanding == 0
+    # A deadline is not a node failure
+    assert node.circuit == 'closed' and node.failures == 0
+
+def test_timed_out_streams_release_the_node(pool):
+    async def run():
+        for _ in range(5):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(_consume(pool), 0.01)
+        return pool.nodes[0]
+    
+    assert asyncio.run(run()).outstanding == 0
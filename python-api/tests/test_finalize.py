@@ -0,0 +1,155 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.job_queue import JobFailedError
+from src.models import Job, SessionLocal, init_db
+
+MEETING_ID = 'finalize-order'
+
+@pytest.fixture
+def main(main_module):
+    return main_module
+
+@pytest.fixture
+def client(main):
+    init_db()
+    db = SessionLocal()
+    db.query(Job).delete()
+    db.commit()
+    db.close()
+    # Without the lifespan no worker runs: the test plays the transcription jobs itself
+    return TestClient(main.app)
+
+def _jobs(job_type, status=None):
+    db = SessionLocal()
+    try:
+        query = db.query(Job).filter(Job.job_type == job_type)
+        if status:
+            query = query.filter(Job.status == status)
+        return query.all()
+    finally:
+        db.close()
+
+def _set_status(job_id, status):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.job_id == job_id).update({'status': status})
+        db.commit()
+    finally:
+        db.close()
+
+def _run_transcriptions(main):
+    """Complete the queued transcription jobs like a worker would, one after another"""
+    for job in _jobs('transcribe', 'queued'):
+        payload = json.loads(job.payload)
+        _set_status(job.job_id, 'leased')
+        asyncio.run(main.handle_transcription_result(
+            {'text': 'hello', 'confidence': 0.9, 'duration': 1.0},
+            payload['meeting_id'],
+            payload['speaker_id'],
+            payload['file_path'],
+            payload['chunk_index']
+        ))
+        _set_status(job.job_id, 'completed')
+
+def _upload(client, filename, speaker_id):
+    response = client.post(
+        '/transcribe',
+        files={'audio_file': (filename, b'\0' * 9600, 'audio/pcm')},
+        data={'meeting_id': MEETING_ID, 'speaker_id': speaker_id}
+    )
+    assert response.status_code == 200
+
+def test_final_summary_waits_for_the_files_sent_right_before_finalize(main, client):
+    client.post('/meeting/start', json={'meeting_id': MEETING_ID, 'discord_guild_id': 'g', 'discord_channel_id': 'c'})
+    
+    # Live chunks while recording: already as many transcripts as final files
+    _upload(client, 'chunk_0_u1.pcm', 'u1')
+    _upload(client, 'chunk_0_u2.pcm', 'u2')
+    _run_transcriptions(main)
+    
+    # The bot's stop: upload each speaker's remaining audio, then finalize with their count
+    _upload(client, 'chunk_final_u1.pcm', 'u1')
+    _upload(client, 'chunk_final_u2.pcm', 'u2')
+    response = client.post('/meeting/finalize', json={'meeting_id': MEETING_ID, 'audio_files_count': 2})
+    assert response.status_code == 200
+    assert not _jobs('final_summary')
+    assert _jobs('final_summary_check', 'queued')
+    
+    _run_transcriptions(main)
+    assert not _jobs('final_summary')
+    
+    # The queued check, once the last transcription job is done
+    assert asyncio.run(main.queue_final_summary(MEETING_ID))
+    assert not asyncio.run(main.queue_final_summary(MEETING_ID))
+    assert len(_jobs('final_summary')) == 1
+
+def test_failed_final_summary_is_retried_and_then_marked_failed(main, client, monkeypatch):
+    meeting_id = 'final-summary-fails'
+    client.post('/meeting/start', json={'meeting_id': meeting_id, 'discord_guild_id': 'g', 'discord_channel_id': 'c'})
+    asyncio.run(main.meeting_manager.save_chunk_summary(
+        meeting_id, 0, datetime.utcnow(), datetime.utcnow(), 'hello', '要約', '[]', ['u1']
+    ))
+    
+    calls = []
+    webhooks = []
+    
+    async def create_final_integrated_summary(**kwargs):
+        calls.append(kwargs['meeting_id'])
+        raise RuntimeError('backend unavailable')
+    
+    async def send_webhook_notification(meeting_id, webhook_data):
+        webhooks.append(webhook_data['event'])
+    
+    monkeypatch.setattr(main.summarization_service, 'create_final_integrated_summary', create_final_integrated_summary)
+    monkeypatch.setattr(main, 'send_webhook_notification', send_webhook_notification)
+    monkeypatch.setattr(main.job_queue, 'retry_base_seconds', 0.01)
+    monkeypatch.setattr(main.job_queue, 'poll_interval', 0.02)
+    
+    async def run():
+        await main.job_queue.start()
+        try:
+            job_id = await main.job_queue.submit('final_summary', {'meeting_id': meeting_id}, max_attempts=2)
+            with pytest.raises(JobFailedError, match='backend unavailable'):
+                await main.job_queue.wait(job_id, timeout=10)
+        finally:
+            await main.job_queue.stop()
+        return await main.meeting_manager.get_meeting_status(meeting_id)
+    
+    status = asyncio.run(run())
+    assert calls == [meeting_id, meeting_id]
+    assert webhooks == []
+    assert status['processing']['summarization_status'] == 'failed'
+
+def test_hierarchical_fallback_uses_the_shared_service(main, client, monkeypatch):
+    meeting_id = 'no-chunk-summaries'
+    client.post('/meeting/start', json={'meeting_id': meeting_id, 'discord_guild_id': 'g', 'discord_channel_id': 'c'})
+    asyncio.run(main.meeting_manager.record_transcription(
+        meeting_id=meeting_id, speaker_id='u1', speaker_name='User_u1', text='hello', confidence=0.9,
+        start_time=datetime.utcnow(), duration_seconds=1.0, audio_file_path='/tmp/no-chunk-summaries.pcm'
+    ))
+    
+    calls = []
+    
+    async def create_hierarchical_summary(meeting_id, chunk_transcripts, participants, total_duration):
+        calls.append(meeting_id)
+        return {'full_summary': '要約'}
+    
+    def second_service(*args, **kwargs):
+        raise AssertionError('built a second SummarizationService')
+    
+    async def send_webhook_notification(meeting_id, webhook_data):
+        pass
+    
+    monkeypatch.setattr(main.summarization_service, 'create_hierarchical_summary', create_hierarchical_summary)
+    monkeypatch.setattr('src.summarization.SummarizationService.__init__', second_service)
+    monkeypatch.setattr(main, 'send_webhook_notification', send_webhook_notification)
+    
+    asyncio.run(main.generate_final_integrated_summary(meeting_id))
+    assert calls == [meeting_id]
+    status = asyncio.run(main.meeting_manager.get_meeting_status(meeting_id))
+    assert status['processing']['summarization_status'] == 'completed'
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.job_queue import JobFailedError, JobPriority, JobQueue, MissingJobDataError
+from src.models import Job, SessionLocal, init_db
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A worker process: waits for the go file so all of them start draining together, then
+# runs jobs until none of the group is left, logging "<job number> <pid>" per run
+WORKER_SCRIPT = '''
+import asyncio, os, sys, time
+from src.job_queue import JobQueue
+
+async def record(job_number):
+    with open(os.environ['JOB_LOG'], 'a') as f:
+        f.write(f"{job_number} {os.getpid()}\\n")
+    await asyncio.sleep(0.01)
+    return job_number
+
+async def run():
+    queue = JobQueue()
+    queue.register('record', record)
+    open(os.path.join(os.environ['READY_DIR'], str(os.getpid())), 'w').close()
+    while not os.path.exists(os.environ['GO_FILE']):
+        time.sleep(0.01)
+    await queue.start()
+    while await queue.count_pending('multi'):
+        await asyncio.sleep(0.05)
+    await queue.stop()
+
+asyncio.run(run())
+'''
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setenv('JOB_POLL_INTERVAL', '0.02')
+    monkeypatch.setenv('JOB_RETRY_BASE_SECONDS', '0.01')
+    init_db()
+    db = SessionLocal()
+    db.query(Job).delete()
+    db.commit()
+    db.close()
+    return JobQueue()
+
+def _job(job_id):
+    db = SessionLocal()
+    try:
+        return db.query(Job).filter(Job.job_id == job_id).one()
+    finally:
+        db.close()
+
+def _expire_lease(job_id):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.job_id == job_id).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+async def _noop(**payload):
+    return payload
+
+def test_leased_job_is_not_claimed_twice_until_its_lease_expires(queue):
+    async def run():
+        queue.register('noop', _noop)
+        other = JobQueue()
+        job_id = await queue.submit('noop', {'n': 1})
+        
+        job = await queue._claim()
+        assert job['job_id'] == job_id and job['attempts'] == 1
+        assert await other._claim() is None
+        assert await other.recover() == 0
+        
+        # The first worker died without completing it
+        _expire_lease(job_id)
+        assert await other.recover() == 1
+        reclaimed = await other._claim()
+        assert reclaimed['job_id'] == job_id and reclaimed['attempts'] == 2
+        
+        # The stale lease can no longer complete it
+        await queue._complete(job, 'stale')
+        await other._complete(reclaimed, 'fresh')
+        return _job(job_id)
+    
+    job = asyncio.run(run())
+    assert job.status == 'completed'
+    assert job.result == '"fresh"'
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(queue):
+    failures = []
+    
+    async def on_failure(error_message, **payload):
+        failures.append((payload, error_message))
+    
+    async def run():
+        queue.register('noop', _noop, on_failure=on_failure)
+        job_id = await queue.submit('noop', {'n': 1}, max_attempts=1)
+        await queue._claim()
+        _expire_lease(job_id)
+        assert await queue.recover() == 0
+        return _job(job_id)
+    
+    job = asyncio.run(run())
+    assert job.status == 'failed'
+    assert job.error_type == 'LeaseExpired'
+    assert failures == [({'n': 1}, 'Lease expired after the last attempt')]
+
+def test_worker_that_lost_its_lease_stops_the_handler(queue):
+    events = []
+    
+    async def slow(n):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+        return n
+    
+    async def run():
+        queue.register('slow', slow)
+        queue.register('noop', _noop)
+        queue.lease_seconds = 0.3
+        await queue.start()
+        try:
+            job_id = await queue.submit('slow', {'n': 1})
+            while _job(job_id).status != 'leased':
+                await asyncio.sleep(0.01)
+            # Another worker recovered the job after the lease expired and holds it now
+            db = SessionLocal()
+            db.query(Job).filter(Job.job_id == job_id).update({'lease_token': 'other', 'lease_owner': 'other'})
+            db.commit()
+            db.close()
+            while not events:
+                await asyncio.sleep(0.01)
+            
+            # The worker carries on with other jobs
+            other_id = await queue.submit('noop', {'n': 2})
+            assert await queue.wait(other_id, timeout=10) == {'n': 2}
+            return _job(job_id)
+        finally:
+            await queue.stop()
+    
+    job = asyncio.run(run())
+    assert events == ['cancelled']
+    assert (job.status, job.lease_owner, job.lease_token) == ('leased', 'other', 'other')
+
+def test_failed_job_is_retried_until_it_succeeds(queue):
+    calls = []
+    
+    async def flaky(n):
+        calls.append(n)
+        if len(calls) < 3:
+            raise RuntimeError('backend unavailable')
+        return n * 2
+    
+    async def run():
+        queue.register('flaky', flaky)
+        await queue.start()
+        try:
+            job_id = await queue.submit('flaky', {'n': 21})
+            return job_id, await queue.wait(job_id, timeout=10)
+        finally:
+            await queue.stop()
+    
+    job_id, result = asyncio.run(run())
+    assert result == 42
+    assert calls == [21, 21, 21]
+    job = _job(job_id)
+    assert job.status == 'completed' and job.attempts == 3
+
+def test_retry_backoff_grows_and_is_capped(queue):
+    queue.retry_base_seconds = 10
+    queue.retry_max_seconds = 30
+    assert [queue._retry_delay(attempts) for attempts in (1, 2, 3, 4)] == [10, 20, 30, 30]
+
+def test_job_fails_after_its_last_attempt_or_on_a_permanent_error(queue):
+    failures = []
+    
+    async def broken(kind):
+        if kind == 'permanent':
+            raise MissingJobDataError('permanent error')
+        # Bad output of a backend may be fine on the next try
+        json.loads('{"cut off')
+    
+    async def on_failure(error_message, **payload):
+        failures.append(payload['kind'])
+    
+    async def run():
+        queue.register('broken', broken, on_failure=on_failure)
+        await queue.start()
+        try:
+            transient = await queue.submit('broken', {'kind': 'transient'}, max_attempts=2)
+            permanent = await queue.submit('broken', {'kind': 'permanent'}, max_attempts=5)
+            with pytest.raises(MissingJobDataError):
+                await queue.wait(permanent, timeout=10)
+            with pytest.raises(JobFailedError) as failed:
+                await queue.wait(transient, timeout=10)
+            assert failed.value.error_type == 'JSONDecodeError'
+            return _job(transient), _job(permanent)
+        finally:
+            await queue.stop()
+    
+    transient, permanent = asyncio.run(run())
+    assert (transient.status, transient.attempts) == ('failed', 2)
+    assert (permanent.status, permanent.attempts) == ('failed', 1)
+    assert sorted(failures) == ['permanent', 'transient']
+
+def test_dedupe_key_merges_into_the_waiting_job_only(queue):
+    async def run():
+        queue.register('noop', _noop)
+        first = await queue.submit('noop', {'n': 1}, delay=60, dedupe_key='chunk:m:0')
+        available_at = _job(first).available_at
+        
+        merged = await queue.submit('noop', {'n': 2}, delay=120, dedupe_key='chunk:m:0')
+        assert merged == first
+        assert _job(first).available_at > available_at
+        
+        # Once the job has started, the same key queues a new job
+        db = SessionLocal()
+        db.query(Job).filter(Job.job_id == first).update({'available_at': datetime.utcnow()})
+        db.commit()
+        db.close()
+        assert (await queue._claim())['job_id'] == first
+        second = await queue.submit('noop', {'n': 3}, dedupe_key='chunk:m:0')
+        assert second != first
+        return first
+    
+    first = asyncio.run(run())
+    db = SessionLocal()
+    try:
+        assert db.query(Job).count() == 2
+        assert _job(first).payload == '{"n": 1}'
+    finally:
+        db.close()
+
+def test_count_pending_by_group_prefix(queue):
+    async def run():
+        queue.register('noop', _noop)
+        await queue.submit('noop', group_key='chunk:m_1:0')
+        await queue.submit('noop', group_key='chunk:m_1:final')
+        await queue.submit('noop', group_key='chunk:mx1:0')
+        return (
+            await queue.count_pending('chunk:m_1:', prefix=True),
+            await queue.count_pending('chunk:m_1:0'),
+            await queue.count_pending('chunk:m_1:', 'other', prefix=True)
+        )
+    
+    assert asyncio.run(run()) == (2, 1, 0)
+
+def test_worker_processes_run_every_job_exactly_once(queue, tmp_path):
+    job_count = 120
+    
+    async def submit_all():
+        queue.register('record', _noop)
+        for n in range(job_count):
+            await queue.submit('record', {'job_number': n}, JobPriority(n % 4), group_key='multi')
+    
+    asyncio.run(submit_all())
+    
+    log_path = tmp_path / 'runs.log'
+    ready_dir = tmp_path / 'ready'
+    ready_dir.mkdir()
+    go_file = tmp_path / 'go'
+    env = dict(
+        os.environ,
+        JOB_LOG=str(log_path),
+        READY_DIR=str(ready_dir),
+        GO_FILE=str(go_file),
+        MAX_CONCURRENT_TRANSCRIPTIONS='2'
+    )
+    workers = [
+        subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT], cwd=API_DIR, env=env)
+        for _ in range(3)
+    ]
+    try:
+        deadline = time.monotonic() + 60
+        while len(os.listdir(ready_dir)) < len(workers):
+            assert time.monotonic() < deadline, 'worker processes did not start'
+            assert all(worker.poll() is None for worker in workers)
+            time.sleep(0.05)
+        go_file.touch()
+        for worker in workers:
+            assert worker.wait(timeout=120) == 0
+    finally:
+        for worker in workers:
+            if worker.poll() is None:
+                worker.kill()
+    
+    runs = [line.split() for line in log_path.read_text().splitlines()]
+    assert Counter(int(job_number) for job_number, _ in runs) == Counter(range(job_count))
+    assert len({pid for _, pid in runs}) > 1
+    
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).filter(Job.group_key == 'multi').all()
+        assert len(jobs) == job_count
+        assert all(job.status == 'completed' and job.attempts == 1 for job in jobs)
+    finally:
+        db.close()
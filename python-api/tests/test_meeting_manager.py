@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.meeting_manager import MeetingManager
+from src.models import Job, Meeting, ProcessingStatus, SessionLocal, Transcript, init_db
+
+@pytest.fixture
+def manager():
+    init_db()
+    db = SessionLocal()
+    for model in (Job, Transcript, ProcessingStatus, Meeting):
+        db.query(model).delete()
+    db.commit()
+    db.close()
+    manager = MeetingManager()
+    asyncio.run(manager.create_meeting('m1', 'g', 'c'))
+    asyncio.run(manager.set_total_chunks('m1', 2))
+    return manager
+
+def _record(manager, audio_file_path):
+    return asyncio.run(manager.record_transcription(
+        meeting_id='m1', speaker_id='s1', speaker_name='User_s1', text='hello',
+        confidence=0.9, start_time=datetime.utcnow(), duration_seconds=1.0,
+        audio_file_path=audio_file_path
+    ))
+
+def test_retried_transcription_is_saved_and_counted_once(manager):
+    assert _record(manager, '/tmp/a.pcm')
+    assert not _record(manager, '/tmp/a.pcm')
+    assert _record(manager, '/tmp/b.pcm')
+    
+    db = SessionLocal()
+    try:
+        assert db.query(Transcript).filter(Transcript.meeting_id == 'm1').count() == 2
+        status = db.query(ProcessingStatus).filter(ProcessingStatus.meeting_id == 'm1').one()
+        assert status.completed_chunks == 2
+        assert status.transcription_progress == 1.0
+    finally:
+        db.close()
+    assert asyncio.run(manager.has_transcription('m1', '/tmp/a.pcm'))
+    assert not asyncio.run(manager.has_transcription('m1', '/tmp/c.pcm'))
+
+def _final_job(job_id):
+    return Job(job_id=job_id, job_type='final_summary', payload='{}', priority=2, sort_key=0,
+               status='queued', max_attempts=1, available_at=datetime.utcnow())
+
+def _claimed_at():
+    db = SessionLocal()
+    try:
+        return db.query(ProcessingStatus.final_summary_claimed_at).filter(ProcessingStatus.meeting_id == 'm1').scalar()
+    finally:
+        db.close()
+
+def test_final_summary_claim_saves_its_job_once(manager):
+    assert not asyncio.run(manager.claim_final_summary('m1', _final_job('early')))
+    _record(manager, '/tmp/a.pcm')
+    _record(manager, '/tmp/b.pcm')
+    
+    assert asyncio.run(manager.claim_final_summary('m1', _final_job('first')))
+    assert not asyncio.run(manager.claim_final_summary('m1', _final_job('second')))
+    db = SessionLocal()
+    try:
+        assert [job.job_id for job in db.query(Job).all()] == ['first']
+    finally:
+        db.close()
+
+def test_final_summary_claim_is_undone_when_its_job_cannot_be_saved(manager):
+    _record(manager, '/tmp/a.pcm')
+    _record(manager, '/tmp/b.pcm')
+    db = SessionLocal()
+    db.add(_final_job('taken'))
+    db.commit()
+    db.close()
+    
+    assert not asyncio.run(manager.claim_final_summary('m1', _final_job('taken')))
+    assert _claimed_at() is None
+    assert asyncio.run(manager.claim_final_summary('m1', _final_job('retry')))
+    assert _claimed_at() is not None
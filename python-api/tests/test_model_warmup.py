@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.llm_backends import LLMBackend
+from src.model_warmup import ModelWarmer
+from src.models import Meeting, ModelActivity, SessionLocal, init_db
+
+@pytest.fixture
+def warmer(monkeypatch):
+    monkeypatch.setenv('MODEL_IDLE_RELEASE_SECONDS', '600')
+    init_db()
+    db = SessionLocal()
+    db.query(Meeting).delete()
+    db.query(ModelActivity).delete()
+    db.commit()
+    db.close()
+    return ModelWarmer(LLMBackend(), ['gemma2:2b'])
+
+def _add_meeting(status, started_minutes_ago=0):
+    db = SessionLocal()
+    started = datetime.utcnow() - timedelta(minutes=started_minutes_ago)
+    db.add(Meeting(
+        meeting_id=f'{status}-{started_minutes_ago}', discord_guild_id='g', discord_channel_id='c',
+        status=status, start_time=started, updated_at=started
+    ))
+    db.commit()
+    db.close()
+
+def test_idle_without_meetings_or_generations(warmer):
+    assert warmer._shared_idle()
+
+def test_recording_meeting_of_another_process_keeps_models(warmer):
+    # Started two hours ago without a status update since: still recording
+    _add_meeting('recording', started_minutes_ago=120)
+    assert not warmer._shared_idle()
+
+def test_stale_processing_and_completed_meetings_do_not_keep_models(warmer):
+    _add_meeting('processing', started_minutes_ago=120)
+    _add_meeting('completed')
+    assert warmer._shared_idle()
+
+def test_generation_in_another_process_keeps_models(warmer):
+    other = ModelWarmer(LLMBackend(), ['gemma2:2b'])
+    other.record_generation({'model': 'gemma2:2b', 'load_duration': 0, 'total_duration': 10 ** 9})
+    assert not warmer._shared_idle()
+
+def test_generations_keep_models_as_long_as_the_warmer(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'fake')
+    monkeypatch.setenv('OLLAMA_STREAM', 'false')
+    monkeypatch.setenv('MODEL_WARMUP_KEEP_ALIVE', '90m')
+    from src.summarization import SummarizationService
+    service = SummarizationService()
+    sent = []
+    
+    async def generate(model, prompt, options, keep_alive=None, format=None):
+        sent.append(keep_alive)
+        return {'response': '要約', 'done': True}
+    
+    monkeypatch.setattr(service.backend, 'generate', generate)
+    asyncio.run(service._generate_with_ollama('prompt'))
+    assert sent == ['90m'] == [service.warmer.keep_alive]
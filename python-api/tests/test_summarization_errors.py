@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.llm_scheduler import LLMQueueTimeout
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'fake')
+    monkeypatch.setenv('SUMMARY_CACHE_ENABLED', 'false')
+    monkeypatch.setenv('SUMMARY_MODE', 'split')
+    from src.summarization import SummarizationService
+    return SummarizationService()
+
+@pytest.fixture
+def queue_timeout(service, monkeypatch):
+    async def generate(prompt, format=None, task='summary'):
+        if task != 'chunk_summary':
+            return '要点'
+        raise LLMQueueTimeout("No LLM slot within 120s")
+    monkeypatch.setattr(service, '_generate_with_ollama', generate)
+
+def test_chunk_summary_raises_queue_timeout(service, queue_timeout):
+    with pytest.raises(LLMQueueTimeout):
+        asyncio.run(service.create_realtime_chunk_summary(
+            'm1', 0, '[10:00:00] 田中:\n  予算を決めました。', ['田中'], datetime.now(), datetime.now()
+        ))
+
+def test_split_summary_raises_instead_of_placeholder(service, monkeypatch):
+    async def generate(prompt, format=None, task='summary'):
+        raise LLMQueueTimeout("No LLM slot within 120s")
+    monkeypatch.setattr(service, '_generate_with_ollama', generate)
+    with pytest.raises(Exception):
+        asyncio.run(service.create_comprehensive_summary('m1', '[10:00:00] 田中:\n  予算を決めました。', ['田中'], 10))
+
+def test_streamed_summary_uses_the_same_prompt(service, monkeypatch):
+    prompts = []
+    
+    async def generate(prompt, format=None, task='summary'):
+        prompts.append(prompt)
+        return '要約'
+    
+    async def stream(prompt, task='summary'):
+        prompts.append(prompt)
+        yield '要約'
+    
+    async def consume():
+        return [piece async for piece in service.stream_summary('m1', transcript, ['田中'], 10)]
+    
+    monkeypatch.setattr(service, '_generate_with_ollama', generate)
+    monkeypatch.setattr(service, '_stream_until_deadline', stream)
+    # Fillers the compressor removes, and more text than the budget allows
+    transcript = '\n'.join(f'[10:{i % 60:02d}:00] 田中:\n  えーと、あのー、予算案{i}について確認しました。' for i in range(3000))
+    service.context_tokens = 4096
+    
+    asyncio.run(service.create_summary('m1', transcript, ['田中'], 10))
+    full_prompts = list(prompts)
+    prompts.clear()
+    asyncio.run(consume())
+    
+    assert prompts == full_prompts
+    assert 'えーと' not in prompts[-1]
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import time
+
+from src.summary_store import SummaryStore
+
+def test_latest_summary_per_type(tmp_path):
+    store = SummaryStore(str(tmp_path))
+    
+    async def run():
+        first = await store.write('m1', 'full', 'first')
+        await asyncio.sleep(0.01)
+        final = await store.write('m1', 'integrated_final', 'final')
+        await asyncio.sleep(0.01)
+        second = await store.write('m1', 'full', 'second')
+        return first, final, second, (
+            await store.latest('m1'),
+            await store.latest('m1', ['integrated_final', 'full']),
+            await store.latest('m1', ['hierarchical', 'full']),
+            await store.latest('m1', ['hierarchical']),
+            await store.latest('m2')
+        )
+    
+    first, final, second, found = asyncio.run(run())
+    assert found == (second, final, second, None, None)
+    assert open(first, encoding='utf-8').read() == 'first'
+
+def test_rewriting_a_summary_makes_it_the_latest_again(tmp_path):
+    store = SummaryStore(str(tmp_path))
+    
+    async def run():
+        first = await store.write('m1', 'full', 'same')
+        old = time.time() - 60
+        os.utime(first, (old, old))
+        await store.write('m1', 'full', 'other')
+        await asyncio.sleep(0.01)
+        again = await store.write('m1', 'full', 'same')
+        return first, again, await store.latest('m1')
+    
+    first, again, latest = asyncio.run(run())
+    assert first == again == latest
+    assert len(os.listdir(tmp_path / 'm1')) == 2
+
+def test_stores_of_separate_processes_do_not_lose_summaries(tmp_path):
+    # Each process has its own store; they share only the directory
+    stores = [SummaryStore(str(tmp_path)) for _ in range(4)]
+    types = ['full', 'hierarchical', 'integrated_final', 'rolling']
+    
+    async def run():
+        await asyncio.gather(*[
+            asyncio.to_thread(asyncio.run, store.write('m1', summary_type, f'{summary_type} {n}'))
+            for n in range(5) for store, summary_type in zip(stores, types)
+        ])
+        return [await stores[0].latest('m1', [summary_type]) for summary_type in types]
+    
+    found = asyncio.run(run())
+    assert all(path and os.path.basename(path).startswith(summary_type) for path, summary_type in zip(found, types))
+    assert len([name for name in os.listdir(tmp_path / 'm1') if name.endswith('.md')]) == 20
+
+def test_cleanup_removes_old_files_and_empty_directories(tmp_path):
+    store = SummaryStore(str(tmp_path))
+    old_path = asyncio.run(store.write('old', 'full', 'old'))
+    new_path = asyncio.run(store.write('new', 'full', 'new'))
+    old = time.time() - 3 * 24 * 60 * 60
+    os.utime(old_path, (old, old))
+    
+    assert store.cleanup(1) == 1
+    assert not os.path.exists(os.path.dirname(old_path))
+    assert os.path.exists(new_path)
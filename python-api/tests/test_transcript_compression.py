@@ -0,0 +1,35 @@
+import pytest
+
+from src.transcript_compression import TranscriptCompressor, remove_fillers
+
+@pytest.mark.parametrize('text', [
+    '予算は1000000円です。',
+    '見積もりは10000000円になります。',
+    '締め切りは2024年12月12日です。',
+    '会議は2025-01-01 10:10:10に始まります。',
+    '電話番号は090-1111-1111です。',
+    '1212年と3333件と100100100個',
+])
+def test_numbers_and_dates_pass_unchanged(text):
+    assert remove_fillers(text) == text
+
+@pytest.mark.parametrize('text', [
+    'ええ、そうです。',
+    'うん、やります。',
+    'ええ そのとおりです。',
+])
+def test_answers_are_not_fillers(text):
+    assert remove_fillers(text) == text
+
+def test_hesitations_are_removed():
+    assert remove_fillers('えーと、あのー、これは、まあ、決定です。') == 'これは、決定です。'
+
+def test_repetition_loops_collapse():
+    assert remove_fillers('ありがとうございます、ありがとうございます、ありがとうございます。') == 'ありがとうございます。'
+
+def test_compression_keeps_amounts(monkeypatch):
+    monkeypatch.setenv('COMPRESSION_MIN_CHARS', '0')
+    compressor = TranscriptCompressor()
+    transcript = '[10:00:00] 田中:\n  予算は1000000円で、期限は2024年12月12日です。'
+    assert '1000000円' in compressor.compress(transcript)
+    assert '2024年12月12日' in compressor.compress(transcript)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""ASR/summarization worker process
+
+Pulls jobs from the shared jobs table and writes results through MeetingManager.
+Run any number of these (on this or other hosts) next to an API started with
+EMBEDDED_WORKERS=false. All processes must share DATABASE_URL and TEMP_DIR.
+"""
+
+import asyncio
+import logging
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import main
+from src.http_client import http_clients
+from src.models import init_db
+
+logger = logging.getLogger("worker")
+
+async def run_worker():
+    """Initialize models and process jobs until SIGINT/SIGTERM"""
+    init_db()
+    await main.initialize_worker_services()
+    await main.job_queue.start()
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+    
+    logger.info(f"Worker {main.job_queue.owner_id} ready with {main.job_queue.worker_count} slots")
+    try:
+        await stop_event.wait()
+    finally:
+        # Hands unfinished jobs back to the queue for the other workers
+        await main.job_queue.stop()
+        await main.summarization_service.warmer.aclose()
+        await main.summarization_service.backend.aclose()
+        await http_clients.aclose()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass